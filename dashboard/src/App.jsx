@@ -251,7 +251,7 @@ function App() {
         const newUrl = `${window.location.pathname}?place=${place._id}`;
         window.history.pushState({ path: newUrl }, '', newUrl);
 
-        if (!place.raw_ai_response) {
+        if (place.marin_comment === undefined) {
             try {
                 const res = await fetch(`${API_URL}/api/places/${place._id}`);
                 const fullPlace = await res.json();
@@ -473,10 +473,10 @@ function App() {
 
                                     <div className="modal-body">
                                         <div className="col-main" style={{ flex: 2 }}>
-                                            {selectedPlace.raw_ai_response?.marin_comment && (
+                                            {selectedPlace.marin_comment && (
                                                 <div className="marin-box">
                                                     <div className="marin-label">Marin's Take</div>
-                                                    <div className="marin-text">"{selectedPlace.raw_ai_response.marin_comment}"</div>
+                                                    <div className="marin-text">"{selectedPlace.marin_comment}"</div>
                                                 </div>
                                             )}
 
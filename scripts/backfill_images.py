@@ -1,4 +1,5 @@
 
+import argparse
 import asyncio
 import logging
 from src.config import get_settings
@@ -11,7 +12,7 @@ from src.core.image_manager import image_manager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def backfill():
+async def backfill(refresh: bool = False):
     settings = get_settings()
     logger.info("Initializing DB...")
     await init_db(settings)
@@ -30,7 +31,7 @@ async def backfill():
         
         try:
             # Fetch Info (includes og:image scaping and API fallback)
-            info = await link_parser.fetch_place_info(place.google_maps_url)
+            info = await link_parser.fetch_place_info(place.google_maps_url, refresh=refresh)
             
             if info.get("images"):
                 img_bytes, mime_type = info["images"][0]
@@ -38,8 +39,8 @@ async def backfill():
                 # Save Image (User ID 0 for System/Backfill)
                 rel_path, abs_path = await image_manager.save_screenshot(img_bytes, user_id=0)
                 
-                place.local_image_path = rel_path
-                await place.save()
+                # Targeted $set: a full save() would rewrite the document from this model
+                await place.set({"local_image_path": rel_path})
                 logger.info(f"SUCCESS: Saved image to {rel_path}")
             else:
                 logger.warning("No images found.")
@@ -50,4 +51,7 @@ async def backfill():
     logger.info("Backfill complete.")
 
 if __name__ == "__main__":
-    asyncio.run(backfill())
+    parser = argparse.ArgumentParser(description="Download a thumbnail for places that have none")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached link/Places/photo lookups")
+    args = parser.parse_args()
+    asyncio.run(backfill(refresh=args.refresh))
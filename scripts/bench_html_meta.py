@@ -0,0 +1,72 @@
+"""
+Micro-benchmark: head-only streaming metadata extraction vs. the old full BeautifulSoup parse,
+on the saved Maps pages in src/tests/fixtures.
+
+    python -m scripts.bench_html_meta [--runs 20] [--chunk-size 16384]
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from src.core.html_meta import read_head
+
+FIXTURES = Path(__file__).resolve().parent.parent / "src" / "tests" / "fixtures"
+
+
+def soup_meta(body: bytes) -> dict:
+    # What LinkParser._scrape_page used to do with resp.text
+    soup = BeautifulSoup(body.decode("utf-8"), "html.parser")
+    og_title = soup.find("meta", property="og:title")
+    og_image = soup.find("meta", property="og:image")
+    return {
+        "title": soup.title.string if soup.title else None,
+        "og:title": og_title["content"] if og_title else None,
+        "og:image": og_image["content"] if og_image else None,
+    }
+
+
+async def stream_meta(body: bytes, chunk_size: int) -> tuple:
+    read = 0
+
+    async def chunks():
+        nonlocal read
+        for i in range(0, len(body), chunk_size):
+            read += chunk_size
+            yield body[i:i + chunk_size]
+
+    meta = await read_head(chunks())
+    return meta, min(read, len(body))
+
+
+def bench(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=16 * 1024)
+    args = parser.parse_args()
+
+    print(f"{'fixture':<20}{'size KB':>9}{'soup ms':>10}{'stream ms':>11}{'read KB':>9}{'speedup':>9}")
+    for path in sorted(FIXTURES.glob("*.html")):
+        body = path.read_bytes()
+        expected = soup_meta(body)
+        meta, read = asyncio.run(stream_meta(body, args.chunk_size))
+        for key, value in expected.items():
+            if value is not None and meta.get(key) != value:
+                print(f"  ! {path.name}: {key} differs: {meta.get(key)!r} vs {value!r}")
+
+        soup_ms = bench(lambda: soup_meta(body), args.runs)
+        stream_ms = bench(lambda: asyncio.run(stream_meta(body, args.chunk_size)), args.runs)
+        print(f"{path.name:<20}{len(body) / 1024:>9.0f}{soup_ms:>10.2f}{stream_ms:>11.2f}{read / 1024:>9.0f}{soup_ms / stream_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
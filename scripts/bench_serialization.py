@@ -0,0 +1,75 @@
+"""
+Micro-benchmark: the raw-document fast path for list endpoints vs. hydrating PlaceSummary
+models and FastAPI's jsonable_encoder, on synthetic rows.
+
+    python -m scripts.bench_serialization [--sizes 100 1000 10000] [--repeat 5]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from src.database.models import PlaceSummary
+from src.core.serialization import dumps_bytes, model_defaults, prepare_rows
+
+VIBES = ["Chill", "Cozy", "Vintage", "Industrial", "Romantic", "Lively", "Quiet"]
+CATEGORIES = ["Cafe", "Bar", "Restaurant", "Workspace", "Brunch", "Date", "Group"]
+
+def make_docs(n: int):
+    """Synthetic raw documents shaped like the projected PlaceSummary rows from Motor."""
+    now = datetime.now()
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Place {i}",
+            "address": f"{i} Nguyễn Huệ, Quận 1, Hồ Chí Minh",
+            "location": {"type": "Point", "coordinates": [106.7 + random.random() / 10, 10.77 + random.random() / 10]},
+            "categories": random.sample(CATEGORIES, 3),
+            "vibes": random.sample(VIBES, 3),
+            "mood": random.sample(VIBES, 2),
+            "aesthetic_score": random.randint(1, 10),
+            "rating": round(random.uniform(3, 5), 1),
+            "price_level": random.choice(["$", "$$", "$$$"]),
+            "local_image_path": f"screenshots/2025-01-01/{ObjectId()}.jpg",
+            "google_maps_url": f"https://maps.app.goo.gl/{ObjectId()}",
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+def current_path(docs):
+    """Previous get_places path: hydrate PlaceSummary, model_dump, then FastAPI's jsonable_encoder + json."""
+    places = [PlaceSummary.model_validate(d) for d in docs]
+    payload = {"data": [p.model_dump(mode='json', by_alias=True) for p in places]}
+    return json.dumps(jsonable_encoder(payload)).encode("utf-8")
+
+def fast_path(docs, defaults):
+    return dumps_bytes({"data": prepare_rows(docs, defaults)})
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    defaults = model_defaults(PlaceSummary)
+    print(f"{'rows':>8} {'current (ms)':>14} {'fast (ms)':>12} {'speedup':>9}")
+    for n in args.sizes:
+        docs = make_docs(n)
+        slow = timeit(lambda: current_path(docs), args.repeat)
+        fast = timeit(lambda: fast_path(docs, defaults), args.repeat)
+        print(f"{n:>8} {slow * 1000:>14.2f} {fast * 1000:>12.2f} {slow / fast:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
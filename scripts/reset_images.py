@@ -27,8 +27,7 @@ async def reset_images():
     count = 0
     for p in places:
         if p.local_image_path and path_partial in p.local_image_path:
-            p.local_image_path = None
-            await p.save()
+            await p.set({"local_image_path": None})
             count += 1
             
     logger.info(f"Reset {count} places.")
@@ -1,18 +1,64 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, Query, Header, Depends, Security
+from typing import List, Optional, Dict, Any, Literal
+from datetime import datetime
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException, Query, Header, Depends, Security, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import APIKeyHeader
 from fastapi.middleware.cors import CORSMiddleware
 from telegram.ext import ApplicationBuilder, Application
 
 from src.config import get_settings
 from src.bot.handlers import get_handlers
-from src.database.models import Place, PlaceSummary, PlaceUpdate, AppConfig
+from src.database.models import Place, PlaceSummary, PlaceUpdate
 from src.main import init_db
+from src.database.mongo import pool_metrics, secondary_preferred, close_client
+from src.core.facets import build_facet_pipeline, parse_facet_result
+from src.core.pagination import KEYSET_SORT, InvalidCursor, encode_cursor, keyset_filter
+from src.core.cache import response_cache, etag_matches, PLACES, APP_CONFIG
+from src.core.config_store import config_store
+from src.core.stats import stats_manager, snapshot_fields
+from src.core.search_index import search_index
+from src.core.vector_index import vector_index
+from src.core.place_events import on_place_saved, on_place_deleted
+from src.core.export import iter_ndjson
+from src.core.raw_store import raw_store
+from src.core.http_client import http_client
+from src.core.lookup_cache import lookup_cache
+from src.core.job_queue import job_queue
+from src.bot.ingest import setup_ingest
+from src.core.text import SEARCH_TERM_FIELDS, search_terms, search_terms_filter
+from src.core.geo import (
+    CLUSTER_MAX_ZOOM, CLUSTER_COLUMNS, POINT_COLUMNS,
+    validate_bbox, bbox_filter, build_cluster_pipeline, cluster_row, point_row
+)
+from src.core.serialization import FastJSONResponse, model_projection, model_defaults, prepare_rows, parse_fields, to_columns
 
 logger = logging.getLogger(__name__)
 
+# Raw-document fast path for list endpoints
+SUMMARY_PROJECTION = model_projection(PlaceSummary)
+SUMMARY_DEFAULTS = model_defaults(PlaceSummary)
+
+def summary_fieldset(fields: Optional[str]):
+    """Projection, defaults and column order for an optional `fields=` sparse fieldset."""
+    try:
+        selected = parse_fields(fields, PlaceSummary)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selected is None:
+        return SUMMARY_PROJECTION, SUMMARY_DEFAULTS, list(SUMMARY_PROJECTION)
+    projection = {f: 1 for f in selected}
+    defaults = {k: v for k, v in SUMMARY_DEFAULTS.items() if k in projection}
+    return projection, defaults, selected
+
+def encode_rows(rows: List[Dict[str, Any]], columns: List[str], encoding: str) -> Any:
+    if encoding == "columns":
+        return to_columns(rows, columns)
+    return rows
+
 # Global Telegram App
 bot_app: Optional[Application] = None
 
@@ -24,6 +70,18 @@ async def lifespan(app: FastAPI):
     
     # 1. Init DB
     await init_db(settings)
+    response_cache.max_entries = settings.RESPONSE_CACHE_SIZE
+    await response_cache.refresh()
+    await config_store.load()
+    await stats_manager.ensure()
+    await search_index.load()
+    await vector_index.load()
+    await http_client.start()
+    config_watcher = asyncio.create_task(config_store.watch(settings.CONFIG_REFRESH_SECONDS))
+    # Places rewritten by manage_db or another worker: rebuild the in-memory indexes
+    response_cache.on_external_change(PLACES, search_index.load)
+    response_cache.on_external_change(PLACES, vector_index.load)
+    cache_watcher = asyncio.create_task(response_cache.watch(settings.RESPONSE_CACHE_REFRESH_SECONDS))
     
     # 2. Init Bot
     global bot_app
@@ -40,6 +98,9 @@ async def lifespan(app: FastAPI):
             await bot_app.start()
             await bot_app.updater.start_polling()
             logger.info("Bot started successfully.")
+            # Ingestion workers report through the bot, so they only run with it
+            setup_ingest(bot_app.bot)
+            job_queue.start(settings.JOB_WORKERS)
         except Exception as e:
             logger.error(f"Failed to start Telegram Bot: {e}")
             logger.warning("Continuing without Bot. API and Dashboard will still work.")
@@ -53,10 +114,15 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down...")
+    config_watcher.cancel()
+    cache_watcher.cancel()
+    await job_queue.stop() # In-flight jobs go back to the queue
     if bot_app:
         await bot_app.updater.stop()
         await bot_app.stop()
         await bot_app.shutdown()
+    await http_client.close()
+    close_client()
 
 from fastapi.staticfiles import StaticFiles
 import os
@@ -70,6 +136,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Config-Version"],
 )
 
 # Mount Static Files (Images)
@@ -77,6 +144,38 @@ app.add_middleware(
 os.makedirs("data/images", exist_ok=True)
 app.mount("/images", StaticFiles(directory="data/images"), name="images")
 
+def read_places():
+    """
+    Places collection for read-only endpoints. With MONGO_SECONDARY_READS, reads go to
+    secondaries unless this process wrote recently, so a response cached under a new ETag
+    is never built from a secondary that hasn't replicated the write yet.
+    """
+    settings = get_settings()
+    collection = Place.get_pymongo_collection()
+    if settings.MONGO_SECONDARY_READS and response_cache.seconds_since_bump(PLACES) > settings.MONGO_SECONDARY_READ_GRACE_SECONDS:
+        return secondary_preferred(collection)
+    return collection
+
+async def cached_json(request: Request, collections: List[str], build, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serve a JSON payload with a strong ETag derived from the collections' write versions.
+    Answers If-None-Match with 304 and reuses the serialized body from the LRU on repeat hits.
+    """
+    key = request.url.path + "?" + str(request.query_params)
+    etag = response_cache.etag(key, collections)
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(etag)
+    if body is None:
+        response = FastJSONResponse(await build(), headers=headers)
+        response_cache.set(etag, response.body)
+        return response
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "ok"}
@@ -92,31 +191,188 @@ async def get_versions():
 
 @app.get("/api/places")
 async def get_places(
-    limit: int = 20, 
-    offset: int = 0, 
-    search: Optional[str] = None
+    request: Request,
+    limit: int = Query(20, ge=1, le=1000),
+    offset: int = 0,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = Query(None, description="Comma-separated PlaceSummary fields to return"),
+    encoding: Literal["objects", "columns"] = "objects"
 ):
-    query = Place.find_all()
-    if search:
-        # Simple text search if search provided
-        query = Place.find({"$text": {"$search": search}})
-    
-    # Optimize: Exclude raw_ai_response using Pydantic Projection
-    # This returns instances of PlaceSummary, which are lighter.
-    places = await query.sort("-created_at") \
-        .skip(offset) \
-        .limit(limit) \
-        .project(PlaceSummary) \
-        .to_list()
-        
-    total = await query.count()
-    
-    return {
-        "data": [p.model_dump(mode='json', by_alias=True) for p in places],
-        "total": total,
-        "limit": limit,
-        "offset": offset
-    }
+    projection, defaults, columns = summary_fieldset(fields)
+
+    async def build():
+        # Diacritic-insensitive word/prefix match on the indexed search_terms
+        base_filter: Dict[str, Any] = search_terms_filter(search)
+
+        # Keyset pagination: seek past the (created_at, _id) of the previous page
+        # instead of skipping, so deep pages cost the same as the first one.
+        try:
+            page_filter = {**base_filter, **keyset_filter(cursor)}
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Fast path: read projected raw documents straight from Motor instead of
+        # hydrating PlaceSummary models, then convert them in a single pass.
+        collection = read_places()
+        # created_at is always read, the next cursor is built from it
+        query = collection.find(page_filter, {**projection, "created_at": 1}).sort(KEYSET_SORT)
+        if not cursor and offset:
+            # Legacy offset paging, kept for old clients
+            query = query.skip(offset)
+
+        # Fetch one extra row to know whether there is a next page.
+        docs = await query.limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            if last.get("created_at"):
+                next_cursor = encode_cursor(last["created_at"], last["_id"])
+
+        # Counting is a full index scan, only pay for it when asked
+        total = await Place.find(base_filter).count() if include_total else None
+
+        rows = prepare_rows(docs, defaults)
+        if "created_at" not in projection:
+            for row in rows:
+                row.pop("created_at", None)
+
+        return {
+            "data": encode_rows(rows, columns, encoding),
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next_cursor": next_cursor
+        }
+
+    return await cached_json(request, [PLACES], build)
+
+@app.get("/api/places/facets")
+async def get_place_facets(
+    request: Request,
+    category: Optional[List[str]] = Query(None),
+    vibe: Optional[List[str]] = Query(None),
+    mood: Optional[List[str]] = Query(None),
+    meal_type: Optional[List[str]] = Query(None),
+    occasion: Optional[List[str]] = Query(None),
+    price: Optional[List[str]] = Query(None),
+    group: Optional[List[str]] = Query(None, description="Homepage groups (HOME_CATEGORIES, matched via CATEGORY_KEYWORDS)"),
+    min_rating: Optional[float] = None,
+    search: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=1000),
+    offset: int = 0,
+    facet_limit: int = Query(50, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Comma-separated PlaceSummary fields to return"),
+    encoding: Literal["objects", "columns"] = "objects"
+):
+    """Filtered page of places plus per-facet counts, computed in one $facet aggregation."""
+    projection, defaults, columns = summary_fieldset(fields)
+
+    async def build():
+        config = config_store.snapshot.data
+        # Same groups as the dashboards' homepage ("Casual" is always there)
+        home = list(dict.fromkeys([*config.get("HOME_CATEGORIES", []), "Casual"]))
+        category_groups = {name: config.get("CATEGORY_KEYWORDS", {}).get(name, []) for name in home}
+        pipeline = build_facet_pipeline(
+            filters={
+                "categories": category or [],
+                "vibes": vibe or [],
+                "mood": mood or [],
+                "meal_types": meal_type or [],
+                "occasions": occasion or [],
+                "price_level": price or [],
+            },
+            search=search,
+            min_rating=min_rating,
+            limit=limit,
+            offset=offset,
+            facet_limit=facet_limit,
+            projection=projection,
+            category_groups=category_groups,
+            groups=group
+        )
+
+        collection = read_places()
+        results = await collection.aggregate(pipeline).to_list(length=1)
+        result = parse_facet_result(results[0] if results else {})
+
+        return {
+            "data": encode_rows(prepare_rows(result["data"], defaults), columns, encoding),
+            "total": result["total"],
+            "facets": result["facets"],
+            "limit": limit,
+            "offset": offset
+        }
+
+    return await cached_json(request, [PLACES, APP_CONFIG], build)
+
+@app.get("/api/places/geo")
+async def get_places_geo(
+    request: Request,
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(15, ge=0, le=22),
+    limit: int = Query(5000, ge=1, le=20000)
+):
+    """
+    Compact map payload for a viewport. Individual [id, name, lon, lat, category] rows
+    when zoomed in, server-side grid clusters with counts below CLUSTER_MAX_ZOOM.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+        validate_bbox(min_lon, min_lat, max_lon, max_lat)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}")
+
+    async def build():
+        match = bbox_filter(min_lon, min_lat, max_lon, max_lat)
+        collection = read_places()
+
+        if zoom < CLUSTER_MAX_ZOOM:
+            pipeline = build_cluster_pipeline(match, zoom, max_clusters=limit)
+            docs = await collection.aggregate(pipeline).to_list(length=limit)
+            return {"mode": "clusters", "zoom": zoom, "columns": CLUSTER_COLUMNS, "rows": [cluster_row(d) for d in docs]}
+
+        projection = {"name": 1, "location.coordinates": 1, "categories": {"$slice": 1}}
+        docs = await collection.find(match, projection).limit(limit).to_list(length=limit)
+        rows = [r for r in (point_row(d) for d in docs) if r]
+        return {"mode": "points", "zoom": zoom, "columns": POINT_COLUMNS, "rows": rows}
+
+    return await cached_json(request, [PLACES], build)
+
+@app.get("/api/places/similar")
+async def get_similar_places(
+    request: Request,
+    q: Optional[str] = Query(None, description="Free-text description, e.g. 'quiet spot to work'"),
+    place_id: Optional[str] = Query(None, description="Find places like this one"),
+    min_rating: Optional[float] = None,
+    limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated PlaceSummary fields to return")
+):
+    """Places ranked by vector similarity to a text query or to another place, with `score` (cosine)."""
+    if bool(q) == bool(place_id):
+        raise HTTPException(status_code=400, detail="Pass exactly one of q or place_id")
+    projection, defaults, _ = summary_fieldset(fields)
+
+    async def build():
+        if place_id:
+            hits = vector_index.similar(place_id, limit=limit, min_rating=min_rating)
+        else:
+            hits = vector_index.search(q, limit=limit, min_rating=min_rating)
+        scores = dict(hits)
+
+        collection = read_places()
+        ids = [ObjectId(doc_id) for doc_id in scores]
+        docs = await collection.find({"_id": {"$in": ids}}, projection).to_list(length=len(ids))
+        rows = prepare_rows(docs, defaults)
+        for row in rows:
+            row["score"] = round(scores[row["_id"]], 4)
+        rows.sort(key=lambda r: r["score"], reverse=True)
+        return {"data": rows}
+
+    return await cached_json(request, [PLACES], build)
 
 # Auth
 API_KEY_HEADER = APIKeyHeader(name="x-admin-token", auto_error=False)
@@ -134,12 +390,81 @@ async def verify_admin(token: str = Security(API_KEY_HEADER)):
         raise HTTPException(status_code=403, detail="Invalid Admin Token")
     return True
 
+@app.get("/api/metrics/db", dependencies=[Depends(verify_admin)])
+async def get_db_metrics():
+    """Connection pool usage and checkout wait times, to spot pool saturation under load."""
+    settings = get_settings()
+    return {
+        "pool": pool_metrics.snapshot(),
+        "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+        "secondary_reads": settings.MONGO_SECONDARY_READS,
+        "response_cache": {"hits": response_cache.hits, "misses": response_cache.misses},
+    }
+
+@app.get("/api/metrics/cache", dependencies=[Depends(verify_admin)])
+async def get_cache_metrics():
+    """Hit/miss counters of the API response cache and the external lookup cache."""
+    return {
+        "response_cache": {"hits": response_cache.hits, "misses": response_cache.misses},
+        "lookup_cache": lookup_cache.snapshot(),
+        "lookup_cache_bypass": get_settings().LOOKUP_CACHE_BYPASS,
+    }
+
+@app.get("/api/metrics/jobs", dependencies=[Depends(verify_admin)])
+async def get_job_metrics():
+    """Ingestion queue: jobs per status plus this process's worker counters."""
+    return {"jobs": await job_queue.counts(), "worker": {"id": job_queue.worker_id, **job_queue.stats}}
+
+@app.get("/api/places/export", dependencies=[Depends(verify_admin)])
+async def export_places(
+    since: Optional[datetime] = None,
+    gzip: bool = False,
+    include_raw: bool = False
+):
+    """Stream places as NDJSON (oldest first) straight from a Motor cursor."""
+    query: Dict[str, Any] = {}
+    if since:
+        query["created_at"] = {"$gt": since}
+    projection = None if include_raw else PlaceSummary.Settings.projection
+
+    collection = read_places()
+    cursor = collection.find(query, projection).sort([("created_at", 1), ("_id", 1)]).batch_size(500)
+
+    docs = raw_store.with_raw(cursor) if include_raw else cursor
+
+    filename = "places.ndjson.gz" if gzip else "places.ndjson"
+    return StreamingResponse(
+        iter_ndjson(docs, gzip=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/api/places/{place_id}")
-async def get_place_detail(place_id: str):
-    place = await Place.get(place_id)
-    if not place:
+async def get_place_detail(request: Request, place_id: str):
+    async def build():
+        if not ObjectId.is_valid(place_id):
+            raise HTTPException(status_code=404, detail="Place not found")
+        # The raw AI payload lives in place_raw; skip the legacy inline copy too
+        doc = await read_places().find_one({"_id": ObjectId(place_id)}, {"raw_ai_response": 0})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Place not found")
+        return Place.model_validate(doc).model_dump(mode="json", by_alias=True, exclude={"raw_ai_response"})
+
+    return await cached_json(request, [PLACES], build)
+
+@app.get("/api/places/{place_id}/raw", dependencies=[Depends(verify_admin)])
+async def get_place_raw(place_id: str):
+    """Admin view of the full AI payload a place was parsed from."""
+    if not ObjectId.is_valid(place_id):
         raise HTTPException(status_code=404, detail="Place not found")
-    return place
+    raw = await raw_store.load(place_id)
+    if raw is None:
+        # Not migrated yet
+        doc = await Place.get_pymongo_collection().find_one({"_id": ObjectId(place_id)}, {"raw_ai_response": 1})
+        raw = (doc or {}).get("raw_ai_response")
+    if raw is None:
+        raise HTTPException(status_code=404, detail="No raw AI payload for this place")
+    return FastJSONResponse(raw)
 
 @app.put("/api/places/{place_id}", dependencies=[Depends(verify_admin)])
 async def update_place(place_id: str, place_update: PlaceUpdate):
@@ -148,7 +473,10 @@ async def update_place(place_id: str, place_update: PlaceUpdate):
         raise HTTPException(status_code=404, detail="Place not found")
     
     update_data = place_update.model_dump(exclude_unset=True)
+    update_data["search_terms"] = search_terms({**place.model_dump(include=set(SEARCH_TERM_FIELDS)), **update_data})
+    before = snapshot_fields(place)
     await place.set(update_data)
+    await on_place_saved(place, before)
     return place
 
 @app.delete("/api/places/{place_id}", dependencies=[Depends(verify_admin)])
@@ -157,97 +485,29 @@ async def delete_place(place_id: str):
     if not place:
         raise HTTPException(status_code=404, detail="Place not found")
     await place.delete()
+    await raw_store.delete(place.id)
+    await on_place_deleted(place)
     return {"status": "deleted"}
 
 @app.get("/api/stats")
-async def get_stats():
-    total_places = await Place.count()
-    
-    # Aggregation for top categories
-    pipeline = [
-        {"$unwind": "$categories"},
-        {"$group": {"_id": "$categories", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 5}
-    ]
-    # Direct Motor usage to avoid Beanie version issues
-    collection = Place.get_pymongo_collection()
-    categories = await collection.aggregate(pipeline).to_list(length=5)
-    
-    return {
-        "total_places": total_places,
-        "top_categories": [{"name": c["_id"], "count": c["count"]} for c in categories]
-    }
+async def get_stats(request: Request):
+    async def build():
+        # Materialized counters, maintained on every place write
+        return await stats_manager.get(top=5)
 
-# Default Config
-DEFAULT_APP_CONFIG = {
-  "FEATURES": {
-    "ENABLE_BUY_ME_COFFEE": True,
-    "ENABLE_FOOTER": True,
-    "ENABLE_AUTHOR_CREDITS": True,
-    "ENABLE_DISCOVER": True,
-    "ENABLE_MAP": False,
-  },
-  "HOME_CATEGORIES": ["Casual", "Cafe & Coffee", "Special Occasion", "Bar"],
-  "LINKS": {
-    "BUY_ME_COFFEE": "https://buymeacoffee.com/nqhuy",
-    "GITHUB": "https://locbook.firstdraft.sh",
-    "AUTHOR_WEBSITE": "https://locbook.firstdraft.sh",
-    "LOC_REQUEST": "https://forms.gle/2w4efcfECzXwpnvo7",
-    "FEEDBACK": "https://forms.gle/2ntCQmgKNrEbN3DX9",
-    "DASHBOARD_URL": "http://localhost:5173",
-  },
-  "CATEGORY_KEYWORDS": {
-    "Nhậu": ["nhậu", "beer"],
-    "Special Occasion": [
-      "romantic", "fine dining", "fancy", "wine", "anniversary", "celebration", "special occasion"
-    ],
-    "Bar": ["bar", "cocktail", "lounge", "speakeasy", "wine"],
-    "Cafe & Coffee": ["cafe", "coffee", "tea"],
-    "Casual": ["casual", "street", "local", "snack", "quick"],
-  }
-}
+    return await cached_json(request, [PLACES], build)
 
 @app.get("/api/config")
-async def get_config():
-    config = await AppConfig.find_one(AppConfig.key == "global")
-    if not config:
-        return DEFAULT_APP_CONFIG
-    
-    # Merge DB config over Default config to ensure new keys (like DASHBOARD_URL) exist
-    # deeply merging is better but shallow merge of top keys might suffice if structure is flat-ish
-    # Here we do a careful merge manually or just simple dict merge if adequate.
-    # We want keys in DEFAULT that are NOT in config.data to be present.
-    merged = DEFAULT_APP_CONFIG.copy()
-    
-    # Deep merge helper or simple specific merge
-    # For now, let's just ensure LINKS exists and has DASHBOARD_URL
-    db_data = config.data
-    
-    # Simple recursive merge for LINKS and FEATURES
-    for key in ["LINKS", "FEATURES"]:
-        if key in db_data and isinstance(db_data[key], dict):
-             # Ensure sub-keys from default exist in db_data result
-             for sub_key, sub_val in merged[key].items():
-                 if sub_key not in db_data[key]:
-                     db_data[key][sub_key] = sub_val
-    
-    # Update top level
-    for key, val in db_data.items():
-        if key in merged and isinstance(merged[key], dict) and isinstance(val, dict):
-             merged[key].update(val)
-        else:
-             merged[key] = val
-             
-    return merged
+async def get_config(request: Request):
+    # Served from the in-memory snapshot, no DB round trip
+    snapshot = config_store.snapshot
+
+    async def build():
+        return snapshot.data
+
+    return await cached_json(request, [APP_CONFIG], build, headers={"X-Config-Version": str(snapshot.version)})
 
 @app.put("/api/config", dependencies=[Depends(verify_admin)])
 async def update_config(payload: Dict[str, Any]):
-    config = await AppConfig.find_one(AppConfig.key == "global")
-    if not config:
-        config = AppConfig(key="global", data=payload)
-        await config.insert()
-    else:
-        config.data = payload
-        await config.save()
-    return config.data
+    await config_store.update(payload)
+    return payload
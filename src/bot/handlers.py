@@ -1,5 +1,6 @@
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters
+from beanie import PydanticObjectId
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,7 +29,11 @@ from src.config import get_settings
 from src.core.rate_limiter import rate_limiter
 from src.core.rate_limiter import rate_limiter
 from src.bot.context import user_context_store
-from src.core.image_manager import image_manager
+from src.core.search_index import search_index, fuse_rankings
+from src.core.vector_index import vector_index
+from src.core.geo import find_nearby, format_distance
+from src.core.job_queue import job_queue
+from src.bot.ingest import LINK, PHOTO, format_existing_place, link_dedup_filter
 
 async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle location messages for Geo-Search."""
@@ -45,29 +50,20 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Check for pending search
     pending_search = user_context_store.get_pending_search(user.id)
     
-    query_filter = {}
-    
-    # Base Geo Query ($near)
-    query_filter["location"] = {
-        "$near": {
-            "$geometry": {
-                "type": "Point",
-                "coordinates": [location.longitude, location.latitude]
-            },
-            "$maxDistance": 2000 # 2km default
-        }
-    }
-    
+    keywords = None
     reply_prefix = strings.MSG_GEO_RESULT_HEADER
 
     if pending_search:
         # Contextual Search
         keywords = pending_search.get("keywords")
-        # vibes = pending_search.get("vibes") # TODO: Implement Vibe filtering if needed
         
         if keywords:
-            query_filter["$text"] = {"$search": keywords}
             reply_prefix = strings.MSG_GEO_RESULT_CONTEXT_HEADER.format(keywords=keywords)
+
+        # Vibes are ranked by the hybrid search together with the keywords
+        vibes = pending_search.get("vibes") or []
+        if vibes:
+            keywords = " ".join([keywords or ""] + vibes).strip()
             
         # Clean up context
         user_context_store.clear(user.id)
@@ -77,22 +73,29 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
         pass
 
     try:
-        places = await Place.find(query_filter).limit(5).to_list()
+        # $geoNear over the 2dsphere index, widening 2km -> 5km -> 10km when results are sparse.
+        # With keywords, nearby candidates are ranked by text relevance + distance + rating.
+        places, radius = await find_nearby(
+            location.longitude,
+            location.latitude,
+            radii=settings.GEO_SEARCH_RADII,
+            limit=settings.GEO_SEARCH_LIMIT,
+            keywords=keywords
+        )
         
         if not places:
             await update.message.reply_text(strings.MSG_NO_RESULT_AROUND)
             return
             
-        response_text = reply_prefix
+        response_text = reply_prefix + strings.MSG_GEO_RADIUS_NOTE.format(radius=format_distance(radius))
         for p in places:
-            # Calculate distance if possible (requires Haversine or just trust MongoDB order)
-            # For MVP just list them
-            response_text += strings.SEARCH_RESULT_ITEM.format(
-                name=p.name,
-                rating=p.rating or "N/A",
-                address=p.address or "Unknown",
-                vibes=", ".join(p.vibes[:3]),
-                map_url=p.google_maps_url
+            response_text += strings.GEO_RESULT_ITEM.format(
+                name=p.get("name"),
+                rating=p.get("rating") or "N/A",
+                address=p.get("address") or "Unknown",
+                vibes=", ".join((p.get("vibes") or [])[:3]),
+                map_url=p.get("google_maps_url"),
+                distance=format_distance(p["distance"])
             )
             
         await update.message.reply_html(response_text)
@@ -124,125 +127,17 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     status_msg = await update.message.reply_text(strings.MSG_ANALYZING_PHOTO)
-    
-    try:
-        # Get highest res photo
-        photo = update.message.photo[-1]
-        file = await context.bot.get_file(photo.file_id)
-        
-        # Download to memory
-        import io
-        f = io.BytesIO()
-        await file.download_to_memory(f)
-        f.seek(0)
-        image_bytes = f.read()
-
-        image_bytes = f.read()
-
-        # Save Image Locally
-        try:
-            rel_path, abs_path = await image_manager.save_screenshot(image_bytes, user.id)
-            logger.info(f"Saved image to {abs_path}")
-        except Exception as e:
-            logger.error(f"Failed to save image: {e}")
-            rel_path = None
-
-        # Optimize Image
-        from src.core.utils import resize_image
-        image_bytes = resize_image(image_bytes)
-        
-        # Call AI
-        # Reuse analyze_place_complex with empty text
-        analysis = await ai_service.analyze_place_complex(
-            text_data="Analyze this screenshot to extract place information.", 
-            images=[(image_bytes, "image/jpeg")]
-        )
-        
-        if "error" in analysis:
-            await status_msg.edit_text(strings.ERROR_AI_FAIL.format(error=analysis['error']))
-            return
-
-        details = analysis.get("details", {})
-        marin_comment = analysis.get("marin_comment", strings.MARIN_BUSY)
-
-        # Create DB Object (Similar logic to link handler)
-        # Note: We might need to handle missing data more gracefully here since screenshots vary
-        
-        # ... (Reuse saving logic? Or just show result?)
-        # For now, let's just Show Result to verify logic, then Save if valid.
-        
-        if not details.get("name"):
-             await status_msg.edit_text(strings.MSG_NAME_NOT_FOUND)
-             return
-
-            # Prepare for saving
-        categories = details.get('categories', [])
-        meal_types = details.get('meal_types', [])
-        occasions = details.get('occasions', [])
-        full_categories = list(set(categories + meal_types + occasions))
-        
-        # Geocode if location is missing
-        location_data = None
-        if details.get('name'):
-             # start_time = datetime.now()
-             geo_res = await link_parser.geocode_place(details.get('name'), details.get('address'))
-             if geo_res:
-                 loc_api = geo_res["location"]
-                 location_data = {
-                     "type": "Point",
-                     "coordinates": [loc_api['longitude'], loc_api['latitude']]
-                 }
-                 # Update address with official one if available
-                 if geo_res.get("address"):
-                     details['address'] = geo_res.get("address")
-        
-        place = Place(
-            name=details.get('name', 'Unknown Spot'),
-            address=details.get('address'),
-            location=location_data,
-            categories=full_categories,
-            meal_types=meal_types,
-            occasions=occasions,
-            vibes=details.get('vibes', []),
-            mood=details.get('mood', []),
-            aesthetic_score=details.get('aesthetic_score'),
-            lighting=details.get('lighting'),
-            source_img_id=photo.file_id, # Save file_id for reference
-            local_image_path=rel_path,   # Save local path
-            rating=details.get('rating'),
-            price_level=details.get('price_level'),
-            status=details.get('status'),
-            opening_hours=details.get('opening_hours'),
-            popular_times=details.get('popular_times'),
-            # Future-proofing
-            raw_ai_response=analysis,
-            schema_version=1,
-            created_at=datetime.now()
-        )
-        
-        await place.save()
-        
-        # Reply
-        hours_section = ""
-        if place.opening_hours:
-            hours_section = f"🕒 <b>Hours:</b> {place.opening_hours}\n"
-        
-        caption = strings.PLACE_CARD_TEMPLATE.format(
-            name=place.name,
-            address=place.address,
-            categories=', '.join(place.categories) if place.categories else 'Secret Spot',
-            rating=place.rating or 'N/A',
-            price_level=place.price_level or 'N/A',
-            vibes=', '.join(place.vibes),
-            aesthetic_score=place.aesthetic_score or 'N/A',
-            hours_section=hours_section,
-            comment=marin_comment
-        )
-        
-        await status_msg.edit_text(caption, parse_mode="HTML")
 
+    # Analysis runs in a queue worker (src/bot/ingest.py), which edits status_msg as it goes
+    try:
+        await job_queue.enqueue(PHOTO, {
+            "file_id": update.message.photo[-1].file_id, # Highest res
+            "user_id": user.id,
+            "chat_id": status_msg.chat_id,
+            "message_id": status_msg.message_id,
+        })
     except Exception as e:
-        logger.error(f"Photo handling error: {e}")
+        logger.error(f"Photo enqueue error: {e}")
         await status_msg.edit_text(strings.ERROR_GENERIC.format(error="Marin bị hoa mắt rồi..."))
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -268,130 +163,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     
     if url and link_parser.is_google_maps_url(url):
-        # 0. Check for Duplicate
-        existing_place = await Place.find_one(Place.google_maps_url == url)
+        # 0. Check for Duplicate (indexed, before any network work)
+        url_key = link_parser.canonical_url_key(url)
+        existing_place = await Place.find_one(link_dedup_filter([url_key], [url]))
         if existing_place:
-            # Re-use the view logic display
-            hours_section = ""
-            if existing_place.opening_hours:
-                hours_section = f"🕒 <b>Hours:</b> {existing_place.opening_hours}\n"
-            
-            caption = strings.PLACE_CARD_TEMPLATE.format(
-                name=existing_place.name,
-                address=existing_place.address,
-                categories=', '.join(existing_place.categories) if existing_place.categories else 'Secret Spot',
-                rating=existing_place.rating or 'N/A',
-                price_level=existing_place.price_level or 'N/A',
-                vibes=', '.join(existing_place.vibes),
-                aesthetic_score=existing_place.aesthetic_score or 'N/A',
-                hours_section=hours_section,
-                comment=strings.MSG_ALREADY_SAVED.format(id=existing_place.id)
-            )
-            await update.message.reply_html(caption)
+            await update.message.reply_html(format_existing_place(existing_place))
             return
 
         status_msg = await update.message.reply_text(strings.SEARCHING_MSG.format(url=url))
-        
-        try:
-            # 1. Fetch Info via Parser (Simulate Search/Analysis)
-            raw_info = await link_parser.fetch_place_info(url)
-            
-            if "error" in raw_info:
-                await status_msg.edit_text(strings.ERROR_FETCH_FAIL.format(error=raw_info['error']))
-                return
-
-            # 2. Get AI Commentary & Structured Data (Combined)
-            # raw_info contains: text_data, images (bytes)
-            analysis = await ai_service.analyze_place_complex(
-                text_data=raw_info.get("text_data", ""), 
-                images=raw_info.get("images", [])
-            )
-            
-            if "error" in analysis:
-                await status_msg.edit_text(strings.ERROR_AI_FAIL.format(error=analysis['error']))
-                return
 
-            details = analysis.get("details", {})
-            marin_comment = analysis.get("marin_comment", strings.MARIN_BUSY)
-
-            # 3. Create DB Object
-            categories = details.get('categories', [])
-            meal_types = details.get('meal_types', [])
-            occasions = details.get('occasions', [])
-            
-            # Merge for search/display as requested ("put into category")
-            full_categories = list(set(categories + meal_types + occasions))
-            
-            # Extract Location from Raw API if available
-            location_data = None
-            if raw_info.get("raw_api") and "location" in raw_info["raw_api"]:
-                loc_api = raw_info["raw_api"]["location"]
-                location_data = {
-                    "type": "Point",
-                    "coordinates": [loc_api['longitude'], loc_api['latitude']]
-                }
-
-            # Save Thumbnail (from Scraper or API)
-            local_image_path = None
-            if raw_info.get("images"):
-                try:
-                    # raw_info['images'] contains (bytes, mime_type) tuples
-                    img_bytes, _ = raw_info["images"][0]
-                    rel_path, abs_path = await image_manager.save_screenshot(img_bytes, user.id)
-                    local_image_path = rel_path
-                    logger.info(f"Saved thumbnail to {abs_path}")
-                except Exception as e:
-                    logger.error(f"Failed to save thumbnail: {e}")
-            
-            place = Place(
-                name=details.get('name', raw_info.get('inferred_name', 'Unknown Spot')),
-                address=details.get('address'),
-                location=location_data,
-                categories=full_categories, # Merged list
-                meal_types=meal_types,      # Stored separately too
-                occasions=occasions,        # Stored separately too
-                vibes=details.get('vibes', []),
-                mood=details.get('mood', []), # List[str]
-                aesthetic_score=details.get('aesthetic_score'),
-                lighting=details.get('lighting'),
-                google_maps_url=url,
-                local_image_path=local_image_path, # Image Path
-                rating=details.get('rating'),
-                price_level=details.get('price_level'),
-                status=details.get('status'),
-                opening_hours=details.get('opening_hours'),
-                popular_times=details.get('popular_times'),
-                # Future-proofing
-                raw_ai_response=analysis,
-                schema_version=1,
-                created_at=datetime.now()
-            )
-            
-            # 4. Save
-            await place.save()
-            
-            # 5. Reply
-            hours_section = ""
-            if place.opening_hours:
-                hours_section = f"🕒 <b>Hours:</b> {place.opening_hours}\n"
-            
-            caption = strings.PLACE_CARD_TEMPLATE.format(
-                name=place.name,
-                address=place.address,
-                categories=', '.join(place.categories) if place.categories else 'Secret Spot',
-                rating=place.rating or 'N/A',
-                price_level=place.price_level or 'N/A',
-                vibes=', '.join(place.vibes),
-                aesthetic_score=place.aesthetic_score or 'N/A',
-                hours_section=hours_section,
-                comment=marin_comment
-            )
-            
-            await status_msg.edit_text(caption, parse_mode="HTML")
-            
+        # Scrape -> Places API -> Gemini -> save runs in a queue worker (src/bot/ingest.py)
+        try:
+            await job_queue.enqueue(LINK, {
+                "url": url,
+                "url_key": url_key,
+                "user_id": user.id,
+                "chat_id": status_msg.chat_id,
+                "message_id": status_msg.message_id,
+            })
         except Exception as e:
-            logger.error(f"Link handling error: {e}")
-            await status_msg.edit_text(strings.ERROR_GENERIC.format(error=e))
+            logger.error(f"Link enqueue error: {e}")
+            await status_msg.edit_text(strings.MSG_JOB_QUEUE_FAILED)
     else:
         # Search Intent Handling
         settings = get_settings()
@@ -446,36 +238,33 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     return
                 # If feature disabled, proceed to normal text search (fall through)
 
-            # 2. Build MongoDB Query
-            query_filter = {}
-            
-            # Text Search (Name or Category) - Requires Text Index
-            if intent.get("keywords"):
-                query_filter["$text"] = {"$search": intent["keywords"]}
-            
-            # Vibes (All vibes must match, case insensitive logic handled by $text usually or regex if needed)
-            # For simplicity using $all for vibes list if provided
-            if intent.get("vibes"):
-                 # Case-insensitive Regex for each vibe? MongoDB $text is better but let's try strict first
-                 # Or just relying on text search for vibes if indexed?
-                 # Let's use $in or $all if exact match, but vibes are unstructured.
-                 # BETTER STRATEGY: Use keywords for text search.
-                 pass
+            # 2. Build Query
+            # Keywords and vibes are ranked by the in-memory index (diacritic-folded, BM25),
+            # the full message by the vector index, which catches "quiet spot to work" -> Workspace
+            search_text = " ".join([intent.get("keywords") or ""] + (intent.get("vibes") or [])).strip()
 
             # Rating
             min_rating = intent.get("min_rating", 0)
-            if min_rating > 0:
-                query_filter["rating"] = {"$gte": min_rating}
 
             # 3. Execute Query
             # If no keywords, finding by rating/recency
-            if not intent.get("keywords") and not intent.get("vibes"):
+            rating_floor = min_rating if min_rating > 0 else None
+            keyword_hits = search_index.search(search_text, limit=10, min_rating=rating_floor) if search_text else []
+            # Only confident semantic hits (above MIN_SEARCH_SCORE), so vague messages still hit the fallback
+            semantic_hits = vector_index.search(text, limit=10, min_rating=rating_floor)
+            if not keyword_hits and not semantic_hits:
                 # Just random/latest if query was vague? Or fail?
                 # Let's search latest
+                query_filter = {}
+                if rating_floor:
+                    query_filter["rating"] = {"$gte": min_rating}
                 places = await Place.find(query_filter).sort("-created_at").limit(3).to_list()
             else:
-                # With text search
-                places = await Place.find(query_filter).limit(3).to_list()
+                ranked_ids = fuse_rankings(keyword_hits, semantic_hits, limit=3)
+                ids = [PydanticObjectId(doc_id) for doc_id in ranked_ids]
+                found = {str(p.id): p for p in await Place.find({"_id": {"$in": ids}}).to_list()}
+                # Keep relevance order
+                places = [found[doc_id] for doc_id in ranked_ids if doc_id in found]
             
             if not places:
                 await status_msg.edit_text(strings.SEARCH_NO_RESULT)
@@ -0,0 +1,338 @@
+import html
+import io
+import logging
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List
+
+from pymongo.errors import DuplicateKeyError
+from telegram.error import TelegramError
+
+import src.core.strings as strings
+from src.core.image_manager import image_manager
+from src.core.job_queue import job_queue
+from src.core.llm import ai_service
+from src.core.parser import link_parser
+from src.core.place_events import on_place_saved
+from src.core.raw_store import raw_store
+from src.core.text import search_terms
+from src.core.utils import resize_image
+from src.database.models import Place, CURRENT_SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Job kinds
+LINK = "link"
+PHOTO = "photo"
+
+# AI errors that come back the same on every attempt (config, rejected input)
+PERMANENT_AI_ERRORS = {"AI not available", "Gemini API Key not set.", strings.ERR_MSG_400, strings.ERR_MSG_404}
+
+
+class IngestError(Exception):
+    """
+    A failed step, with the message to show the user. Raised so the queue retries the job
+    with backoff; the message is shown by report_failure once attempts run out.
+    """
+
+
+class StatusMessage:
+    """The user's status message, edited by chat/message id (workers have no Update to reply to)."""
+
+    def __init__(self, bot, payload: Dict[str, Any]):
+        self.bot = bot
+        self.chat_id = payload["chat_id"]
+        self.message_id = payload["message_id"]
+
+    async def edit_text(self, text: str, parse_mode: str = None):
+        try:
+            await self.bot.edit_message_text(text, chat_id=self.chat_id, message_id=self.message_id, parse_mode=parse_mode)
+        except TelegramError as e:
+            # "Message is not modified", deleted message... never worth failing the job for
+            logger.warning(f"Status message edit failed: {e}")
+
+
+def link_dedup_filter(source_keys: List[str], urls: List[str]) -> Dict[str, Any]:
+    """
+    Places already saved from one of these links. Legacy places only have google_maps_url
+    until `manage_db --backfill-keys` has given them source_keys.
+    """
+    return {"$or": [{"source_keys": {"$in": source_keys}}, {"google_maps_url": {"$in": list(dict.fromkeys(urls))}}]}
+
+
+def format_existing_place(place: Place) -> str:
+    """Place card for a link that is already in LocBook."""
+    return format_place_card(place, strings.MSG_ALREADY_SAVED.format(id=place.id))
+
+
+def format_place_card(place: Place, comment: str) -> str:
+    hours_section = ""
+    if place.opening_hours:
+        hours_section = f"🕒 <b>Hours:</b> {place.opening_hours}\n"
+
+    return strings.PLACE_CARD_TEMPLATE.format(
+        name=place.name,
+        address=place.address,
+        categories=', '.join(place.categories) if place.categories else 'Secret Spot',
+        rating=place.rating or 'N/A',
+        price_level=place.price_level or 'N/A',
+        vibes=', '.join(place.vibes),
+        aesthetic_score=place.aesthetic_score or 'N/A',
+        hours_section=hours_section,
+        comment=comment
+    )
+
+
+async def _analysis_failed(status_msg: StatusMessage, analysis: Dict[str, Any]) -> bool:
+    """
+    True (after telling the user) for a Gemini failure retrying won't fix.
+    Transient ones raise IngestError so the job is retried.
+    """
+    if "error" not in analysis:
+        return False
+    message = strings.ERROR_AI_FAIL.format(error=analysis['error'])
+    if analysis["error"] in PERMANENT_AI_ERRORS:
+        await status_msg.edit_text(message)
+        return True
+    raise IngestError(message)
+
+
+async def _announce_retry(status_msg: StatusMessage, job: Dict[str, Any]):
+    if job.get("attempts", 1) > 1:
+        await status_msg.edit_text(strings.MSG_PROGRESS_RETRY.format(attempt=job["attempts"]))
+
+
+async def process_link_job(job: Dict[str, Any], bot):
+    """scrape -> Places API -> Gemini -> save for a submitted Google Maps link."""
+    payload = job["payload"]
+    url, url_key, user_id = payload["url"], payload["url_key"], payload["user_id"]
+    status_msg = StatusMessage(bot, payload)
+    await _announce_retry(status_msg, job)
+
+    # 1. Fetch Info via Parser (Simulate Search/Analysis)
+    raw_info = await link_parser.fetch_place_info(url)
+
+    if "error" in raw_info:
+        # Network/scrape trouble, usually gone on the next attempt
+        raise IngestError(strings.ERROR_FETCH_FAIL.format(error=raw_info['error']))
+
+    # 1b. Same place reached through another link form (short vs expanded, etc.), or a retried job
+    place_key = link_parser.place_key(raw_info, url)
+    source_keys = sorted({url_key, link_parser.canonical_url_key(raw_info.get("url") or url)})
+    existing_place = await Place.find_one(
+        {"$or": [{"place_key": place_key}, link_dedup_filter(source_keys, [url, raw_info.get("url") or url])]}
+    )
+    if existing_place:
+        # Remember this link form so the next submission is caught before fetching
+        await Place.get_pymongo_collection().update_one(
+            {"_id": existing_place.id},
+            {"$addToSet": {"source_keys": {"$each": source_keys}}}
+        )
+        await status_msg.edit_text(format_existing_place(existing_place), parse_mode="HTML")
+        return
+
+    await status_msg.edit_text(
+        strings.MSG_PROGRESS_ANALYZING.format(name=html.escape(raw_info.get("inferred_name") or "")), parse_mode="HTML"
+    )
+
+    # 2. Get AI Commentary & Structured Data (Combined)
+    # raw_info contains: text_data, images (bytes)
+    analysis = await ai_service.analyze_place_complex(
+        text_data=raw_info.get("text_data", ""),
+        images=raw_info.get("images", [])
+    )
+
+    if await _analysis_failed(status_msg, analysis):
+        return
+
+    details = analysis.get("details", {})
+    marin_comment = analysis.get("marin_comment", strings.MARIN_BUSY)
+
+    # 3. Create DB Object
+    categories = details.get('categories', [])
+    meal_types = details.get('meal_types', [])
+    occasions = details.get('occasions', [])
+
+    # Merge for search/display as requested ("put into category")
+    full_categories = list(set(categories + meal_types + occasions))
+
+    # Extract Location from Raw API if available
+    location_data = None
+    if raw_info.get("raw_api") and "location" in raw_info["raw_api"]:
+        loc_api = raw_info["raw_api"]["location"]
+        location_data = {
+            "type": "Point",
+            "coordinates": [loc_api['longitude'], loc_api['latitude']]
+        }
+
+    # Save Thumbnail (from Scraper or API)
+    local_image_path = None
+    if raw_info.get("images"):
+        try:
+            # raw_info['images'] contains (bytes, mime_type) tuples
+            img_bytes, _ = raw_info["images"][0]
+            rel_path, abs_path = await image_manager.save_screenshot(img_bytes, user_id)
+            local_image_path = rel_path
+            logger.info(f"Saved thumbnail to {abs_path}")
+        except Exception as e:
+            logger.error(f"Failed to save thumbnail: {e}")
+
+    place = Place(
+        name=details.get('name', raw_info.get('inferred_name', 'Unknown Spot')),
+        address=details.get('address'),
+        location=location_data,
+        categories=full_categories, # Merged list
+        meal_types=meal_types,      # Stored separately too
+        occasions=occasions,        # Stored separately too
+        vibes=details.get('vibes', []),
+        mood=details.get('mood', []), # List[str]
+        aesthetic_score=details.get('aesthetic_score'),
+        lighting=details.get('lighting'),
+        google_maps_url=url,
+        place_key=place_key,
+        source_keys=source_keys,
+        local_image_path=local_image_path, # Image Path
+        rating=details.get('rating'),
+        price_level=details.get('price_level'),
+        status=details.get('status'),
+        opening_hours=details.get('opening_hours'),
+        popular_times=details.get('popular_times'),
+        marin_comment=analysis.get("marin_comment"),
+        schema_version=CURRENT_SCHEMA_VERSION,
+        created_at=datetime.now()
+    )
+
+    # 4. Save
+    place.search_terms = search_terms(place)
+    try:
+        await place.save()
+    except DuplicateKeyError:
+        # Same place saved concurrently from another message
+        existing_place = await Place.find_one({"place_key": place_key})
+        if existing_place:
+            await status_msg.edit_text(format_existing_place(existing_place), parse_mode="HTML")
+            return
+        raise
+    # Future-proofing: full AI payload kept aside for re-parsing
+    await raw_store.save(place.id, analysis)
+    await on_place_saved(place, raw=analysis)
+
+    # 5. Reply
+    await status_msg.edit_text(format_place_card(place, marin_comment), parse_mode="HTML")
+
+
+async def process_photo_job(job: Dict[str, Any], bot):
+    """Gemini -> geocode -> save for an uploaded screenshot."""
+    payload = job["payload"]
+    file_id, user_id = payload["file_id"], payload["user_id"]
+    status_msg = StatusMessage(bot, payload)
+    await _announce_retry(status_msg, job)
+
+    # A retried job may have saved the place already
+    existing_place = await Place.find_one({"source_img_id": file_id})
+    if existing_place:
+        await status_msg.edit_text(format_existing_place(existing_place), parse_mode="HTML")
+        return
+
+    # Download to memory (Telegram file ids stay valid, so this works after a restart too)
+    file = await bot.get_file(file_id)
+    f = io.BytesIO()
+    await file.download_to_memory(f)
+    original_bytes = f.getvalue()
+
+    # Optimize Image
+    image_bytes = resize_image(original_bytes)
+
+    # Call AI
+    # Reuse analyze_place_complex with empty text
+    analysis = await ai_service.analyze_place_complex(
+        text_data="Analyze this screenshot to extract place information.",
+        images=[(image_bytes, "image/jpeg")]
+    )
+
+    if await _analysis_failed(status_msg, analysis):
+        return
+
+    details = analysis.get("details", {})
+    marin_comment = analysis.get("marin_comment", strings.MARIN_BUSY)
+
+    if not details.get("name"):
+        await status_msg.edit_text(strings.MSG_NAME_NOT_FOUND)
+        return
+
+    # Prepare for saving
+    categories = details.get('categories', [])
+    meal_types = details.get('meal_types', [])
+    occasions = details.get('occasions', [])
+    full_categories = list(set(categories + meal_types + occasions))
+
+    # Geocode if location is missing
+    await status_msg.edit_text(strings.MSG_PROGRESS_LOCATING.format(name=html.escape(details['name'])), parse_mode="HTML")
+    location_data = None
+    geo_res = await link_parser.geocode_place(details.get('name'), details.get('address'))
+    if geo_res:
+        loc_api = geo_res["location"]
+        location_data = {
+            "type": "Point",
+            "coordinates": [loc_api['longitude'], loc_api['latitude']]
+        }
+        # Update address with official one if available
+        if geo_res.get("address"):
+            details['address'] = geo_res.get("address")
+
+    # Save Image Locally (only now, so failed/retried attempts don't leave orphaned files)
+    try:
+        rel_path, abs_path = await image_manager.save_screenshot(original_bytes, user_id)
+        logger.info(f"Saved image to {abs_path}")
+    except Exception as e:
+        logger.error(f"Failed to save image: {e}")
+        rel_path = None
+
+    place = Place(
+        name=details.get('name', 'Unknown Spot'),
+        address=details.get('address'),
+        location=location_data,
+        categories=full_categories,
+        meal_types=meal_types,
+        occasions=occasions,
+        vibes=details.get('vibes', []),
+        mood=details.get('mood', []),
+        aesthetic_score=details.get('aesthetic_score'),
+        lighting=details.get('lighting'),
+        source_img_id=file_id, # Save file_id for reference
+        local_image_path=rel_path,   # Save local path
+        rating=details.get('rating'),
+        price_level=details.get('price_level'),
+        status=details.get('status'),
+        opening_hours=details.get('opening_hours'),
+        popular_times=details.get('popular_times'),
+        marin_comment=analysis.get("marin_comment"),
+        schema_version=CURRENT_SCHEMA_VERSION,
+        created_at=datetime.now()
+    )
+
+    place.search_terms = search_terms(place)
+    await place.save()
+    # Future-proofing: full AI payload kept aside for re-parsing
+    await raw_store.save(place.id, analysis)
+    await on_place_saved(place, raw=analysis)
+
+    # Reply
+    await status_msg.edit_text(format_place_card(place, marin_comment), parse_mode="HTML")
+
+
+async def report_failure(job: Dict[str, Any], bot):
+    """Out of retries: tell the user instead of leaving the progress message hanging."""
+    if job.get("error_type") == IngestError.__name__:
+        # Already worded for the user
+        text = job["last_error"]
+    else:
+        error = "Marin bị hoa mắt rồi..." if job["kind"] == PHOTO else job.get("last_error")
+        text = strings.ERROR_GENERIC.format(error=error)
+    await StatusMessage(bot, job["payload"]).edit_text(text)
+
+
+def setup_ingest(bot):
+    """Register the ingestion processors with the job queue (before `job_queue.start()`)."""
+    job_queue.register(LINK, partial(process_link_job, bot=bot), on_failure=partial(report_failure, bot=bot))
+    job_queue.register(PHOTO, partial(process_photo_job, bot=bot), on_failure=partial(report_failure, bot=bot))
@@ -23,6 +23,8 @@ class Settings(BaseSettings):
     FEAT_IMAGE_ANALYSIS: bool = False
     FEAT_PLACE_SEARCH: bool = True # Enable/Disable Local DB Search
     FEAT_GEO_SEARCH: bool = True # Enable/Disable Contextual Geo-Search
+    GEO_SEARCH_RADII: list[int] = [2000, 5000, 10000] # Meters, widened in order when results are sparse
+    GEO_SEARCH_LIMIT: int = 5
     MAX_REVIEWS_FOR_AI: int = 5 # Limit reviews to save tokens
     ENABLE_BOT: bool = True # Enable/Disable Telegram Bot Logic
     
@@ -30,6 +32,34 @@ class Settings(BaseSettings):
     MONGO_DB_NAME: str = "locbook"
     ADMIN_SECRET: str | None = None
 
+    # MongoDB client (one shared pool per process)
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: int = 300000 # Close pooled connections idle this long
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_COMPRESSORS: str = "" # e.g. "zstd,snappy,zlib" (zstd/snappy need their python packages)
+    MONGO_SECONDARY_READS: bool = False # secondaryPreferred for read-only endpoints (replica sets)
+    MONGO_SECONDARY_READ_GRACE_SECONDS: float = 10 # Read from the primary this long after a local write
+
+    # API response cache (ETag + in-process LRU)
+    RESPONSE_CACHE_SIZE: int = 256
+    CONFIG_REFRESH_SECONDS: int = 30 # How often to check for config written by other workers
+    RESPONSE_CACHE_REFRESH_SECONDS: float = 5 # How often to check for place writes by other workers/scripts
+
+    # Outbound HTTP (one pooled client per process)
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0 # Seconds an idle connection is kept open
+    LOOKUP_CACHE_BYPASS: bool = False # Ignore cached link/Places/photo lookups (still refreshes them)
+
+    # Ingestion job queue (links/photos are processed by background workers)
+    JOB_WORKERS: int = 4 # Jobs processed at once per process
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 180 # A running job not heartbeated for this long is picked up again
+    JOB_RETRY_BASE_SECONDS: float = 10 # Backoff: base * 2^(attempt-1)
+    JOB_POLL_SECONDS: float = 2 # Idle workers check for jobs enqueued by other processes
+
     MAX_MESSAGE_AGE_SECONDS: int = 60 # Ignore messages older than 2 minutes by default
     RATE_LIMIT_PER_MINUTE: int = 5 # Max 5 requests per minute per user
 
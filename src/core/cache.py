@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from pymongo import ReturnDocument
+
+from src.database.models import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    In-process LRU of serialized responses keyed by strong ETags.
+
+    An ETag is derived from the request key and the write version of every collection
+    the response depends on, so a write simply changes the ETag and old entries age out.
+    A version is a local counter (`bump`, seen at once) plus a shared counter in the
+    `cache_versions` collection that writers `$inc` (`publish`) and every worker polls
+    (`watch`), so writes from other workers and scripts invalidate it too. Other in-memory
+    state derived from a collection registers with `on_external_change` to be rebuilt then.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        # Changes on restart so ETags from a previous process never match
+        self._boot_id = uuid.uuid4().hex
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._shared: Dict[str, int] = defaultdict(int)
+        self._bumped_at: Dict[str, float] = {}
+        self._listeners: Dict[str, List[Callable[[], Awaitable[None]]]] = defaultdict(list)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, collection: str) -> str:
+        return f"{self._shared[collection]}.{self._versions[collection]}"
+
+    def bump(self, collection: str) -> str:
+        """Record a write to `collection` in this process, invalidating every response that depends on it."""
+        self._versions[collection] += 1
+        self._bumped_at[collection] = time.monotonic()
+        return self.version(collection)
+
+    def _seen(self, collection: str, shared: int) -> bool:
+        """Take a newer shared version. Returns True if it changed."""
+        if shared <= self._shared[collection]:
+            return False
+        self._shared[collection] = shared
+        self._bumped_at[collection] = time.monotonic()
+        return True
+
+    async def publish(self, collection: str):
+        """bump() plus the shared counter, for writes other workers must see (never raises, the write is done)."""
+        self.bump(collection)
+        try:
+            doc = await CacheVersion.get_pymongo_collection().find_one_and_update(
+                {"_id": collection}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            # Only our own increment: nothing to invalidate or reload when the watcher reads it.
+            # If another writer got in between, leave it to the watcher so listeners still run.
+            if doc["version"] == self._shared[collection] + 1:
+                self._seen(collection, doc["version"])
+        except Exception as e:
+            logger.warning(f"Cache version publish for {collection} failed: {e}")
+
+    async def refresh(self) -> List[str]:
+        """Read the shared versions (a few tiny documents). Returns the collections written elsewhere."""
+        changed = []
+        async for doc in CacheVersion.get_pymongo_collection().find({}):
+            if self._seen(doc["_id"], doc.get("version", 0)):
+                changed.append(doc["_id"])
+        return changed
+
+    def on_external_change(self, collection: str, callback: Callable[[], Awaitable[None]]):
+        """Run `callback` (from `watch`) whenever another worker or a script wrote to `collection`."""
+        self._listeners[collection].append(callback)
+
+    async def watch(self, interval: float):
+        """Background loop picking up writes made by other workers and scripts."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = await self.refresh()
+            except Exception as e:
+                logger.warning(f"Cache version refresh failed: {e}")
+                continue
+            for collection in changed:
+                for callback in self._listeners[collection]:
+                    try:
+                        await callback()
+                    except Exception as e:
+                        logger.warning(f"Reload after external {collection} write failed: {e}")
+
+    def seconds_since_bump(self, collection: str) -> float:
+        """Time since the last known write to `collection` (inf if none since start)."""
+        bumped_at = self._bumped_at.get(collection)
+        return float("inf") if bumped_at is None else time.monotonic() - bumped_at
+
+    def etag(self, key: str, collections: Iterable[str]) -> str:
+        versions = ",".join(f"{c}:{self.version(c)}" for c in sorted(collections))
+        digest = hashlib.sha1(f"{self._boot_id}|{versions}|{key}".encode("utf-8")).hexdigest()
+        return f'"{digest}"'
+
+    def get(self, etag: str) -> Optional[bytes]:
+        body = self._entries.get(etag)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(etag)
+        self.hits += 1
+        return body
+
+    def set(self, etag: str, body: bytes):
+        self._entries[etag] = body
+        self._entries.move_to_end(etag)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+# Collection names used as version keys
+PLACES = "places"
+APP_CONFIG = "app_config"
+
+# Singleton instance
+response_cache = ResponseCache()
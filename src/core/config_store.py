@@ -0,0 +1,128 @@
+import asyncio
+import copy
+import logging
+from typing import Any, Dict, NamedTuple
+
+from pymongo import ReturnDocument
+
+from src.database.models import AppConfig
+from src.core.cache import response_cache, APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Default Config
+DEFAULT_APP_CONFIG = {
+  "FEATURES": {
+    "ENABLE_BUY_ME_COFFEE": True,
+    "ENABLE_FOOTER": True,
+    "ENABLE_AUTHOR_CREDITS": True,
+    "ENABLE_DISCOVER": True,
+    "ENABLE_MAP": False,
+  },
+  "HOME_CATEGORIES": ["Casual", "Cafe & Coffee", "Special Occasion", "Bar"],
+  "LINKS": {
+    "BUY_ME_COFFEE": "https://buymeacoffee.com/nqhuy",
+    "GITHUB": "https://locbook.firstdraft.sh",
+    "AUTHOR_WEBSITE": "https://locbook.firstdraft.sh",
+    "LOC_REQUEST": "https://forms.gle/2w4efcfECzXwpnvo7",
+    "FEEDBACK": "https://forms.gle/2ntCQmgKNrEbN3DX9",
+    "DASHBOARD_URL": "http://localhost:5173",
+  },
+  "CATEGORY_KEYWORDS": {
+    "Nhậu": ["nhậu", "beer"],
+    "Special Occasion": [
+      "romantic", "fine dining", "fancy", "wine", "anniversary", "celebration", "special occasion"
+    ],
+    "Bar": ["bar", "cocktail", "lounge", "speakeasy", "wine"],
+    "Cafe & Coffee": ["cafe", "coffee", "tea"],
+    "Casual": ["casual", "street", "local", "snack", "quick"],
+  }
+}
+
+
+def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Recursively merge `override` over `base` into a new dict.
+    Nested dicts are merged key by key, anything else (lists included) is replaced.
+    Neither input is mutated.
+    """
+    merged = copy.deepcopy(base)
+    for key, val in override.items():
+        if isinstance(merged.get(key), dict) and isinstance(val, dict):
+            merged[key] = deep_merge(merged[key], val)
+        else:
+            merged[key] = copy.deepcopy(val)
+    return merged
+
+
+class ConfigSnapshot(NamedTuple):
+    version: int
+    data: Dict[str, Any]
+
+
+class ConfigStore:
+    """
+    Holds the merged (defaults + DB) app config in memory.
+
+    Built once at startup and swapped as a whole on writes, so readers never see a
+    half-applied config and never hit the DB. `version` is persisted on the AppConfig
+    document and incremented on every write, so other workers can detect a stale snapshot.
+    """
+
+    def __init__(self):
+        self._snapshot = ConfigSnapshot(version=0, data=copy.deepcopy(DEFAULT_APP_CONFIG))
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        return self._snapshot
+
+    def _swap(self, version: int, data: Dict[str, Any]):
+        # Single attribute assignment: readers get either the old or the new snapshot
+        self._snapshot = ConfigSnapshot(version=version, data=deep_merge(DEFAULT_APP_CONFIG, data))
+        response_cache.bump(APP_CONFIG)
+
+    async def load(self):
+        """(Re)build the snapshot from the DB."""
+        config = await AppConfig.find_one(AppConfig.key == "global")
+        if config:
+            self._swap(config.version, config.data)
+        else:
+            self._swap(0, {})
+        logger.info(f"App config loaded (version {self._snapshot.version}).")
+
+    async def update(self, payload: Dict[str, Any]) -> ConfigSnapshot:
+        """Persist a new config, bump its version atomically and swap the snapshot."""
+        collection = AppConfig.get_pymongo_collection()
+        doc = await collection.find_one_and_update(
+            {"key": "global"},
+            {"$set": {"data": payload}, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._swap(doc.get("version", 0), doc.get("data", {}))
+        return self._snapshot
+
+    async def refresh_if_stale(self) -> bool:
+        """
+        Read only the version field and reload if another worker wrote a newer config.
+        Returns True if the snapshot was replaced.
+        """
+        collection = AppConfig.get_pymongo_collection()
+        doc = await collection.find_one({"key": "global"}, {"version": 1})
+        if doc and doc.get("version", 0) != self._snapshot.version:
+            await self.load()
+            return True
+        return False
+
+    async def watch(self, interval: float):
+        """Background loop keeping this worker's snapshot in sync with the DB."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_if_stale()
+            except Exception as e:
+                logger.warning(f"Config refresh failed: {e}")
+
+
+# Singleton instance
+config_store = ConfigStore()
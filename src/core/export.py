@@ -0,0 +1,36 @@
+import zlib
+from typing import Any, AsyncIterator, AsyncIterable, Dict
+
+from src.core.serialization import dumps_bytes
+
+# Flush to the client roughly every 64KB so small rows don't become tiny writes
+CHUNK_SIZE = 64 * 1024
+
+
+async def iter_ndjson(docs: AsyncIterable[Dict[str, Any]], gzip: bool = False, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Encode documents from an async cursor as NDJSON, optionally gzip-compressed.
+    Only one chunk is held in memory at a time, whatever the collection size.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None # wbits=31 -> gzip container
+    buffer = bytearray()
+    first = True
+
+    async for doc in docs:
+        buffer += dumps_bytes(doc)
+        buffer += b"\n"
+        # The first row goes out right away so the client sees progress immediately
+        if first or len(buffer) >= chunk_size:
+            first = False
+            data = bytes(buffer)
+            buffer.clear()
+            if compressor:
+                data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+
+    data = bytes(buffer)
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
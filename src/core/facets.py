@@ -0,0 +1,126 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from src.core.pagination import KEYSET_SORT
+from src.core.text import search_terms_filter
+
+# Facet name (as returned to clients) -> Place field
+FACET_FIELDS = {
+    "categories": "categories",
+    "vibes": "vibes",
+    "mood": "mood",
+    "meal_types": "meal_types",
+    "occasions": "occasions",
+    "price_level": "price_level",
+}
+# Facet of the dashboards' homepage groups (HOME_CATEGORIES matched via CATEGORY_KEYWORDS)
+GROUP_FACET = "home_categories"
+
+
+def group_expr(keywords: List[str]) -> Dict[str, Any]:
+    """
+    Aggregation expression: the place belongs to a keyword group. Same test as the dashboards:
+    any keyword as a whole word, case-insensitively, in its categories and vibes joined by spaces.
+    """
+    if not keywords:
+        return {"$literal": False}
+    joined = {"$reduce": {
+        "input": {"$concatArrays": [{"$ifNull": ["$categories", []]}, {"$ifNull": ["$vibes", []]}]},
+        "initialValue": "",
+        "in": {"$concat": ["$$value", " ", "$$this"]},
+    }}
+    pattern = r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b"
+    return {"$regexMatch": {"input": joined, "regex": pattern, "options": "i"}}
+
+
+def build_facet_pipeline(
+    filters: Dict[str, List[str]],
+    search: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    limit: int = 20,
+    offset: int = 0,
+    facet_limit: int = 50,
+    projection: Optional[Dict[str, Any]] = None,
+    category_groups: Optional[Dict[str, List[str]]] = None,
+    groups: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build a single aggregation returning one page of places plus per-facet counts.
+
+    `filters` maps a facet name to the selected values. Values within a facet are OR-ed,
+    facets are AND-ed together (same semantics as the dashboard).
+    Each facet's counts ignore its own selection so unselected options don't disappear.
+
+    `category_groups` (group name -> CATEGORY_KEYWORDS) adds the home_categories facet the
+    dashboards used to compute client-side; `groups` selects places in any of those groups.
+    """
+    # Search narrows the base set, outside $facet, so it can use the search_terms index
+    base_match: Dict[str, Any] = search_terms_filter(search)
+    if min_rating is not None:
+        base_match["rating"] = {"$gte": min_rating}
+
+    selected = {
+        FACET_FIELDS[name]: {"$in": values}
+        for name, values in filters.items()
+        if name in FACET_FIELDS and values
+    }
+    category_groups = category_groups or {}
+    if groups:
+        selected["$expr"] = {"$or": [group_expr(category_groups.get(g, [])) for g in groups]}
+
+    data_stage: List[Dict[str, Any]] = [
+        {"$match": selected},
+        {"$sort": dict(KEYSET_SORT)},
+        {"$skip": offset},
+        {"$limit": limit},
+    ]
+    if projection:
+        data_stage.append({"$project": projection})
+
+    facet: Dict[str, List[Dict[str, Any]]] = {
+        "data": data_stage,
+        "total": [{"$match": selected}, {"$count": "count"}],
+    }
+    for name, field in FACET_FIELDS.items():
+        others = {k: v for k, v in selected.items() if k != field}
+        facet[name] = [
+            {"$match": others},
+            # $unwind treats scalars (price_level) as a one-element array and drops nulls
+            {"$unwind": f"${field}"},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": facet_limit},
+        ]
+
+    if category_groups:
+        others = {k: v for k, v in selected.items() if k != "$expr"}
+        facet[GROUP_FACET] = [
+            {"$match": others},
+            {"$project": {"_id": 0, "group": {"$filter": {
+                "input": [{"$cond": [group_expr(keywords), {"$literal": name}, None]} for name, keywords in category_groups.items()],
+                "cond": {"$ne": ["$$this", None]},
+            }}}},
+            {"$unwind": "$group"},
+            {"$group": {"_id": "$group", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+
+    pipeline: List[Dict[str, Any]] = []
+    if base_match:
+        pipeline.append({"$match": base_match})
+    pipeline.append({"$facet": facet})
+    return pipeline
+
+
+def parse_facet_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the single $facet output document into {data, total, facets}."""
+    total = result.get("total") or []
+    names = [*FACET_FIELDS, GROUP_FACET] if GROUP_FACET in result else list(FACET_FIELDS)
+    return {
+        "data": result.get("data", []),
+        "total": total[0]["count"] if total else 0,
+        "facets": {
+            name: [{"name": f["_id"], "count": f["count"]} for f in result.get(name, [])]
+            for name in names
+        },
+    }
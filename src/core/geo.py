@@ -0,0 +1,260 @@
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.text import fold_pattern, tokenize
+from src.database.models import Place
+
+# Below this zoom level the map gets grid clusters instead of individual points
+CLUSTER_MAX_ZOOM = 13
+# Grid cells per 256px map tile edge (~64px cells)
+CELLS_PER_TILE = 4
+# Longitude step of the extra vertices along a viewport's top/bottom edges, see bbox_filter
+BBOX_EDGE_STEP = 1.0
+# Poles are single points: a ring edge along +-90 would repeat a vertex
+BBOX_MAX_LAT = 89.9
+STRICT_WINDING_CRS = {"type": "name", "properties": {"name": "urn:x-mongodb:crs:strictwinding:EPSG:4326"}}
+
+POINT_COLUMNS = ["_id", "name", "lon", "lat", "category"]
+CLUSTER_COLUMNS = ["lon", "lat", "count", "_id", "name"]
+
+
+def validate_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float):
+    """Raises ValueError for a bbox Mongo can't use."""
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError("Longitude must be within [-180, 180]")
+    if not (-90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise ValueError("Latitude must be within [-90, 90]")
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise ValueError("Bounding box must be min_lon,min_lat,max_lon,max_lat with min < max")
+
+
+def _bbox_ring(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> List[List[float]]:
+    """Counter-clockwise ring with a vertex every BBOX_EDGE_STEP degrees along the top and bottom edges."""
+    steps = max(1, math.ceil((max_lon - min_lon) / BBOX_EDGE_STEP))
+    lons = [min_lon + (max_lon - min_lon) * i / steps for i in range(steps)] + [max_lon]
+    bottom = [[lon, min_lat] for lon in lons]
+    top = [[lon, max_lat] for lon in reversed(lons)]
+    return bottom + top + [bottom[0]]
+
+
+def bbox_filter(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> Dict[str, Any]:
+    """
+    $geoWithin filter for a map viewport, always a GeoJSON polygon so the 2dsphere index is used.
+
+    Polygon edges are geodesics, which bow away from the flat (Mercator) viewport's parallels,
+    so the top/bottom edges get a vertex every degree (sag < ~100 m). Meridian edges are already
+    geodesics. Boxes wider than 180 degrees are split in two, since a -180..180 ring would close
+    on itself along the antimeridian; the strict-winding CRS keeps big pieces meaning "inside the ring".
+    """
+    min_lat, max_lat = max(min_lat, -BBOX_MAX_LAT), min(max_lat, BBOX_MAX_LAT)
+    if max_lon - min_lon > 180:
+        mid = (min_lon + max_lon) / 2
+        pieces = [(min_lon, mid), (mid, max_lon)]
+    else:
+        pieces = [(min_lon, max_lon)]
+    filters = [
+        {"location": {"$geoWithin": {"$geometry": {
+            "type": "Polygon",
+            "coordinates": [_bbox_ring(west, min_lat, east, max_lat)],
+            "crs": STRICT_WINDING_CRS,
+        }}}}
+        for west, east in pieces
+    ]
+    return filters[0] if len(filters) == 1 else {"$or": filters}
+
+
+def cluster_cell_size(zoom: int) -> float:
+    """Grid cell edge in degrees for a web-mercator zoom level."""
+    return 360.0 / (2 ** max(zoom, 0)) / CELLS_PER_TILE
+
+
+def build_cluster_pipeline(match: Dict[str, Any], zoom: int, max_clusters: int) -> List[Dict[str, Any]]:
+    """Snap points in the viewport to a zoom-dependent grid and count them per cell."""
+    cell = cluster_cell_size(zoom)
+    return [
+        {"$match": match},
+        {"$project": {
+            "name": 1,
+            "lon": {"$arrayElemAt": ["$location.coordinates", 0]},
+            "lat": {"$arrayElemAt": ["$location.coordinates", 1]},
+        }},
+        {"$group": {
+            "_id": {
+                "x": {"$floor": {"$divide": ["$lon", cell]}},
+                "y": {"$floor": {"$divide": ["$lat", cell]}},
+            },
+            "count": {"$sum": 1},
+            "lon": {"$avg": "$lon"},
+            "lat": {"$avg": "$lat"},
+            # Kept so single-place cells can still be opened directly
+            "place_id": {"$first": "$_id"},
+            "name": {"$first": "$name"},
+        }},
+        {"$sort": {"count": -1}},
+        {"$limit": max_clusters},
+    ]
+
+
+def cluster_row(doc: Dict[str, Any]) -> List[Any]:
+    single = doc["count"] == 1
+    return [
+        round(doc["lon"], 6),
+        round(doc["lat"], 6),
+        doc["count"],
+        str(doc["place_id"]) if single else None,
+        doc.get("name") if single else None,
+    ]
+
+
+def point_row(doc: Dict[str, Any]) -> Optional[List[Any]]:
+    """Compact [id, name, lon, lat, top category] row, None for malformed locations."""
+    coords = (doc.get("location") or {}).get("coordinates") or []
+    if len(coords) < 2 or not all(isinstance(c, (int, float)) and not math.isnan(c) for c in coords[:2]):
+        return None
+    categories = doc.get("categories") or []
+    return [str(doc["_id"]), doc.get("name"), coords[0], coords[1], categories[0] if categories else None]
+
+
+# Relevance weight of a keyword hit per field
+KEYWORD_FIELD_WEIGHTS = {"name": 3.0, "categories": 2.0, "vibes": 1.5, "mood": 1.0}
+# How text relevance, proximity and rating add up in the hybrid score
+HYBRID_WEIGHTS = {"text": 0.5, "distance": 0.35, "rating": 0.15}
+# Nearest keyword-matching places considered by the hybrid ranking
+HYBRID_CANDIDATES = 200
+
+
+def keyword_terms(keywords: Optional[str]) -> List[str]:
+    seen = []
+    for w in (keywords or "").lower().split():
+        if w not in seen:
+            seen.append(w)
+    return seen
+
+
+def _term_hit(field: str, term: str) -> Dict[str, Any]:
+    """
+    1 if the (string or list) field contains the term case- and accent-insensitively, else 0.
+    Folded like search_terms, so whatever passes keyword_prefilter can score.
+    """
+    pattern = fold_pattern(term)
+    if field == "name":
+        matched = {"$regexMatch": {"input": {"$ifNull": ["$name", ""]}, "regex": pattern, "options": "i"}}
+    else:
+        matched = {"$gt": [{"$size": {"$filter": {
+            "input": {"$ifNull": [f"${field}", []]},
+            "cond": {"$regexMatch": {"input": "$$this", "regex": pattern, "options": "i"}},
+        }}}, 0]}
+    return {"$cond": [matched, 1, 0]}
+
+
+def keyword_prefilter(terms: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Cheap superset of the hybrid keyword match, for $geoNear.query: a place whose
+    name/categories/vibes/mood contains a term has a folded `search_terms` token containing
+    one of the term's tokens. None when some term has no letters or digits to look for.
+    """
+    parts = []
+    for term in terms:
+        tokens = tokenize(term)
+        if not tokens:
+            return None
+        parts.extend(re.escape(t) for t in tokens)
+    if not parts:
+        return None
+    return {"search_terms": {"$regex": "|".join(dict.fromkeys(parts))}}
+
+
+def build_hybrid_pipeline(lon: float, lat: float, keywords: str, max_distance: float, limit: int, candidates: int = HYBRID_CANDIDATES) -> List[Dict[str, Any]]:
+    """
+    Geo prefilter + keyword ranking in one aggregation.
+
+    $geoNear keeps the nearest `candidates` places within max_distance that pass the
+    search_terms prefilter (so the cap counts likely matches, not just the nearest places),
+    then each one gets a text score (keyword hits on name/categories/vibes/mood, normalized
+    to 0..1), a proximity score and a rating score. Places with no keyword hit are dropped,
+    the rest are sorted by the weighted sum. Without a usable prefilter there is no cap,
+    maxDistance alone bounds the scan.
+    """
+    terms = keyword_terms(keywords)
+    per_term_max = sum(KEYWORD_FIELD_WEIGHTS.values())
+    text_score = {"$divide": [
+        {"$add": [
+            {"$multiply": [weight, _term_hit(field, term)]}
+            for term in terms
+            for field, weight in KEYWORD_FIELD_WEIGHTS.items()
+        ]},
+        per_term_max * max(len(terms), 1),
+    ]}
+
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [lon, lat]},
+        "key": "location",
+        "distanceField": "distance",
+        "maxDistance": max_distance,
+        "spherical": True,
+    }
+    prefilter = keyword_prefilter(terms)
+    if prefilter:
+        geo_near["query"] = prefilter
+    return [
+        {"$geoNear": geo_near},
+        *([{"$limit": candidates}] if prefilter else []),
+        {"$project": {"raw_ai_response": 0}},
+        {"$addFields": {"text_score": text_score}},
+        {"$match": {"text_score": {"$gt": 0}}},
+        {"$addFields": {"score": {"$add": [
+            {"$multiply": [HYBRID_WEIGHTS["text"], "$text_score"]},
+            {"$multiply": [HYBRID_WEIGHTS["distance"], {"$subtract": [1, {"$divide": ["$distance", max_distance]}]}]},
+            {"$multiply": [HYBRID_WEIGHTS["rating"], {"$divide": [{"$ifNull": ["$rating", 0]}, 5]}]},
+        ]}}},
+        {"$sort": {"score": -1, "distance": 1}},
+        {"$limit": limit},
+    ]
+
+
+def build_geo_near_pipeline(lon: float, lat: float, max_distance: float, limit: int) -> List[Dict[str, Any]]:
+    """Nearest-first places within max_distance meters, with the computed `distance` field."""
+    return [
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [lon, lat]},
+            "key": "location",
+            "distanceField": "distance",
+            "maxDistance": max_distance,
+            "spherical": True,
+        }},
+        {"$limit": limit},
+        {"$project": {"raw_ai_response": 0}},
+    ]
+
+
+def covering_radius(distances: List[float], radii: List[int]) -> int:
+    """Smallest configured radius step that contains every result."""
+    farthest = max(distances, default=0)
+    for r in radii:
+        if farthest <= r:
+            return r
+    return radii[-1]
+
+
+def format_distance(meters: float) -> str:
+    if meters < 1000:
+        return f"{int(round(meters, -1))}m"
+    return f"{meters / 1000:.1f}km"
+
+
+async def find_nearby(lon: float, lat: float, radii: List[int], limit: int, keywords: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Progressive "around me" search in one round trip.
+
+    $geoNear returns results nearest-first, so a single query bounded by the widest radius
+    is the same as trying 2km, then 5km, then 10km until `limit` results are found.
+    With keywords, the hybrid pipeline ranks the nearby candidates instead.
+    Returns the places (raw documents with `distance` in meters) and the radius step used.
+    """
+    if keyword_terms(keywords):
+        pipeline = build_hybrid_pipeline(lon, lat, keywords, radii[-1], limit)
+    else:
+        pipeline = build_geo_near_pipeline(lon, lat, radii[-1], limit)
+    places = await Place.get_pymongo_collection().aggregate(pipeline).to_list(length=limit)
+    return places, covering_radius([p["distance"] for p in places], radii)
@@ -0,0 +1,89 @@
+import codecs
+from html.parser import HTMLParser
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+# Stop reading a page after this much, even if </head> never showed up
+HEAD_MAX_BYTES = 128 * 1024
+# Keys the scraper needs; reading stops as soon as all of them are seen
+WANTED_META = ("title", "og:title", "og:image")
+
+
+class HeadMetaParser(HTMLParser):
+    """
+    Incremental tokenizer for <title> and <meta property|name=... content=...> in a page's <head>.
+    Feed it text as it arrives and check `done`: set at </head> or <body>, or once every
+    key in `wanted` has been seen. First occurrence of each key wins.
+    """
+
+    def __init__(self, wanted: Iterable[str] = WANTED_META):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, str] = {}
+        self.wanted = set(wanted)
+        self.done = False
+        self._title: Optional[list] = None
+
+    def _found(self, key: str, value: str):
+        self.meta.setdefault(key, value)
+        if self.wanted and self.wanted.issubset(self.meta):
+            self.done = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            key = attrs.get("property") or attrs.get("name")
+            if key and attrs.get("content") is not None:
+                self._found(key.lower(), attrs["content"])
+        elif tag == "title" and "title" not in self.meta:
+            self._title = []
+        elif tag == "body":
+            self.done = True
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_data(self, data):
+        if self._title is not None:
+            self._title.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title is not None:
+            self._found("title", "".join(self._title).strip())
+            self._title = None
+        elif tag == "head":
+            self.done = True
+
+
+def parse_head(html: str, wanted: Iterable[str] = WANTED_META) -> Dict[str, str]:
+    """Head metadata of an already downloaded page."""
+    parser = HeadMetaParser(wanted)
+    # Feed in slices so a huge page still stops early
+    for i in range(0, len(html), 16 * 1024):
+        parser.feed(html[i:i + 16 * 1024])
+        if parser.done:
+            break
+    return parser.meta
+
+
+async def read_head(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8",
+    max_bytes: int = HEAD_MAX_BYTES,
+    wanted: Iterable[str] = WANTED_META,
+) -> Dict[str, str]:
+    """
+    Head metadata of a streamed body (e.g. `response.aiter_bytes()`), consuming only as many
+    chunks as needed. The caller closes the response, which drops the unread rest.
+    """
+    parser = HeadMetaParser(wanted)
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    read = 0
+    async for chunk in chunks:
+        read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or read >= max_bytes:
+            break
+    return parser.meta
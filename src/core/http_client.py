@@ -0,0 +1,92 @@
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2 # noqa: F401 (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Host (or parent domain) -> timeout. Google APIs answer fast, Maps pages and images are heavier.
+HOST_TIMEOUTS: Dict[str, httpx.Timeout] = {
+    "places.googleapis.com": httpx.Timeout(8.0, connect=3.0),
+    "googleusercontent.com": httpx.Timeout(5.0, connect=3.0),
+    "maps.app.goo.gl": httpx.Timeout(10.0, connect=3.0),
+    "google.com": httpx.Timeout(10.0, connect=3.0),
+}
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+
+def timeout_for(url: str) -> httpx.Timeout:
+    """Most specific HOST_TIMEOUTS entry for the URL's host (suffix match)."""
+    host = (urlsplit(url).hostname or "").lower()
+    while host:
+        if host in HOST_TIMEOUTS:
+            return HOST_TIMEOUTS[host]
+        _, _, host = host.partition(".")
+    return DEFAULT_TIMEOUT
+
+
+class HttpClientManager:
+    """
+    One pooled httpx.AsyncClient per process, so repeated calls to the same Google hosts
+    reuse kept-alive (HTTP/2 when available) connections instead of a TCP+TLS handshake each.
+
+    The API starts/closes it in its lifespan; scripts get it lazily on first use.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build(self) -> httpx.AsyncClient:
+        settings = get_settings()
+        http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+        if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the 'h2' package is missing, using HTTP/1.1.")
+        return httpx.AsyncClient(
+            http2=http2,
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+        return self._client
+
+    async def start(self):
+        self.client # Build eagerly so the first link doesn't pay for it
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        kwargs.setdefault("timeout", timeout_for(url))
+        return await self.client.get(url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        kwargs.setdefault("timeout", timeout_for(url))
+        return await self.client.post(url, **kwargs)
+
+    def stream(self, method: str, url: str, **kwargs):
+        """`async with http_client.stream(...) as resp:` to read the body incrementally."""
+        kwargs.setdefault("timeout", timeout_for(url))
+        return self.client.stream(method, url, **kwargs)
+
+
+# Singleton instance
+http_client = HttpClientManager()
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from src.config import get_settings
+from src.database.models import IngestJob
+
+logger = logging.getLogger(__name__)
+
+# kind -> async processor(job document)
+Processor = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def claim_filter(now: datetime) -> Dict[str, Any]:
+    """
+    Jobs a worker may take: queued and due, or running with an expired visibility timeout
+    and attempts left (a job that keeps killing its worker must not be retried forever).
+    """
+    return {"$or": [
+        {"status": "queued", "run_at": {"$lte": now}},
+        {"status": "running", "locked_until": {"$lt": now}, "$expr": {"$lt": ["$attempts", "$max_attempts"]}},
+    ]}
+
+
+def exhausted_filter(now: datetime) -> Dict[str, Any]:
+    """Expired leases with no attempts left: their worker died on the last try."""
+    return {"status": "running", "locked_until": {"$lt": now}, "$expr": {"$gte": ["$attempts", "$max_attempts"]}}
+
+
+def retry_update(job: Dict[str, Any], error: str, now: datetime, base_seconds: float) -> Dict[str, Any]:
+    """$set for a failed attempt: back to queued with exponential backoff, or failed for good."""
+    if job.get("attempts", 0) >= job.get("max_attempts", 1):
+        return {"status": "failed", "last_error": error, "locked_until": None, "finished_at": now}
+    delay = base_seconds * 2 ** (max(job.get("attempts", 1), 1) - 1)
+    return {"status": "queued", "last_error": error, "locked_until": None, "run_at": now + timedelta(seconds=delay)}
+
+
+class JobQueue:
+    """
+    Durable work queue on the `ingest_jobs` collection, processed by a pool of worker tasks.
+
+    Enqueue is a single insert. Workers claim jobs atomically (find_one_and_update) and hold
+    a lease (`locked_until`) that they extend while working; a job whose worker died or was
+    restarted becomes claimable again once the lease runs out. Failed attempts are retried
+    with exponential backoff up to `max_attempts`, then `on_failure` is called.
+
+    A worker that finds its lease taken over cancels the job. Processors must still tolerate
+    running twice (the lease can lapse before the heartbeat notices).
+    """
+
+    def __init__(self):
+        self._processors: Dict[str, Processor] = {}
+        self._on_failure: Dict[str, Processor] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stats = {"enqueued": 0, "done": 0, "retried": 0, "failed": 0, "lost_leases": 0}
+
+    def register(self, kind: str, processor: Processor, on_failure: Optional[Processor] = None):
+        self._processors[kind] = processor
+        if on_failure:
+            self._on_failure[kind] = on_failure
+
+    # --- Producer ---
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Any:
+        """Persist a job and wake a local worker. Returns the job _id."""
+        now = datetime.now()
+        doc = {
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or get_settings().JOB_MAX_ATTEMPTS,
+            "run_at": now,
+            "locked_until": None,
+            "worker_id": None,
+            "last_error": None,
+            "created_at": now,
+            "finished_at": None,
+        }
+        result = await IngestJob.get_pymongo_collection().insert_one(doc)
+        self.stats["enqueued"] += 1
+        self._wakeup.set()
+        return result.inserted_id
+
+    # --- Storage steps (small so tests can swap them) ---
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.now()
+        visibility = get_settings().JOB_VISIBILITY_TIMEOUT_SECONDS
+        return await IngestJob.get_pymongo_collection().find_one_and_update(
+            {**claim_filter(now), "kind": {"$in": list(self._processors)}},
+            {
+                "$set": {"status": "running", "worker_id": self.worker_id, "locked_until": now + timedelta(seconds=visibility)},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _fail_exhausted(self) -> Optional[Dict[str, Any]]:
+        """Mark one exhausted job failed; returns it so its failure can be reported."""
+        now = datetime.now()
+        return await IngestJob.get_pymongo_collection().find_one_and_update(
+            {**exhausted_filter(now), "kind": {"$in": list(self._processors)}},
+            {"$set": {
+                "status": "failed", "locked_until": None, "finished_at": now,
+                "last_error": "Worker stopped responding on the last attempt",
+            }},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _update_owned(self, job: Dict[str, Any], fields: Dict[str, Any]) -> bool:
+        """$set on a job only while this worker still holds its lease."""
+        result = await IngestJob.get_pymongo_collection().update_one(
+            {"_id": job["_id"], "status": "running", "worker_id": self.worker_id, "attempts": job["attempts"]},
+            {"$set": fields},
+        )
+        return result.modified_count == 1
+
+    async def _extend_lease(self, job: Dict[str, Any], work: asyncio.Task) -> bool:
+        """Heartbeat until cancelled. Returns True (after cancelling `work`) if the lease was lost."""
+        visibility = get_settings().JOB_VISIBILITY_TIMEOUT_SECONDS
+        while True:
+            await asyncio.sleep(visibility / 3)
+            try:
+                owned = await self._update_owned(job, {"locked_until": datetime.now() + timedelta(seconds=visibility)})
+            except Exception as e:
+                # Keep trying: the lease only lapses after a full visibility timeout of failures
+                logger.warning(f"Lease heartbeat for job {job['_id']} failed: {e}")
+                continue
+            if not owned:
+                # Someone else holds it now, running it twice would double the Gemini call and the save
+                logger.warning(f"Lost the lease on job {job['_id']}, stopping it.")
+                self.stats["lost_leases"] += 1
+                work.cancel()
+                return True
+
+    # --- Workers ---
+
+    async def _run_job(self, job: Dict[str, Any]):
+        kind = job["kind"]
+        start = time.perf_counter()
+        work = asyncio.create_task(self._processors[kind](job))
+        heartbeat = asyncio.create_task(self._extend_lease(job, work))
+        try:
+            await work
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled() and heartbeat.result():
+                return # Lease lost, the job belongs to another worker now
+            # Shutdown: hand the job back right away instead of waiting for the lease to expire
+            work.cancel()
+            released = {"status": "queued", "locked_until": None, "run_at": datetime.now(), "attempts": job["attempts"] - 1}
+            await asyncio.shield(self._update_owned(job, released))
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job['_id']} ({kind}) attempt {job['attempts']} failed: {e}")
+            update = retry_update(job, str(e), datetime.now(), get_settings().JOB_RETRY_BASE_SECONDS)
+            update["error_type"] = type(e).__name__ # Lets on_failure tell prepared messages from crashes
+            if not await self._update_owned(job, update):
+                self.stats["lost_leases"] += 1
+            elif update["status"] == "failed":
+                await self._report_failure({**job, **update})
+            else:
+                self.stats["retried"] += 1
+        else:
+            if await self._update_owned(job, {"status": "done", "locked_until": None, "finished_at": datetime.now()}):
+                self.stats["done"] += 1
+            else:
+                self.stats["lost_leases"] += 1
+            logger.info(f"Job {job['_id']} ({kind}) done in {time.perf_counter() - start:.1f}s.")
+        finally:
+            heartbeat.cancel()
+
+    async def _report_failure(self, job: Dict[str, Any]):
+        self.stats["failed"] += 1
+        logger.error(f"Job {job['_id']} ({job['kind']}) failed for good: {job.get('last_error')}")
+        if job["kind"] in self._on_failure:
+            try:
+                await self._on_failure[job["kind"]](job)
+            except Exception as e:
+                logger.error(f"on_failure for job {job['_id']} failed: {e}")
+
+    async def _worker(self):
+        poll = get_settings().JOB_POLL_SECONDS
+        while True:
+            # Cleared before claiming, so an enqueue during the claim still wakes us
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.warning(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                try:
+                    # Idle: settle jobs whose worker died on their last attempt
+                    exhausted = await self._fail_exhausted()
+                    if exhausted:
+                        await self._report_failure(exhausted)
+                        continue
+                except Exception as e:
+                    logger.warning(f"Exhausted job sweep failed: {e}")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=poll)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    def start(self, workers: Optional[int] = None):
+        """Start the worker pool (bounded concurrency: one job per worker task)."""
+        if self._workers:
+            return
+        count = workers or get_settings().JOB_WORKERS
+        self._wakeup = asyncio.Event() # Bind to the running loop
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(count)]
+        logger.info(f"Job queue started: {count} workers ({self.worker_id}).")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def counts(self) -> Dict[str, int]:
+        """Jobs per status (finished ones are kept a week)."""
+        pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        rows = await IngestJob.get_pymongo_collection().aggregate(pipeline).to_list(length=None)
+        return {row["_id"]: row["count"] for row in rows}
+
+
+# Singleton instance
+job_queue = JobQueue()
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from src.config import get_settings
+from src.database.models import LookupCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Namespaces: name -> (TTL seconds, in-process LRU entries)
+SHORT_URL = "short_url"
+PLACES_QUERY = "places_query"
+PHOTO = "photo"
+NAMESPACES: Dict[str, Tuple[int, int]] = {
+    SHORT_URL: (30 * 86400, 2048), # Short links never change target
+    PLACES_QUERY: (7 * 86400, 512), # Ratings/hours drift, refresh weekly
+    PHOTO: (30 * 86400, 32), # Image bytes, keep few in memory
+}
+
+def hashed_key(*parts: str) -> str:
+    """Compact key for long inputs (queries, field masks)."""
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class LookupCache:
+    """
+    Two-tier TTL cache for slow external lookups: an in-process LRU in front of the
+    `lookup_cache` collection (TTL index on expires_at, shared across processes and restarts).
+
+    Only successful lookups are stored. `bypass=True` (or LOOKUP_CACHE_BYPASS) skips reads for a
+    forced refresh but still stores the fresh value. Mongo errors degrade to memory-only caching.
+    """
+
+    def __init__(self):
+        self._memory: Dict[str, "OrderedDict[str, Tuple[float, Any]]"] = {ns: OrderedDict() for ns in NAMESPACES}
+        self.stats: Dict[str, Dict[str, int]] = {
+            ns: {"memory_hits": 0, "store_hits": 0, "misses": 0, "bypassed": 0} for ns in NAMESPACES
+        }
+
+    def _remember(self, namespace: str, key: str, value: Any, expires: float):
+        entries = self._memory[namespace]
+        entries[key] = (expires, value)
+        entries.move_to_end(key)
+        while len(entries) > NAMESPACES[namespace][1]:
+            entries.popitem(last=False)
+
+    async def get(self, namespace: str, key: str, bypass: bool = False) -> Any:
+        """Cached value or None."""
+        stats = self.stats[namespace]
+        if bypass or get_settings().LOOKUP_CACHE_BYPASS:
+            stats["bypassed"] += 1
+            return None
+
+        entry = self._memory[namespace].get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > time.time():
+                self._memory[namespace].move_to_end(key)
+                stats["memory_hits"] += 1
+                return value
+            del self._memory[namespace][key]
+
+        try:
+            # The TTL monitor only runs every ~60s, so check expiry here too
+            doc = await LookupCacheEntry.get_pymongo_collection().find_one(
+                {"_id": f"{namespace}:{key}", "expires_at": {"$gt": datetime.now()}}
+            )
+        except Exception as e:
+            logger.warning(f"Lookup cache read failed: {e}")
+            doc = None
+        if doc is None:
+            stats["misses"] += 1
+            return None
+
+        stats["store_hits"] += 1
+        self._remember(namespace, key, doc["value"], doc["expires_at"].timestamp())
+        return doc["value"]
+
+    async def set(self, namespace: str, key: str, value: Any):
+        ttl = NAMESPACES[namespace][0]
+        expires_at = datetime.now() + timedelta(seconds=ttl)
+        self._remember(namespace, key, value, expires_at.timestamp())
+        try:
+            await LookupCacheEntry.get_pymongo_collection().replace_one(
+                {"_id": f"{namespace}:{key}"},
+                {"namespace": namespace, "value": value, "expires_at": expires_at},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Lookup cache write failed: {e}")
+
+    async def get_or_fetch(self, namespace: str, key: str, fetch: Callable[[], Awaitable[Any]], bypass: bool = False) -> Any:
+        """Cached value, else `await fetch()` (stored unless None)."""
+        value = await self.get(namespace, key, bypass=bypass)
+        if value is not None:
+            return value
+        value = await fetch()
+        if value is not None:
+            await self.set(namespace, key, value)
+        return value
+
+    def snapshot(self) -> Dict[str, Any]:
+        out = {}
+        for ns, stats in self.stats.items():
+            lookups = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+            hits = stats["memory_hits"] + stats["store_hits"]
+            out[ns] = {**stats, "hit_rate": round(hits / lookups, 3) if lookups else None, "memory_entries": len(self._memory[ns])}
+        return out
+
+    def clear_memory(self):
+        for entries in self._memory.values():
+            entries.clear()
+
+
+# Singleton instance
+lookup_cache = LookupCache()
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from src.core.raw_store import replace_op
+from src.core.reparse import REPARSE_PROJECTION, reparse_fields
+from src.core.text import search_terms
+from src.database.models import CURRENT_SCHEMA_VERSION, MigrationCheckpoint, Place, PlaceRaw
+
+logger = logging.getLogger(__name__)
+
+
+class Migration:
+    """
+    One schema step: `apply(doc)` returns the fields to $set to go from `version` to `version + 1`,
+    `unset` lists fields to drop. `prepare(docs)` runs before each batch is written, for steps
+    that also write elsewhere; it must be idempotent too.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        description: str,
+        apply: Callable[[Dict[str, Any]], Dict[str, Any]],
+        projection: Dict[str, int],
+        unset: Optional[List[str]] = None,
+        prepare: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        self.projection = projection
+        self.unset = unset or []
+        self.prepare = prepare
+
+    @property
+    def key(self) -> str:
+        return f"places:{self.version}->{self.version + 1}"
+
+
+# from-version -> migration
+MIGRATIONS: Dict[int, Migration] = {}
+
+
+def migration(version: int, description: str, projection: Dict[str, int], unset: Optional[List[str]] = None, prepare=None):
+    """Register a v -> v+1 migration. `apply` must be pure so a retried batch gives the same result."""
+    def register(apply: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        if version in MIGRATIONS:
+            raise ValueError(f"Migration from v{version} already registered")
+        MIGRATIONS[version] = Migration(version, description, apply, projection, unset, prepare)
+        return apply
+    return register
+
+
+@migration(1, "search_terms + order-preserving merged categories", REPARSE_PROJECTION)
+def _v1_to_v2(doc: Dict[str, Any]) -> Dict[str, Any]:
+    if doc.get("raw_ai_response"):
+        return reparse_fields(doc)
+    return {"search_terms": search_terms(doc)}
+
+
+async def _copy_raw_payloads(docs: List[Dict[str, Any]]):
+    # Upserts, so a replayed batch rewrites the same payloads
+    ops = [replace_op(doc["_id"], doc["raw_ai_response"]) for doc in docs if doc.get("raw_ai_response")]
+    if ops:
+        await PlaceRaw.get_pymongo_collection().bulk_write(ops, ordered=False)
+
+
+@migration(2, "move raw_ai_response to compressed place_raw", {"raw_ai_response": 1}, unset=["raw_ai_response"], prepare=_copy_raw_payloads)
+def _v2_to_v3(doc: Dict[str, Any]) -> Dict[str, Any]:
+    # The dashboard shows Marin's comment, so it stays on the place
+    comment = (doc.get("raw_ai_response") or {}).get("marin_comment")
+    return {"marin_comment": comment} if comment else {}
+
+
+def version_filter(version: int) -> Dict[str, Any]:
+    # Documents written before schema_version existed count as v1
+    if version == 1:
+        return {"schema_version": {"$in": [1, None]}}
+    return {"schema_version": version}
+
+
+def migration_path(current: int, target: int) -> List[Migration]:
+    """Registered steps from `current` up to `target`. Raises ValueError on a gap."""
+    steps = []
+    for version in range(current, target):
+        if version not in MIGRATIONS:
+            raise ValueError(f"No migration registered from v{version} to v{version + 1}")
+        steps.append(MIGRATIONS[version])
+    return steps
+
+
+def build_batch_ops(step: Migration, docs: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """
+    $set updates for one batch. Each update is guarded by the source version, so replaying
+    a batch (after a crash between write and checkpoint) leaves migrated documents alone.
+    """
+    ops = []
+    for doc in docs:
+        update: Dict[str, Any] = {"$set": {**step.apply(doc), "schema_version": step.version + 1}}
+        if step.unset:
+            update["$unset"] = {field: "" for field in step.unset}
+        ops.append(UpdateOne({"_id": doc["_id"], **version_filter(step.version)}, update))
+    return ops
+
+
+class MigrationRunner:
+    """
+    Upgrades places to a target schema_version step by step, in _id-ordered batches.
+
+    After every batch the last _id is checkpointed in the `migrations` collection; a run
+    that finds a `running` checkpoint continues after it. `max_docs_per_sec` caps the write
+    rate (batches are paced, not bursted) so a production run leaves room for API traffic.
+    """
+
+    def __init__(self, batch_size: int = 200, max_docs_per_sec: Optional[float] = None):
+        self.batch_size = batch_size
+        self.max_docs_per_sec = max_docs_per_sec
+        if max_docs_per_sec:
+            # Never write more than ~1s worth of budget in a single burst
+            self.batch_size = max(1, min(batch_size, int(max_docs_per_sec)))
+
+    async def status(self) -> List[Dict[str, Any]]:
+        """Pending document count per registered step, plus its checkpoint."""
+        collection = Place.get_pymongo_collection()
+        checkpoints = MigrationCheckpoint.get_pymongo_collection()
+        rows = []
+        for version in sorted(MIGRATIONS):
+            step = MIGRATIONS[version]
+            rows.append({
+                "key": step.key,
+                "description": step.description,
+                "pending": await collection.count_documents(version_filter(version)),
+                "checkpoint": await checkpoints.find_one({"key": step.key}, {"_id": 0}),
+            })
+        return rows
+
+    async def run(self, target: int = CURRENT_SCHEMA_VERSION) -> Dict[str, int]:
+        """Apply every step below `target`. Returns migrated counts per step key."""
+        collection = Place.get_pymongo_collection()
+        lowest = await collection.find_one({"schema_version": {"$lt": target}}, {"schema_version": 1}, sort=[("schema_version", 1)])
+        missing = await collection.find_one({"schema_version": None}, {"_id": 1})
+        if missing:
+            current = 1
+        elif lowest:
+            current = lowest.get("schema_version") or 1
+        else:
+            logger.info(f"All places are at schema v{target} or newer.")
+            return {}
+
+        results = {}
+        for step in migration_path(current, target):
+            results[step.key] = await self._run_step(step)
+        return results
+
+    async def _run_step(self, step: Migration) -> int:
+        collection = Place.get_pymongo_collection()
+        checkpoints = MigrationCheckpoint.get_pymongo_collection()
+
+        checkpoint = await checkpoints.find_one({"key": step.key})
+        last_id = None
+        migrated = 0
+        if checkpoint and checkpoint.get("status") == "running":
+            last_id = checkpoint.get("last_id")
+            migrated = checkpoint.get("migrated", 0)
+            logger.info(f"Resuming {step.key} after {last_id} ({migrated} already migrated).")
+        else:
+            logger.info(f"Starting {step.key}: {step.description}")
+
+        start = time.perf_counter()
+        processed = 0
+        while True:
+            query = version_filter(step.version)
+            if last_id is not None:
+                query = {**query, "_id": {"$gt": last_id}}
+            docs = await collection.find(query, step.projection).sort("_id", 1).limit(self.batch_size).to_list(length=self.batch_size)
+            if not docs:
+                break
+
+            if step.prepare:
+                await step.prepare(docs)
+            result = await collection.bulk_write(build_batch_ops(step, docs), ordered=False)
+            last_id = docs[-1]["_id"]
+            migrated += result.modified_count
+            processed += len(docs)
+            await checkpoints.update_one(
+                {"key": step.key},
+                {"$set": {"last_id": last_id, "migrated": migrated, "status": "running", "updated_at": datetime.now()}},
+                upsert=True
+            )
+
+            if self.max_docs_per_sec:
+                ahead = processed / self.max_docs_per_sec - (time.perf_counter() - start)
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+
+        await checkpoints.update_one(
+            {"key": step.key},
+            {"$set": {"last_id": None, "migrated": migrated, "status": "done", "updated_at": datetime.now()}},
+            upsert=True
+        )
+        logger.info(f"Finished {step.key}: {migrated} migrated in {time.perf_counter() - start:.1f}s.")
+        return migrated
@@ -0,0 +1,45 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+
+# Sort order backing keyset pagination. Must match the compound index on Place.
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, doc_id: Any) -> str:
+    """Build an opaque cursor from the (created_at, _id) of the last row of a page."""
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(doc_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_cursor. Raises InvalidCursor on anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), ObjectId(payload["i"])
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_filter(cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Mongo filter that seeks past the cursor position for a (-created_at, -_id) sort.
+    Returns an empty filter for the first page.
+    """
+    if not cursor:
+        return {}
+    created_at, doc_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": doc_id}},
+        ]
+    }
@@ -1,14 +1,21 @@
+import asyncio
 import re
-import httpx
-from bs4 import BeautifulSoup
+import time
+import urllib.parse
 from typing import Dict, Any, Optional, List
 import json
 import logging
 from src.core.llm import ai_service
 from src.config import get_settings
+from src.core.http_client import http_client
+from src.core.html_meta import read_head
+from src.core.lookup_cache import lookup_cache, hashed_key, SHORT_URL, PLACES_QUERY, PHOTO
 
 logger = logging.getLogger(__name__)
 
+# Query params that don't identify a place (share/tracking noise)
+URL_TRACKING_PARAMS = {"entry", "g_ep", "g_st", "shorturl", "coh", "skid", "hl", "gl", "authuser", "sa", "ved", "ei"}
+
 class LinkParser:
     def __init__(self):
         self.headers = {
@@ -24,8 +31,58 @@ class LinkParser:
     def is_google_maps_url(self, url: str) -> bool:
         return "google.com/maps" in url or "goo.gl/maps" in url or "maps.app.goo.gl" in url
 
-    async def _call_places_api(self, text_query: str) -> Optional[Dict[str, Any]]:
-        """Call Google Places API (New) Text Search."""
+    def canonical_url_key(self, url: str) -> str:
+        """
+        Offline canonical key for a Google Maps URL, used for dedup before any network work.
+        Prefers stable ids embedded in the URL (place id, feature id, cid), otherwise a
+        normalized URL without scheme, www, fragment and tracking params.
+        """
+        parsed = urllib.parse.urlsplit(url.strip())
+        query = urllib.parse.parse_qs(parsed.query)
+
+        for param in ("query_place_id", "place_id"):
+            if query.get(param):
+                return self.place_id_key(query[param][0])
+        if query.get("ftid"):
+            return f"ftid:{query['ftid'][0].lower()}"
+        if query.get("cid"):
+            return f"cid:{query['cid'][0]}"
+
+        path = urllib.parse.unquote(parsed.path)
+        # Feature id inside the data blob: .../data=!4m..!1s0x31752f474c153723:0xa5c4943f96602336!8m2...
+        ftid = re.search(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)", path)
+        if ftid:
+            return f"ftid:{ftid.group(1).lower()}"
+
+        host = parsed.netloc.lower().removeprefix("www.")
+        kept = sorted(
+            (k, v) for k, values in query.items() for v in values
+            if k not in URL_TRACKING_PARAMS and not k.startswith("utm_")
+        )
+        if "goo.gl" in host:
+            # Short link ids are case-sensitive and the path is the whole identity
+            kept = []
+        normalized = host + path.rstrip("/")
+        if kept:
+            normalized += "?" + urllib.parse.urlencode(kept)
+        return f"url:{normalized}"
+
+    def place_id_key(self, place_id: str) -> str:
+        return f"pid:{place_id.removeprefix('places/')}"
+
+    def place_key(self, raw_info: Dict[str, Any], url: str) -> str:
+        """Strongest key for a fetched place: the Places API id when known, else the URL key."""
+        raw_api = raw_info.get("raw_api") or {}
+        if raw_api.get("id") or raw_api.get("name"):
+            return self.place_id_key(raw_api.get("id") or raw_api["name"])
+        return self.canonical_url_key(raw_info.get("url") or url)
+
+    def stored_place_key(self, url: str, raw: Optional[Dict[str, Any]] = None) -> str:
+        """place_key for an already saved place: the Places API id if its raw payload kept one, else the URL key."""
+        return self.place_key({"raw_api": (raw or {}).get("raw_api")}, url)
+
+    async def _call_places_api(self, text_query: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Call Google Places API (New) Text Search. Best matches are cached per query and field mask."""
         settings = get_settings()
         api_key = settings.GOOGLE_PLACES_API_KEY or settings.GEMINI_API_KEY
         
@@ -48,19 +105,24 @@ class LinkParser:
             if settings.FEAT_IMAGE_ANALYSIS:
                 base_fields.append("places.photos")
             
+            field_mask = ",".join(base_fields)
             headers = {
                 "Content-Type": "application/json",
                 "X-Goog-Api-Key": api_key,
-                "X-Goog-FieldMask": ",".join(base_fields)
+                "X-Goog-FieldMask": field_mask
             }
             payload = {"textQuery": text_query}
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.post(url, json=payload, headers=headers)
+
+            async def search():
+                resp = await http_client.post(url, json=payload, headers=headers)
                 if resp.status_code == 200:
                     data = resp.json()
                     if "places" in data and data["places"]:
                         return data["places"][0] # Return best match
+                return None
+
+            # The mask is part of the key: a cached answer without photos/reviews isn't reused when they're enabled
+            return await lookup_cache.get_or_fetch(PLACES_QUERY, hashed_key(field_mask, text_query), search, bypass=refresh)
         except Exception as e:
             logger.warning(f"Places API access failed: {e}")
         return None
@@ -81,12 +143,16 @@ class LinkParser:
         return None
 
 
-    async def _fetch_photo_bytes(self, photo_name: str) -> Optional[tuple[bytes, str]]:
-        """Fetch photo bytes and mime_type from Google Places Media API."""
+    async def _fetch_photo_bytes(self, photo_name: str, refresh: bool = False) -> Optional[tuple[bytes, str]]:
+        """Fetch photo bytes and mime_type from Google Places Media API (cached per resource name)."""
         settings = get_settings()
         api_key = settings.GOOGLE_PLACES_API_KEY or settings.GEMINI_API_KEY
         if not api_key: return None
-        
+
+        cached = await lookup_cache.get(PHOTO, photo_name, bypass=refresh)
+        if cached:
+            return cached["data"], cached["mime"]
+
         try:
             # url format: https://places.googleapis.com/v1/{name}/media
             url = f"https://places.googleapis.com/v1/{photo_name}/media"
@@ -97,103 +163,173 @@ class LinkParser:
                 "skipHttpRedirect": True 
             }
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                # Step 1: Get Photo URI
-                resp = await client.get(url, params=params)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    photo_uri = data.get("photoUri")
-                    
-                    if photo_uri:
-                        # Step 2: Download Image
-                        img_resp = await client.get(photo_uri)
-                        if img_resp.status_code == 200:
-                            mime_type = img_resp.headers.get("Content-Type", "image/jpeg")
-                            return img_resp.content, mime_type
+            # Step 1: Get Photo URI
+            resp = await http_client.get(url, params=params)
+            if resp.status_code == 200:
+                data = resp.json()
+                photo_uri = data.get("photoUri")
+                
+                if photo_uri:
+                    # Step 2: Download Image
+                    img_resp = await http_client.get(photo_uri, follow_redirects=True)
+                    if img_resp.status_code == 200:
+                        mime_type = img_resp.headers.get("Content-Type", "image/jpeg")
+                        await lookup_cache.set(PHOTO, photo_name, {"data": img_resp.content, "mime": mime_type})
+                        return img_resp.content, mime_type
                             
         except Exception as e:
             logger.warning(f"Failed to fetch photo {photo_name}: {e}")
         return None
 
-    async def fetch_place_info(self, url: str) -> Dict[str, Any]:
+    def _is_short_link(self, url: str) -> bool:
+        return "goo.gl" in url or "maps.app.goo.gl" in url or "g.co" in url
+
+    async def _resolve_short_link(self, url: str, refresh: bool = False) -> tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Final URL of a short link, plus the final page's metadata read off the same response
+        when the redirect chain had to be followed (so the page isn't requested a second time
+        for scraping). Cached: short links never change target.
+        """
+        expanded = await lookup_cache.get(SHORT_URL, url, bypass=refresh)
+        if expanded:
+            return expanded, None
+
+        async with http_client.stream("GET", url, headers=self.headers, follow_redirects=True) as resp:
+            final_url = str(resp.url)
+            if resp.status_code >= 400:
+                return final_url, None
+            try:
+                page = self._page_from_meta(await read_head(resp.aiter_bytes(), resp.charset_encoding or "utf-8"))
+            except Exception as e:
+                logger.warning(f"Reading the expanded page failed: {e}")
+                page = None
+        await lookup_cache.set(SHORT_URL, url, final_url)
+        return final_url, page
+
+    def _name_from_url(self, url: str) -> Optional[str]:
+        """Place name from a /maps/place/<name>/ path, if any."""
+        try:
+            parts = url.split("/place/")[1].split("/")[0]
+            return urllib.parse.unquote(parts).replace("+", " ") or None
+        except Exception:
+            return None
+
+    def _page_from_meta(self, meta: Dict[str, str]) -> Dict[str, Any]:
+        """Title, og:title and usable og:image URL from a page's head metadata."""
+        page = {"title": "Unknown", "og_title": "", "og_image": None}
+        if meta.get("title"):
+            page["title"] = meta["title"].replace(" - Google Maps", "").strip()
+        if meta.get("og:title"):
+            page["og_title"] = meta["og:title"]
+
+        # Scrape og:image (Free Thumbnail)
+        img_url = meta.get("og:image")
+        # Filter out generic Google Maps icons/logos and Static Maps
+        if img_url and "google_maps_logo" not in img_url and "icon" not in img_url and "staticmap" not in img_url:
+            logger.info(f"Found og:image: {img_url}")
+            page["og_image"] = img_url
+        return page
+
+    async def _scrape_page(self, url: str) -> Dict[str, Any]:
+        """Page metadata (best effort), streamed: only the <head> is downloaded."""
+        try:
+            async with http_client.stream("GET", url, headers=self.headers, follow_redirects=True) as resp:
+                return self._page_from_meta(await read_head(resp.aiter_bytes(), resp.charset_encoding or "utf-8"))
+        except Exception as e:
+            logger.warning(f"Scraping failed: {e}")
+        return {"title": "Unknown", "og_title": "", "og_image": None}
+
+    async def _download_image(self, img_url: str) -> Optional[tuple[bytes, str]]:
+        try:
+            img_resp = await http_client.get(img_url, headers=self.headers, follow_redirects=True)
+            if img_resp.status_code == 200:
+                return img_resp.content, img_resp.headers.get("Content-Type", "image/jpeg")
+        except Exception as e:
+            logger.warning(f"Failed to download og:image: {e}")
+        return None
+
+    async def fetch_place_info(self, url: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Fetch raw place info and images. Returns a dict ready for LLM processing.
-        Structure: {"raw_api": ..., "scraped": ..., "images": [bytes...], "context_text": "..."}
+        Link expansion, Places API and photo lookups go through lookup_cache; `refresh` skips it.
+        Structure: {"raw_api": ..., "scraped": ..., "images": [bytes...], "context_text": "...", "timings": {...}}
+
+        Each page is requested at most once, and only its <head> is read: a short link's final
+        redirect response doubles as the scrape. When the /place/ path names the place and the Places API matches (with
+        photos to use), the page isn't scraped at all:
+            expand -> Places API (path name) -> photos
+                   \-> scrape (no match / no photos) -> og:image download + Places API (scraped title) -> photos
+        With FEAT_IMAGE_ANALYSIS off, API photos are never used, so the path-name API call and the
+        scrape (+ og:image download) run concurrently.
+        Per-stage milliseconds are in "timings".
         """
+        timings: Dict[str, float] = {}
+
+        async def timed(stage: str, coro):
+            start = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+        started = time.perf_counter()
         try:
-            place_name_from_url = "Unknown Place"
-            page_title = "Unknown"
-            og_title_content = ""
-            scraped_images = []
-            
-            async with httpx.AsyncClient(headers=self.headers, follow_redirects=True, timeout=10.0) as client:
-                # Expand URL
-                if "goo.gl" in url or "maps.app.goo.gl" in url or "g.co" in url:
-                    resp = await client.get(url)
-                    url = str(resp.url)
-                
-                logger.info(f"Analyzing URL: {url}")
-                
-                # Extract Name from URL
-                try:
-                    import urllib.parse
-                    parts = url.split("/place/")[1].split("/")[0]
-                    place_name_from_url = urllib.parse.unquote(parts).replace("+", " ")
-                except Exception:
-                    pass
-                
-                # Scrape Fallback
-                try:
-                    resp = await client.get(url)
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    if soup.title:
-                        page_title = soup.title.string.replace(" - Google Maps", "").strip()
-                    og_title = soup.find("meta", property="og:title")
-                    if og_title:
-                        og_title_content = og_title['content']
-                    
-                    # Scrape og:image (Free Thumbnail)
-                    og_image = soup.find("meta", property="og:image")
-                    if og_image and og_image.get('content'):
-                        img_url = og_image['content']
-                        # Filter out generic Google Maps icons/logos and Static Maps
-                        if "google_maps_logo" not in img_url and "icon" not in img_url and "staticmap" not in img_url:
-                             logger.info(f"Found og:image: {img_url}")
-                             try:
-                                 img_resp = await client.get(img_url, timeout=5.0)
-                                 if img_resp.status_code == 200:
-                                     # Store tuple (bytes, mime_type)
-                                     # Need to make sure photos_bytes is available or define it here
-                                     # Since I can't easily move the variable definition in this Replace block without context,
-                                     # I will return this in a specialized way or use a temp list.
-                                     # Let's see... I'll define a temp list here.
-                                     scraped_images.append((img_resp.content, img_resp.headers.get("Content-Type", "image/jpeg")))
-                             except Exception as e:
-                                 logger.warning(f"Failed to download og:image: {e}")
-
-                except Exception as e:
-                    logger.warning(f"Scraping failed: {e}")
-
-            # --- Try Places API ---
-            places_api_data = None
-            photos_bytes = list(scraped_images) # Start with scraped images
+            settings = get_settings()
+
+            # Expand URL, keeping the final page's metadata
+            expanded_page = None
+            if self._is_short_link(url):
+                url, expanded_page = await timed("expand", self._resolve_short_link(url, refresh=refresh))
             
-            search_query = place_name_from_url if place_name_from_url != "Unknown Place" else (og_title_content or page_title)
+            logger.info(f"Analyzing URL: {url}")
             
-            if search_query and search_query != "Unknown":
-                places_api_data = await self._call_places_api(search_query)
+            # Extract Name from URL
+            place_name_from_url = self._name_from_url(url) or "Unknown Place"
+
+            # --- Try Places API with the name from the path ---
+            places_api_data = None
+            api_task = None
+            if place_name_from_url != "Unknown Place":
+                api_task = asyncio.create_task(timed("places_api", self._call_places_api(place_name_from_url, refresh=refresh)))
+            if api_task and settings.FEAT_IMAGE_ANALYSIS:
+                # Its photos may make the scrape unnecessary, so wait for it. Without image
+                # analysis they can't, and the scrape below runs alongside the API call instead.
+                places_api_data = await api_task
+                api_task = None
+            has_api_photos = bool(settings.FEAT_IMAGE_ANALYSIS and places_api_data and places_api_data.get("photos"))
+
+            # --- Scrape Fallback: no match, or the og:image is the only picture we'd get ---
+            page = {"title": "Unknown", "og_title": "", "og_image": None}
+            try:
+                if not has_api_photos:
+                    page = expanded_page or await timed("scrape", self._scrape_page(url))
+                page_title, og_title_content = page["title"], page["og_title"]
+                og_task = None
+                if page["og_image"]:
+                    og_task = asyncio.create_task(timed("og_image", self._download_image(page["og_image"])))
+                if api_task:
+                    places_api_data = await api_task
+            finally:
+                if api_task and not api_task.done():
+                    api_task.cancel()
+
+            if places_api_data is None and place_name_from_url == "Unknown Place":
+                search_query = og_title_content or page_title
+                if search_query and search_query != "Unknown":
+                    places_api_data = await timed("places_api", self._call_places_api(search_query, refresh=refresh))
             
             # --- Fetch Images ---
-            settings = get_settings()
+            api_photos = []
             if settings.FEAT_IMAGE_ANALYSIS and places_api_data and "photos" in places_api_data:
-                # Get top 3 photos
-                top_photos = places_api_data["photos"][:3]
-                for p in top_photos:
-                    if "name" in p: # Resource name 'places/PLACE_ID/photos/PHOTO_ID'
-                        img_data = await self._fetch_photo_bytes(p["name"])
-                        if img_data:
-                            # img_data is now (bytes, mime_type)
-                            photos_bytes.append(img_data)
+                # Get top 3 photos, resource names 'places/PLACE_ID/photos/PHOTO_ID'
+                names = [p["name"] for p in places_api_data["photos"][:3] if "name" in p]
+                api_photos = await timed("photos", asyncio.gather(*(self._fetch_photo_bytes(n, refresh=refresh) for n in names)))
+
+            # Scraped image first, then API photos; each is (bytes, mime_type)
+            scraped_image = await og_task if og_task else None
+            photos_bytes = [img for img in [scraped_image, *api_photos] if img]
+            timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"fetch_place_info timings (ms): {timings}")
 
             # --- Prepare Context Text for LLM ---
             final_place_name = place_name_from_url
@@ -243,7 +379,8 @@ class LinkParser:
                 "images": photos_bytes,
                 "raw_api": places_api_data, # Return raw for any explicit usage if needed
                 "url": url,
-                "inferred_name": final_place_name
+                "inferred_name": final_place_name,
+                "timings": timings
             }
             
         except Exception as e:
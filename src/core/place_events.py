@@ -0,0 +1,28 @@
+from typing import Any, Dict, Optional
+
+from src.core.cache import response_cache, PLACES
+from src.core.raw_store import raw_store
+from src.core.search_index import search_index
+from src.core.stats import stats_manager
+from src.core.vector_index import vector_index
+
+
+async def on_place_saved(place: Any, before: Optional[Any] = None, raw: Optional[Dict[str, Any]] = None):
+    """
+    Keep derived state in sync after a place is inserted or updated.
+    `before` is a snapshot_fields() copy for updates, None for inserts.
+    `raw` is the AI payload just saved to place_raw (read back from there when not given).
+    """
+    await stats_manager.apply(before, place)
+    search_index.upsert(place)
+    if raw is None and not getattr(place, "raw_ai_response", None):
+        raw = await raw_store.load(place.id)
+    vector_index.upsert(place, raw)
+    await response_cache.publish(PLACES)
+
+
+async def on_place_deleted(place: Any):
+    await stats_manager.apply(place, None)
+    search_index.remove(place.id)
+    vector_index.remove(place.id)
+    await response_cache.publish(PLACES)
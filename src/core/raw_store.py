@@ -0,0 +1,92 @@
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ReplaceOne
+
+from src.core.serialization import dumps_bytes
+from src.database.models import PlaceRaw
+
+logger = logging.getLogger(__name__)
+
+CODEC = "zlib-json"
+COMPRESSION_LEVEL = 6
+
+
+def compress(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """place_raw document body (without _id) for a raw AI payload."""
+    body = dumps_bytes(payload)
+    return {
+        "codec": CODEC,
+        "data": zlib.compress(body, COMPRESSION_LEVEL),
+        "size": len(body),
+        "created_at": datetime.now(),
+    }
+
+
+def decompress(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not doc:
+        return None
+    if doc.get("codec") != CODEC:
+        raise ValueError(f"Unknown raw payload codec: {doc.get('codec')}")
+    return json.loads(zlib.decompress(doc["data"]))
+
+
+def replace_op(place_id: Any, payload: Dict[str, Any]) -> ReplaceOne:
+    """Idempotent upsert of a place's raw payload, for bulk writes."""
+    return ReplaceOne({"_id": ObjectId(str(place_id))}, compress(payload), upsert=True)
+
+
+class RawStore:
+    """Raw AI payloads, zlib-compressed in `place_raw` so the places collection stays lean."""
+
+    async def save(self, place_id: Any, payload: Optional[Dict[str, Any]]):
+        if not payload:
+            return
+        await PlaceRaw.get_pymongo_collection().replace_one({"_id": ObjectId(str(place_id))}, compress(payload), upsert=True)
+
+    async def load(self, place_id: Any) -> Optional[Dict[str, Any]]:
+        doc = await PlaceRaw.get_pymongo_collection().find_one({"_id": ObjectId(str(place_id))})
+        return decompress(doc)
+
+    async def load_many(self, place_ids: Iterable[Any]) -> Dict[ObjectId, Dict[str, Any]]:
+        """place _id -> raw payload, for the ids that have one."""
+        ids: List[ObjectId] = [ObjectId(str(i)) for i in place_ids]
+        if not ids:
+            return {}
+        docs = await PlaceRaw.get_pymongo_collection().find({"_id": {"$in": ids}}).to_list(length=len(ids))
+        return {doc["_id"]: decompress(doc) for doc in docs}
+
+    async def with_raw(self, docs: AsyncIterable[Dict[str, Any]], batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Re-yield place documents with `raw_ai_response` filled in, one place_raw query per batch."""
+        batch: List[Dict[str, Any]] = []
+
+        async def flush():
+            raws = await self.load_many(d["_id"] for d in batch if not d.get("raw_ai_response"))
+            for d in batch:
+                if not d.get("raw_ai_response"):
+                    d["raw_ai_response"] = raws.get(d["_id"])
+            return batch
+
+        async for doc in docs:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                for d in await flush():
+                    yield d
+                batch = []
+        if batch:
+            for d in await flush():
+                yield d
+
+    async def delete(self, place_id: Any):
+        await PlaceRaw.get_pymongo_collection().delete_one({"_id": ObjectId(str(place_id))})
+
+    async def count(self) -> int:
+        return await PlaceRaw.get_pymongo_collection().count_documents({})
+
+
+# Singleton instance
+raw_store = RawStore()
@@ -0,0 +1,45 @@
+from typing import Any, Dict
+
+from src.core.text import SEARCH_TERM_FIELDS, search_terms
+
+# Fields read by reparse_fields (raw analysis + everything search_terms needs)
+REPARSE_PROJECTION = {
+    "raw_ai_response.details": 1,
+    "search_terms": 1,
+    **{field: 1 for field in SEARCH_TERM_FIELDS},
+}
+# List fields whose order carries no meaning (built from sets)
+UNORDERED_FIELDS = {"categories", "search_terms"}
+
+
+def reparse_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Re-extract derived fields from a raw document's raw_ai_response.
+    Add new extraction logic here; only fields that actually change get written.
+    """
+    details = (doc.get("raw_ai_response") or {}).get("details") or {}
+
+    # Example: if we added a new field 'noise_level' to schema
+    # fields["noise_level"] = details.get("noise_level")
+
+    # Merged categories
+    categories = details.get("categories") or []
+    meal_types = details.get("meal_types") or []
+    occasions = details.get("occasions") or []
+    fields = {"categories": list(dict.fromkeys(categories + meal_types + occasions))}
+    fields["search_terms"] = search_terms({**doc, **fields})
+    return fields
+
+
+def changed_fields(doc: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of `fields` that differs from the stored document."""
+    changed = {}
+    for key, value in fields.items():
+        current = doc.get(key)
+        if key in UNORDERED_FIELDS and isinstance(value, list) and isinstance(current, list):
+            if sorted(map(str, value)) == sorted(map(str, current)):
+                continue
+        elif value == current:
+            continue
+        changed[key] = value
+    return changed
@@ -0,0 +1,247 @@
+import bisect
+import heapq
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.text import tokenize
+from src.database.models import Place
+
+logger = logging.getLogger(__name__)
+
+# Place field -> weight of a term occurrence in that field (BM25F-style)
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "categories": 2.0,
+    "vibes": 1.5,
+    "mood": 1.5,
+    "meal_types": 1.0,
+    "occasions": 1.0,
+    "address": 0.5,
+}
+# Query words that carry no meaning for ranking
+STOPWORDS = {"tim", "kiem", "cho", "nao", "o", "di", "gan", "day", "quanh", "find", "the", "a", "an", "near", "me", "some"}
+# Score multiplier for prefix (non-exact) term matches
+PREFIX_PENALTY = 0.7
+# Max vocabulary terms a single prefix expands to
+MAX_PREFIX_EXPANSION = 32
+# Cached per-word score lists
+MAX_CACHED_WORDS = 1024
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def document_terms(doc: Any) -> Dict[str, float]:
+    """Weighted term frequencies of a Place or raw place document."""
+    tf: Dict[str, float] = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS.items():
+        value = doc.get(field) if isinstance(doc, dict) else getattr(doc, field, None)
+        if not value:
+            continue
+        values = value if isinstance(value, list) else [value]
+        for v in values:
+            for token in tokenize(str(v)):
+                tf[token] += weight
+    return dict(tf)
+
+
+class SearchIndex:
+    """
+    In-process inverted index over places with BM25 ranking.
+
+    Text is diacritic-folded, so "ca phe" matches "Cà Phê". Query words with no exact
+    term fall back to prefix matches ("caf" -> "cafe"); the last word is always also
+    prefix-expanded, so partially typed queries work.
+
+    Per-word score lists are cached sorted by score and combined with the threshold
+    algorithm, so repeated queries touch only the top of each list. A write only evicts
+    the cached words it touches; the idf/length drift it causes for other words is
+    tolerated until enough writes pile up to warrant a full cache reset.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._vocab: List[str] = [] # Sorted, for prefix lookups
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._ratings: Dict[str, Optional[float]] = {}
+        self._total_len = 0.0
+        self._cache: Dict[Tuple[str, bool], Tuple[Dict[str, float], List[Tuple[float, str]]]] = {}
+        self._writes_since_reset = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    # --- Writes ---
+
+    def upsert(self, doc: Any):
+        """Add or replace a place (Place instance or raw document)."""
+        doc_id = str(doc.get("_id") if isinstance(doc, dict) else doc.id)
+        self.remove(doc_id)
+
+        terms = document_terms(doc)
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocab, term)
+            postings[doc_id] = tf
+
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_len[doc_id] = length
+        self._ratings[doc_id] = doc.get("rating") if isinstance(doc, dict) else getattr(doc, "rating", None)
+        self._total_len += length
+        self._invalidate(terms)
+
+    def remove(self, doc_id: Any):
+        doc_id = str(doc_id)
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                i = bisect.bisect_left(self._vocab, term)
+                if i < len(self._vocab) and self._vocab[i] == term:
+                    self._vocab.pop(i)
+        self._total_len -= self._doc_len.pop(doc_id, 0.0)
+        self._ratings.pop(doc_id, None)
+        self._invalidate(terms)
+
+    def _invalidate(self, terms: Dict[str, float]):
+        """Evict cached words whose term expansions include any of `terms`."""
+        if not self._cache:
+            return
+        self._writes_since_reset += 1
+        if self._writes_since_reset > max(100, len(self._doc_terms) // 100):
+            self._cache.clear()
+            self._writes_since_reset = 0
+            return
+        for key in list(self._cache):
+            word = key[0]
+            if any(t.startswith(word) for t in terms):
+                del self._cache[key]
+
+    async def load(self):
+        """Build the index from the places collection (projected, streamed)."""
+        start = time.perf_counter()
+        projection = {field: 1 for field in FIELD_WEIGHTS}
+        projection["rating"] = 1
+        fresh = SearchIndex()
+        async for doc in Place.get_pymongo_collection().find({}, projection):
+            fresh.upsert(doc)
+        # Swap in one go so searches never see a half-built index
+        self.__dict__.update(fresh.__dict__)
+        logger.info(f"Search index loaded: {len(self)} places, {len(self._vocab)} terms in {time.perf_counter() - start:.2f}s.")
+
+    # --- Reads ---
+
+    def _expand(self, word: str, prefix: bool) -> List[Tuple[str, float]]:
+        """Vocabulary terms for a query word with their multiplier."""
+        terms = []
+        if word in self._postings:
+            terms.append((word, 1.0))
+        if prefix or not terms:
+            i = bisect.bisect_left(self._vocab, word)
+            while i < len(self._vocab) and len(terms) < MAX_PREFIX_EXPANSION and self._vocab[i].startswith(word):
+                if self._vocab[i] != word:
+                    terms.append((self._vocab[i], PREFIX_PENALTY))
+                i += 1
+        return terms
+
+    def _word_scores(self, word: str, prefix: bool) -> Tuple[Dict[str, float], List[Tuple[float, str]]]:
+        """BM25 contribution of one query word per doc (max over its expansions), cached."""
+        key = (word, prefix)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        n = len(self._doc_terms)
+        avgdl = (self._total_len / n) if n else 1.0
+        scores: Dict[str, float] = {}
+        for term, multiplier in self._expand(word, prefix):
+            postings = self._postings[term]
+            df = len(postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc_id] / avgdl)
+                s = multiplier * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                if s > scores.get(doc_id, 0.0):
+                    scores[doc_id] = s
+
+        ranked = sorted(((s, d) for d, s in scores.items()), reverse=True)
+        if len(self._cache) >= MAX_CACHED_WORDS:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = (scores, ranked)
+        return scores, ranked
+
+    def search(self, query: str, limit: int = 10, min_rating: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Top `limit` (place_id, score) pairs for a free-text query."""
+        words = []
+        for w in tokenize(query):
+            if w not in STOPWORDS and w not in words:
+                words.append(w)
+        if not words or limit <= 0:
+            return []
+
+        lists = [self._word_scores(w, prefix=(i == len(words) - 1)) for i, w in enumerate(words)]
+        lists = [l for l in lists if l[1]]
+        if not lists:
+            return []
+
+        def allowed(doc_id: str) -> bool:
+            if min_rating is None:
+                return True
+            rating = self._ratings.get(doc_id)
+            return rating is not None and rating >= min_rating
+
+        # Threshold algorithm: walk the sorted lists in parallel, stop once the k-th best
+        # total can't be beaten by any unseen doc.
+        top: List[Tuple[float, str]] = [] # Min-heap of (score, doc_id)
+        seen = set()
+        depth = 0
+        max_depth = max(len(ranked) for _, ranked in lists)
+        while depth < max_depth:
+            threshold = 0.0
+            for scores, ranked in lists:
+                if depth >= len(ranked):
+                    continue
+                head_score, doc_id = ranked[depth]
+                threshold += head_score
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if not allowed(doc_id):
+                    continue
+                total = sum(s.get(doc_id, 0.0) for s, _ in lists)
+                if len(top) < limit:
+                    heapq.heappush(top, (total, doc_id))
+                elif total > top[0][0]:
+                    heapq.heapreplace(top, (total, doc_id))
+            if len(top) >= limit and top[0][0] >= threshold:
+                break
+            depth += 1
+
+        return [(doc_id, score) for score, doc_id in sorted(top, reverse=True)]
+
+
+def fuse_rankings(*rankings: List[Tuple[str, float]], limit: int = 10, k: int = 60) -> List[str]:
+    """
+    Reciprocal rank fusion of several ranked (doc_id, score) lists. Only ranks are used,
+    so lists with incomparable scores (BM25, cosine) can be merged.
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            fused[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)[:limit]
+
+
+# Singleton instance
+search_index = SearchIndex()
@@ -0,0 +1,102 @@
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from bson import ObjectId
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError: # Optional speedup, stdlib json is the fallback
+    orjson = None
+
+
+def json_default(value: Any) -> Any:
+    """JSON fallback for the BSON types found in raw Motor documents (and pydantic models)."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(payload: Any) -> bytes:
+    """Compact UTF-8 JSON for raw documents (ObjectId/datetime aware)."""
+    if orjson is not None:
+        # orjson encodes datetime natively (same ISO format), ObjectId goes through default
+        return orjson.dumps(payload, default=json_default)
+    return json.dumps(payload, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips jsonable_encoder and encodes raw documents directly."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Inclusion projection for the fields of a (summary) model, using Mongo field names."""
+    return {(field.alias or name): 1 for name, field in model.model_fields.items()}
+
+
+def model_defaults(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Values a model would fill in for missing optional fields."""
+    defaults = {}
+    for name, field in model.model_fields.items():
+        if field.is_required():
+            continue
+        defaults[field.alias or name] = field.get_default(call_default_factory=True)
+    return defaults
+
+
+def prepare_rows(docs: Iterable[Dict[str, Any]], defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Single pass over raw documents: fill model defaults and turn ObjectId/datetime
+    into their JSON forms, matching model_dump(mode='json', by_alias=True).
+    """
+    rows = []
+    for doc in docs:
+        row = dict(defaults)
+        for key, value in doc.items():
+            if isinstance(value, ObjectId):
+                value = str(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            row[key] = value
+        rows.append(row)
+    return rows
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Turn a `fields=name,rating` query value into Mongo field names for a sparse fieldset.
+    Returns None when no restriction was asked for. `_id` is always included.
+    Raises ValueError on unknown fields.
+    """
+    if not fields:
+        return None
+    allowed = {name: (field.alias or name) for name, field in model.model_fields.items()}
+    allowed.update({mongo_name: mongo_name for mongo_name in list(allowed.values())})
+
+    selected = ["_id"]
+    for name in (f.strip() for f in fields.split(",")):
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f"Unknown field: {name}")
+        if allowed[name] not in selected:
+            selected.append(allowed[name])
+    return selected
+
+
+def to_columns(rows: List[Dict[str, Any]], columns: List[str]) -> Dict[str, Any]:
+    """Columnar encoding: keys are sent once, each row becomes a positional array."""
+    return {
+        "columns": columns,
+        "rows": [[row.get(c) for c in columns] for row in rows],
+    }
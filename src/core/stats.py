@@ -0,0 +1,127 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.database.models import Place, PlaceStats
+
+logger = logging.getLogger(__name__)
+
+# PlaceStats map field -> Place field
+COUNTED_FIELDS = {
+    "categories": "categories",
+    "vibes": "vibes",
+    "price_levels": "price_level",
+}
+
+
+def _escape(key: str) -> str:
+    # Map keys become field paths in $inc, so '.' and a leading '$' can't be used raw
+    key = key.replace(".", "．")
+    return "＄" + key[1:] if key.startswith("$") else key
+
+
+def _unescape(key: str) -> str:
+    key = key.replace("．", ".")
+    return "$" + key[1:] if key.startswith("＄") else key
+
+
+def _values(doc: Any, field: str) -> List[str]:
+    """Distinct non-empty values of a list or scalar field on a Place or raw dict."""
+    value = doc.get(field) if isinstance(doc, dict) else getattr(doc, field, None)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return sorted({str(v) for v in value if v not in (None, "")})
+
+
+def stats_delta(old: Optional[Any], new: Optional[Any]) -> Dict[str, int]:
+    """
+    $inc document turning the stats for `old` into the stats for `new`.
+    Pass old=None for an insert and new=None for a delete.
+    """
+    inc: Counter = Counter()
+    if old is None and new is not None:
+        inc["total"] += 1
+    elif old is not None and new is None:
+        inc["total"] -= 1
+
+    for stats_field, place_field in COUNTED_FIELDS.items():
+        before = set(_values(old, place_field)) if old is not None else set()
+        after = set(_values(new, place_field)) if new is not None else set()
+        for v in after - before:
+            inc[f"{stats_field}.{_escape(v)}"] += 1
+        for v in before - after:
+            inc[f"{stats_field}.{_escape(v)}"] -= 1
+
+    return {k: v for k, v in inc.items() if v}
+
+
+def snapshot_fields(place: Any) -> Dict[str, Any]:
+    """Copy of the counted fields, taken before an in-place update."""
+    return {field: _values(place, field) for field in COUNTED_FIELDS.values()}
+
+
+class StatsManager:
+    """Keeps the PlaceStats document in sync so /api/stats is a single O(1) read."""
+
+    async def apply(self, old: Optional[Any], new: Optional[Any]):
+        inc = stats_delta(old, new)
+        if not inc:
+            return
+        try:
+            collection = PlaceStats.get_pymongo_collection()
+            await collection.update_one(
+                {"key": "global"},
+                {"$inc": inc, "$set": {"updated_at": datetime.now()}},
+                upsert=True
+            )
+        except Exception as e:
+            # Counters drift until the next rebuild, the write itself already succeeded
+            logger.error(f"Failed to update place stats: {e}")
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """Recount everything from the places collection. Used for repair."""
+        totals: Counter = Counter()
+        counts = {stats_field: Counter() for stats_field in COUNTED_FIELDS}
+
+        projection = {field: 1 for field in COUNTED_FIELDS.values()}
+        async for doc in Place.get_pymongo_collection().find({}, projection):
+            totals["total"] += 1
+            for stats_field, place_field in COUNTED_FIELDS.items():
+                counts[stats_field].update(_escape(v) for v in _values(doc, place_field))
+
+        doc = {
+            "key": "global",
+            "total": totals["total"],
+            **{k: dict(v) for k, v in counts.items()},
+            "updated_at": datetime.now(),
+        }
+        await PlaceStats.get_pymongo_collection().replace_one({"key": "global"}, doc, upsert=True)
+        logger.info(f"Rebuilt place stats ({doc['total']} places).")
+        return doc
+
+    async def ensure(self):
+        """Build the stats document on first start of an existing deployment."""
+        if not await PlaceStats.get_pymongo_collection().find_one({"key": "global"}, {"_id": 1}):
+            await self.rebuild()
+
+    async def get(self, top: int = 5) -> Dict[str, Any]:
+        doc = await PlaceStats.get_pymongo_collection().find_one({"key": "global"}) or {}
+
+        def top_n(field: str, n: Optional[int]) -> List[Dict[str, Any]]:
+            items = [(k, v) for k, v in (doc.get(field) or {}).items() if v > 0]
+            items.sort(key=lambda kv: (-kv[1], kv[0]))
+            return [{"name": _unescape(k), "count": v} for k, v in items[:n]]
+
+        return {
+            "total_places": doc.get("total", 0),
+            "top_categories": top_n("categories", top),
+            "top_vibes": top_n("vibes", top),
+            "price_levels": top_n("price_levels", None),
+        }
+
+
+# Singleton instance
+stats_manager = StatsManager()
@@ -47,6 +47,13 @@ MSG_GEO_SEARCH_DISABLED = "😭, Marin mất GG Maps rồi, sao tìm được đ
 MSG_NO_RESULT_AROUND = "😩 Marin tìm đỏ con mắt mà vẫn không thấy quán nào quanh đây cả!"
 MSG_GEO_RESULT_HEADER = "📌 <b>Marin tìm thấy rồi:</b>\n"
 MSG_GEO_RESULT_CONTEXT_HEADER = "📌 <b>Marin thấy '{keywords}':</b>\n"
+MSG_GEO_RADIUS_NOTE = "<i>(Trong bán kính {radius})</i>\n\n"
+GEO_RESULT_ITEM = (
+    "📍 <b>{name}</b> ({rating}⭐) · 🚶 {distance}\n"
+    "🏠 {address}\n"
+    "✨ {vibes}\n"
+    "👉 <a href='{map_url}'>Google Maps</a>\n"
+)
 ERR_GEO_FAILED = "😵 Marin mù đường rồi..."
 
 # Status & Progress Messages
@@ -56,6 +63,10 @@ MSG_NAME_NOT_FOUND = "🙄 Marin không đọc được tên quán trong ảnh n
 MSG_ALREADY_SAVED = "<i>(Mình đã lưu quán này rồi nha! ID: {id})</i>"
 MSG_VIEW_FROM_LOCBOOK = "<i>(Xem lại từ LocBook)</i>"
 MSG_PLACE_NOT_FOUND = "😩 Marin tìm hoài vẫn không thấy quán này"
+MSG_PROGRESS_RETRY = "🔁 Marin vấp xíu, đang thử lại lần {attempt} nha..."
+MSG_PROGRESS_ANALYZING = "🧠 Marin tìm thấy <b>{name}</b> rồi, đang ngắm nghía xíu nha..."
+MSG_PROGRESS_LOCATING = "📍 Marin đọc được <b>{name}</b>, đang tìm địa chỉ nè..."
+MSG_JOB_QUEUE_FAILED = "😵 Marin làm rơi mất link này rồi, bạn gửi lại giúp mình nha!"
 
 # Place Card Template
 PLACE_CARD_TEMPLATE = (
@@ -0,0 +1,84 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase and strip diacritics so "Cà Phê" and "ca phe" compare equal.
+    'đ' has no combining form in NFD and is mapped by hand.
+    """
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return text.replace("đ", "d")
+
+
+def _fold_classes() -> Dict[str, str]:
+    """ASCII letter -> regex class of every Latin letter that folds to it ("a" -> "[aAàÀáÁ...]")."""
+    variants = defaultdict(set)
+    for code in [*range(0xC0, 0x250), *range(0x1E00, 0x1F00)]:
+        c = chr(code)
+        folded = fold(c)
+        if len(folded) == 1 and folded.isascii() and folded.isalpha():
+            variants[folded].add(c)
+    return {k: "[" + k + k.upper() + "".join(sorted(v - {k, k.upper()})) + "]" for k, v in variants.items()}
+
+
+_FOLD_CLASSES = _fold_classes()
+# Text stored decomposed (NFD) carries its accents as separate combining marks
+_COMBINING_MARKS = "[\u0300-\u036f]*"
+
+
+def fold_pattern(term: str) -> str:
+    """
+    Regex finding `term` the way fold() compares text, for matching inside Mongo where
+    values can't be folded: "ca phe" matches "Cà Phê" (use with the "i" option).
+    """
+    parts = []
+    for ch in fold(term):
+        if ch in _FOLD_CLASSES:
+            parts.append(_FOLD_CLASSES[ch] + _COMBINING_MARKS)
+        else:
+            parts.append(re.escape(ch))
+    return "".join(parts)
+
+
+def tokenize(text: str) -> List[str]:
+    """Folded alphanumeric tokens, in order (duplicates kept)."""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(fold(text))
+
+
+# Place fields folded into the `search_terms` array
+SEARCH_TERM_FIELDS = ["name", "address", "categories", "vibes", "mood", "meal_types", "occasions"]
+
+
+def search_terms(doc: Any) -> List[str]:
+    """Sorted unique folded tokens of a Place (or raw document), stored as `search_terms`."""
+    terms = set()
+    for field in SEARCH_TERM_FIELDS:
+        value = doc.get(field) if isinstance(doc, dict) else getattr(doc, field, None)
+        if not value:
+            continue
+        for v in (value if isinstance(value, list) else [value]):
+            terms.update(tokenize(str(v)))
+    return sorted(terms)
+
+
+def search_terms_filter(query: Optional[str]) -> Dict[str, Any]:
+    """
+    Mongo filter matching every query word against `search_terms`: exact for all words
+    but the last, which is a prefix (partially typed). Anchored prefix regexes on the
+    multikey index become index range scans, not collection scans.
+    Returns {} for a query with no usable words.
+    """
+    words = list(dict.fromkeys(tokenize(query or "")))
+    if not words:
+        return {}
+    clauses = [{"search_terms": w} for w in words[:-1]]
+    clauses.append({"search_terms": {"$regex": f"^{re.escape(words[-1])}"}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
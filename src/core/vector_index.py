@@ -0,0 +1,230 @@
+import logging
+import math
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.raw_store import raw_store
+from src.core.text import tokenize
+from src.database.models import Place
+
+logger = logging.getLogger(__name__)
+
+# Hashed feature space size (vectors are float32, 2KB per place)
+VECTOR_DIM = 512
+# Place field -> weight of its features; tags say the most about what a place is
+VECTOR_FIELD_WEIGHTS = {
+    "categories": 2.0,
+    "vibes": 2.0,
+    "mood": 1.5,
+    "occasions": 1.5,
+    "meal_types": 1.0,
+    "name": 1.0,
+}
+# Free-text parts of the AI payload's details that describe the place (inline
+# raw_ai_response on legacy documents, place_raw for the rest)
+DESCRIPTION_DETAILS = ["noise_level", "crowd_type", "amenities", "best_time_to_visit"]
+DESCRIPTION_WEIGHT = 0.5
+# Char n-grams let "work" meet "workspace" and survive typos
+NGRAM_SIZE = 3
+NGRAM_WEIGHT = 0.5
+# Cosine below which a free-text hit is noise: hashed trigrams give almost any message
+# a small overlap with some place (unrelated queries score ~0.02-0.07, real matches 0.25+)
+MIN_SEARCH_SCORE = 0.1
+# IDF is recomputed for all rows once the corpus grew by this fraction
+IDF_REFRESH_GROWTH = 0.1
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    """Stable hashed index and sign of a feature (signed hashing limits collision bias)."""
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % VECTOR_DIM, (1.0 if h & 0x80000000 else -1.0)
+
+
+def text_features(text: str, weight: float = 1.0) -> Dict[str, float]:
+    """Word and char n-gram features of folded text."""
+    features: Dict[str, float] = defaultdict(float)
+    for token in tokenize(text):
+        features["w:" + token] += weight
+        padded = f"#{token}#"
+        for i in range(len(padded) - NGRAM_SIZE + 1):
+            features["g:" + padded[i:i + NGRAM_SIZE]] += weight * NGRAM_WEIGHT
+    return features
+
+
+def place_text(doc: Any, raw: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+    """
+    (text, weight) pairs embedded for a Place or raw document.
+    `raw` is the AI payload when it isn't inline (it lives in place_raw for new places).
+    """
+    get = doc.get if isinstance(doc, dict) else (lambda f: getattr(doc, f, None))
+    parts = []
+    for field, weight in VECTOR_FIELD_WEIGHTS.items():
+        value = get(field)
+        if value:
+            parts.append((" ".join(value) if isinstance(value, list) else str(value), weight))
+
+    raw = raw or get("raw_ai_response") or {}
+    details = raw.get("details") or {}
+    for field in DESCRIPTION_DETAILS:
+        value = details.get(field)
+        if value:
+            parts.append((" ".join(value) if isinstance(value, list) else str(value), DESCRIPTION_WEIGHT))
+    comment = get("marin_comment") or raw.get("marin_comment")
+    if comment:
+        parts.append((comment, DESCRIPTION_WEIGHT))
+    return parts
+
+
+def hashed_tf(parts: List[Tuple[str, float]]) -> np.ndarray:
+    """Sublinear term frequencies of the features, hashed into VECTOR_DIM buckets."""
+    features: Dict[str, float] = defaultdict(float)
+    for text, weight in parts:
+        for feature, tf in text_features(text, weight).items():
+            features[feature] += tf
+
+    vec = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for feature, tf in features.items():
+        i, sign = _bucket(feature)
+        vec[i] += sign * (1.0 + math.log(tf)) if tf >= 1 else sign * tf
+    return vec
+
+
+class VectorIndex:
+    """
+    Local semantic-ish similarity over places: hashed n-gram TF-IDF vectors in one
+    contiguous float32 matrix, searched brute force (one matrix-vector product + top-k).
+
+    No model or network involved. Inserts append a row (capacity doubles as needed);
+    IDF weights are refreshed for every row only when the corpus has grown enough to
+    shift them, so a single insert stays O(dim).
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._tf = np.zeros((0, VECTOR_DIM), dtype=np.float32) # Raw rows, kept to reweight
+        self._vectors = np.zeros((0, VECTOR_DIM), dtype=np.float32) # TF-IDF, L2-normalized
+        self._ratings = np.zeros(0, dtype=np.float32) # NaN when unknown
+        self._df = np.zeros(VECTOR_DIM, dtype=np.float32)
+        self._idf = np.ones(VECTOR_DIM, dtype=np.float32)
+        self._idf_size = 0 # Corpus size the current IDF was computed for
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # --- Writes ---
+
+    def _grow(self):
+        capacity = max(64, 2 * self._tf.shape[0])
+        for name in ("_tf", "_vectors"):
+            grown = np.zeros((capacity, VECTOR_DIM), dtype=np.float32)
+            grown[:len(self)] = getattr(self, name)[:len(self)]
+            setattr(self, name, grown)
+        ratings = np.full(capacity, np.nan, dtype=np.float32)
+        ratings[:len(self)] = self._ratings[:len(self)]
+        self._ratings = ratings
+
+    def _weigh(self, rows: np.ndarray) -> np.ndarray:
+        weighted = rows * self._idf
+        norms = np.linalg.norm(weighted, axis=-1, keepdims=True)
+        return weighted / np.maximum(norms, 1e-12)
+
+    def _refresh_idf(self):
+        n = len(self)
+        self._idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+        self._vectors[:n] = self._weigh(self._tf[:n])
+        self._idf_size = n
+
+    def upsert(self, doc: Any, raw: Optional[Dict[str, Any]] = None):
+        """Add or replace a place (Place instance or raw document), `raw` as in place_text."""
+        doc_id = str(doc.get("_id") if isinstance(doc, dict) else doc.id)
+        rating = doc.get("rating") if isinstance(doc, dict) else getattr(doc, "rating", None)
+        tf = hashed_tf(place_text(doc, raw))
+
+        row = self._pos.get(doc_id)
+        if row is None:
+            if len(self) == self._tf.shape[0]:
+                self._grow()
+            row = len(self)
+            self._ids.append(doc_id)
+            self._pos[doc_id] = row
+        else:
+            self._df -= self._tf[row] != 0
+
+        self._tf[row] = tf
+        self._df += tf != 0
+        self._ratings[row] = np.nan if rating is None else rating
+        if len(self) > self._idf_size * (1 + IDF_REFRESH_GROWTH):
+            self._refresh_idf()
+        else:
+            self._vectors[row] = self._weigh(tf)
+
+    def remove(self, doc_id: Any):
+        """Drop a place, moving the last row into its slot."""
+        doc_id = str(doc_id)
+        row = self._pos.pop(doc_id, None)
+        if row is None:
+            return
+        self._df -= self._tf[row] != 0
+        last = len(self) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._pos[moved] = row
+            for arr in (self._tf, self._vectors, self._ratings):
+                arr[row] = arr[last]
+        self._ids.pop()
+
+    async def load(self):
+        """Build the index from the places collection (projected, streamed, AI payloads joined from place_raw)."""
+        start = time.perf_counter()
+        projection = {field: 1 for field in VECTOR_FIELD_WEIGHTS}
+        projection.update({"rating": 1, "marin_comment": 1, "raw_ai_response.marin_comment": 1})
+        projection.update({f"raw_ai_response.details.{field}": 1 for field in DESCRIPTION_DETAILS})
+
+        fresh = VectorIndex()
+        fresh._idf_size = math.inf # Weigh once at the end, not per growth step
+        async for doc in raw_store.with_raw(Place.get_pymongo_collection().find({}, projection)):
+            fresh.upsert(doc)
+        fresh._refresh_idf()
+        # Swap in one go so searches never see a half-built index
+        self.__dict__.update(fresh.__dict__)
+        logger.info(f"Vector index loaded: {len(self)} places in {time.perf_counter() - start:.2f}s.")
+
+    # --- Reads ---
+
+    def _top_k(self, query: np.ndarray, limit: int, min_rating: Optional[float], exclude: Optional[str] = None, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        n = len(self)
+        if not n or limit <= 0 or not query.any():
+            return []
+        scores = self._vectors[:n] @ query
+        if min_rating is not None:
+            # NaN ratings compare False, so unrated places drop out too
+            scores[~(self._ratings[:n] >= min_rating)] = -np.inf
+        if exclude is not None and exclude in self._pos:
+            scores[self._pos[exclude]] = -np.inf
+
+        k = min(limit, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], float(scores[i])) for i in top if scores[i] > max(min_score, 0.0)]
+
+    def search(self, query: str, limit: int = 10, min_rating: Optional[float] = None, min_score: float = MIN_SEARCH_SCORE) -> List[Tuple[str, float]]:
+        """Top `limit` (place_id, cosine) pairs for a free-text query, scoring above `min_score`."""
+        return self._top_k(self._weigh(hashed_tf([(query, 1.0)])), limit, min_rating, min_score=min_score)
+
+    def similar(self, place_id: Any, limit: int = 10, min_rating: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Places most similar to a given one (itself excluded). Empty if it isn't indexed."""
+        place_id = str(place_id)
+        row = self._pos.get(place_id)
+        if row is None:
+            return []
+        return self._top_k(self._vectors[row].copy(), limit, min_rating, exclude=place_id)
+
+
+# Singleton instance
+vector_index = VectorIndex()
@@ -4,6 +4,9 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 import pymongo
 
+# Version new places are written with; older documents are upgraded by src/core/migrations.py
+CURRENT_SCHEMA_VERSION = 3
+
 class Place(Document):
     name: str = Field(..., description="Name of the place")
     address: Optional[str] = None
@@ -15,8 +18,12 @@ class Place(Document):
     mood: List[str] = Field(default_factory=list)
     aesthetic_score: Optional[int] = None
     lighting: Optional[str] = None
-    # marin_comment: removed (generated dynamically)
+    marin_comment: Optional[str] = Field(None, description="Marin's review from the AI analysis, shown on the dashboard")
     google_maps_url: Optional[str] = None
+    # Dedup keys: canonical id (Places API id when known, else normalized URL) + every URL form seen
+    place_key: Optional[str] = Field(None, description="pid:<place id> | ftid:<feature id> | cid:<cid> | url:<normalized url>")
+    source_keys: List[str] = Field(default_factory=list, description="Canonical keys of every submitted URL for this place")
+    search_terms: List[str] = Field(default_factory=list, description="Accent-stripped lowercase tokens of name/address/tags, kept in sync on save")
     rating: Optional[float] = None
     price_level: Optional[str] = None
     status: Optional[str] = None # Operational, Closed, etc.
@@ -27,15 +34,34 @@ class Place(Document):
     local_image_path: Optional[str] = Field(None, description="Path to locally stored image")
     
     # Future-proofing
-    raw_ai_response: Optional[Dict[str, Any]] = Field(None, description="Raw JSON from AI for re-parsing")
-    schema_version: int = Field(default=1, description="Schema version for migration")
+    # Raw AI payloads live compressed in `place_raw` (src/core/raw_store.py). This is only set on
+    # documents older than schema v3, until the migration moves it out.
+    raw_ai_response: Optional[Dict[str, Any]] = Field(None, description="Legacy inline raw JSON from AI")
+    schema_version: int = Field(default=1, description="Schema version for migration") # Legacy default: new places set CURRENT_SCHEMA_VERSION explicitly
     
     created_at: datetime = Field(default_factory=datetime.now)
     
     class Settings:
         name = "places"
         indexes = [
-            [("name", pymongo.TEXT), ("categories", pymongo.TEXT), ("meal_types", pymongo.TEXT), ("occasions", pymongo.TEXT)] # Text Index
+            [("name", pymongo.TEXT), ("categories", pymongo.TEXT), ("meal_types", pymongo.TEXT), ("occasions", pymongo.TEXT)], # Text Index
+            pymongo.IndexModel([("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)], name="created_at_id_keyset"), # Keyset pagination
+            pymongo.IndexModel([("location", pymongo.GEOSPHERE)], name="location_2dsphere"), # $geoNear / $geoWithin
+            pymongo.IndexModel(
+                [("place_key", pymongo.ASCENDING)], name="place_key_unique", unique=True,
+                partialFilterExpression={"place_key": {"$type": "string"}} # Legacy docs without a key are ignored
+            ),
+            pymongo.IndexModel([("source_keys", pymongo.ASCENDING)], name="source_keys"), # Pre-network URL dedup
+            pymongo.IndexModel(
+                [("google_maps_url", pymongo.ASCENDING)], name="google_maps_url",
+                partialFilterExpression={"google_maps_url": {"$type": "string"}} # Dedup of legacy places without source_keys
+            ),
+            pymongo.IndexModel(
+                [("source_img_id", pymongo.ASCENDING)], name="source_img_id",
+                partialFilterExpression={"source_img_id": {"$type": "string"}} # Photo job retry dedup; link places have none
+            ),
+            pymongo.IndexModel([("search_terms", pymongo.ASCENDING)], name="search_terms"), # Multikey, exact + prefix term lookups
+            pymongo.IndexModel([("schema_version", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)], name="schema_version_id") # Migration batches
         ]
 
 class PlaceSummary(BaseModel):
@@ -51,6 +77,7 @@ class PlaceSummary(BaseModel):
     price_level: Optional[str] = None
     local_image_path: Optional[str] = None
     google_maps_url: Optional[str] = None
+    created_at: Optional[datetime] = None
     
     class Settings:
         projection = {"raw_ai_response": 0}
@@ -80,6 +107,87 @@ class PlaceUpdate(BaseModel):
 class AppConfig(Document):
     key: str = Field(default="global", description="Configuration Key")
     data: Dict[str, Any] = Field(default_factory=dict, description="JSON Config")
+    version: int = Field(default=0, description="Incremented on every write")
 
     class Settings:
         name = "app_config"
+
+class PlaceStats(Document):
+    """Materialized counters for /api/stats, maintained incrementally on place writes."""
+    key: str = Field(default="global")
+    total: int = 0
+    categories: Dict[str, int] = Field(default_factory=dict)
+    vibes: Dict[str, int] = Field(default_factory=dict)
+    price_levels: Dict[str, int] = Field(default_factory=dict)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "place_stats"
+
+class MigrationCheckpoint(Document):
+    """Progress of one schema migration step, so an interrupted run resumes where it stopped."""
+    key: str = Field(..., description="places:<from>-><to>")
+    last_id: Optional[PydanticObjectId] = None
+    migrated: int = 0
+    status: str = "running" # running | done
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "migrations"
+
+class PlaceRaw(Document):
+    """Compressed raw AI payload of a place, keyed by the place's _id. Read by reparse and admin views only."""
+    id: PydanticObjectId = Field(alias="_id")
+    codec: str = "zlib-json"
+    data: bytes
+    size: int = Field(0, description="Uncompressed size in bytes")
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "place_raw"
+
+class LookupCacheEntry(Document):
+    """Second tier of src/core/lookup_cache.py: external lookups (URL expansion, Places API, photos)."""
+    id: str = Field(alias="_id", description="<namespace>:<key>")
+    namespace: str
+    value: Any = None
+    expires_at: datetime
+
+    class Settings:
+        name = "lookup_cache"
+        indexes = [
+            pymongo.IndexModel([("expires_at", pymongo.ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0)
+        ]
+
+class IngestJob(Document):
+    """Queued link/photo ingestion (src/core/job_queue.py). Finished jobs expire after a week."""
+    kind: str = Field(..., description="link | photo")
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    status: str = "queued" # queued | running | done | failed
+    attempts: int = 0
+    max_attempts: int = 3
+    run_at: datetime = Field(default_factory=datetime.now, description="Not claimed before this (retry backoff)")
+    locked_until: Optional[datetime] = Field(None, description="Visibility timeout of a running job")
+    worker_id: Optional[str] = None
+    last_error: Optional[str] = None
+    error_type: Optional[str] = Field(None, description="Exception class of the last failed attempt")
+    created_at: datetime = Field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "ingest_jobs"
+        indexes = [
+            pymongo.IndexModel([("status", pymongo.ASCENDING), ("run_at", pymongo.ASCENDING)], name="status_run_at"), # Claiming
+            pymongo.IndexModel([("finished_at", pymongo.ASCENDING)], name="finished_at_ttl", expireAfterSeconds=7 * 86400)
+        ]
+
+class CacheVersion(Document):
+    """Shared write counter per collection for src/core/cache.py, so every worker and script invalidates the same responses."""
+    id: str = Field(alias="_id", description="Collection name")
+    version: int = 0
+
+    class Settings:
+        name = "cache_versions"
+
+# Every Beanie document, for init_beanie in the API/bot and scripts
+DOCUMENT_MODELS = [Place, UserLog, AppConfig, PlaceStats, MigrationCheckpoint, PlaceRaw, LookupCacheEntry, IngestJob, CacheVersion]
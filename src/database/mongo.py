@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Type
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, monitoring
+
+logger = logging.getLogger(__name__)
+
+# Recent checkout waits kept for percentiles
+WAIT_SAMPLES = 2048
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters fed by pymongo's CMAP events.
+
+    Checkout wait is the time an operation spent waiting for a pooled connection; when it
+    climbs (and `checked_out` sits at the pool size) the pool is saturated.
+    Events arrive from driver threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits_ms: deque = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.checked_out = 0
+        self.open_connections = 0
+        self.pool_clears = 0
+
+    def _record_wait(self, duration: Optional[float]):
+        wait_ms = (duration or 0.0) * 1000
+        self._waits_ms.append(wait_ms)
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    # --- pymongo listener hooks ---
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self._record_wait(getattr(event, "duration", None))
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+            self._record_wait(getattr(event, "duration", None))
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    # --- Reads ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            count = self.checkouts + sum(self.checkout_failures.values())
+
+            def pct(p: float) -> float:
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else 0.0
+
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "checked_out": self.checked_out,
+                "open_connections": self.open_connections,
+                "pool_clears": self.pool_clears,
+                "wait_ms": {
+                    "avg": round(self.total_wait_ms / count, 3) if count else 0.0,
+                    "p50": pct(0.50),
+                    "p95": pct(0.95),
+                    "p99": pct(0.99),
+                    "max": round(self.max_wait_ms, 3),
+                    "samples": len(waits),
+                },
+            }
+
+
+# Process-wide pool metrics and client
+pool_metrics = PoolMetrics()
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def client_options(settings) -> Dict[str, Any]:
+    """Motor/pymongo keyword options from settings."""
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_metrics],
+    }
+    compressors = [c.strip() for c in (settings.MONGO_COMPRESSORS or "").split(",") if c.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def get_client(settings) -> AsyncIOMotorClient:
+    """The shared client (one connection pool per process), created on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(settings.MONGO_URI, **client_options(settings))
+    return _client
+
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+async def connect(settings, document_models: List[Type], max_retries: int = 5, retry_delay: float = 5):
+    """Ping until the server answers, then initialize Beanie on the shared client."""
+    client = get_client(settings)
+    for attempt in range(max_retries):
+        try:
+            await client.admin.command("ping")
+            await init_beanie(database=client[settings.MONGO_DB_NAME], document_models=document_models)
+            return client
+        except Exception as e:
+            logger.warning(f"Failed to connect to MongoDB (Attempt {attempt + 1}/{max_retries}): {e}")
+            if attempt < max_retries - 1:
+                await asyncio.sleep(retry_delay)
+            else:
+                logger.error(f"Critical: Could not connect to MongoDB after {max_retries} attempts.")
+                raise
+
+
+def secondary_preferred(collection):
+    """Same collection with reads routed to secondaries when available (replica sets only)."""
+    return collection.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
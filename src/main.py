@@ -1,8 +1,7 @@
 import logging
 import asyncio
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
-from src.database.models import Place, UserLog, AppConfig
+from src.database.models import DOCUMENT_MODELS
+from src.database.mongo import connect
 import uvicorn
 import os
 
@@ -14,25 +13,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 async def init_db(settings):
-    max_retries = 5
-    retry_delay = 5
-    
-    for attempt in range(max_retries):
-        try:
-            client = AsyncIOMotorClient(settings.MONGO_URI, serverSelectionTimeoutMS=5000)
-            # Verify connection
-            await client.admin.command('ping')
-            
-            await init_beanie(database=client[settings.MONGO_DB_NAME], document_models=[Place, UserLog, AppConfig])
-            logger.info("MongoDB Initialized.")
-            return
-        except Exception as e:
-            logger.warning(f"Failed to connect to MongoDB (Attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
-            else:
-                logger.error(f"Critical: Could not connect to MongoDB after {max_retries} attempts.")
-                raise e
+    """Connect the shared client (src/database/mongo.py) and initialize Beanie, with retries."""
+    await connect(settings, DOCUMENT_MODELS, max_retries=5, retry_delay=5)
+    logger.info("MongoDB Initialized.")
 
 def main():
     """Entry point: Runs Uvicorn."""
@@ -2,69 +2,196 @@ import asyncio
 import argparse
 import sys
 import os
+import time
 from datetime import datetime
+from typing import Optional
 
 # Add project root to path
 sys.path.append(os.getcwd())
 
-from motor.motor_asyncio import AsyncIOMotorClient
-from beanie import init_beanie
-from src.database.models import Place, UserLog
+from src.database.models import Place, DOCUMENT_MODELS, CURRENT_SCHEMA_VERSION
+from src.database.mongo import connect
+from src.core.cache import response_cache, PLACES
 from src.core.llm import ai_service
+from src.core.stats import stats_manager
+from src.core.raw_store import raw_store
+from src.core.text import SEARCH_TERM_FIELDS, search_terms
 from src.config import get_settings
 
 async def init_db():
     settings = get_settings()
-    client = AsyncIOMotorClient(settings.MONGO_URI, serverSelectionTimeoutMS=5000)
-    await init_beanie(database=client[settings.MONGO_DB_NAME], document_models=[Place, UserLog])
+    await connect(settings, DOCUMENT_MODELS, max_retries=1)
     print("✅ DB Initialized")
 
 async def show_stats():
     """Show database statistics."""
     count = await Place.count()
-    raw_count = await Place.find(Place.raw_ai_response != None).count()
+    raw_count = await raw_store.count() + await Place.find(Place.raw_ai_response != None).count()
     print(f"📊 Total Places: {count}")
     print(f"💾 Places with Raw Data: {raw_count}")
     print(f"📉 Legacy Data (No Raw): {count - raw_count}")
 
-async def reparse_raw_data():
+async def reparse_raw_data(batch_size: int = 500, concurrency: int = 4):
     """
-    Iterate over all places with raw_ai_response,
-    re-extract fields, and update the document.
+    Stream all places, re-extract fields from their raw AI payload (src/core/reparse.py)
+    and write back only the fields that changed.
     Useful when Schema changes or extraction logic improves.
+
+    Places are read with a projected cursor and their payloads fetched per batch from
+    place_raw (inline raw_ai_response on not-yet-migrated documents is used as is).
+    `$set` updates go out as unordered bulk_writes of `batch_size` ops with up to
+    `concurrency` batches in flight.
     """
-    print("🔄 Starting Reparse...")
-    places = await Place.find(Place.raw_ai_response != None).to_list()
-    
+    from pymongo import UpdateOne
+    from src.core.reparse import REPARSE_PROJECTION, reparse_fields, changed_fields
+
+    print(f"🔄 Starting Reparse (batch {batch_size}, concurrency {concurrency})...")
+    collection = Place.get_pymongo_collection()
+    cursor = collection.find({}, REPARSE_PROJECTION).batch_size(batch_size)
+
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    scanned = 0
+    reparsed = 0
     updated_count = 0
-    for p in places:
-        raw = p.raw_ai_response
-        details = raw.get("details", {})
-        
-        # --- LOGIC UPDATE HERE ---
-        # Example: if we added a new field 'noise_level' to schema
-        # p.noise_level = details.get("noise_level")
-        
-        # Example: Update merged categories
-        categories = details.get('categories', [])
-        meal_types = details.get('meal_types', [])
-        occasions = details.get('occasions', [])
-        full_categories = list(set(categories + meal_types + occasions))
-        p.categories = full_categories
-        
-        # Update Schema Version
-        p.schema_version = 1 
-        
-        await p.save()
-        updated_count += 1
-        print(f"✅ Updated {p.name}")
-
-    print(f"✨ Reparsed {updated_count} places.")
+    start = time.perf_counter()
+
+    async def flush(ops):
+        nonlocal updated_count
+        try:
+            result = await collection.bulk_write(ops, ordered=False)
+            updated_count += result.modified_count
+        finally:
+            slots.release()
+
+    async def process(docs):
+        nonlocal reparsed
+        raws = await raw_store.load_many(d["_id"] for d in docs if not d.get("raw_ai_response"))
+        ops = []
+        for doc in docs:
+            raw = doc.get("raw_ai_response") or raws.get(doc["_id"])
+            if not raw:
+                continue
+            reparsed += 1
+            changes = changed_fields(doc, reparse_fields({**doc, "raw_ai_response": raw}))
+            if changes:
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+        if ops:
+            await slots.acquire() # Backpressure: stop reading while `concurrency` writes are in flight
+            task = asyncio.create_task(flush(ops))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+    docs = []
+    async for doc in cursor:
+        scanned += 1
+        docs.append(doc)
+        if len(docs) >= batch_size:
+            await process(docs)
+            docs = []
+        if scanned % (batch_size * 10) == 0:
+            print(f"… {scanned} scanned, {scanned / (time.perf_counter() - start):.0f} docs/s")
+    if docs:
+        await process(docs)
+    if pending:
+        await asyncio.gather(*pending)
+
+    elapsed = time.perf_counter() - start
+    print(f"✨ Reparsed {reparsed} of {scanned} places, {updated_count} updated in {elapsed:.1f}s ({scanned / max(elapsed, 1e-9):.0f} docs/s).")
+
+async def rebuild_stats():
+    """Recount the materialized /api/stats document from scratch."""
+    print("🔄 Rebuilding stats...")
+    doc = await stats_manager.rebuild()
+    print(f"✨ Stats rebuilt: {doc['total']} places, {len(doc['categories'])} categories, {len(doc['vibes'])} vibes.")
+
+async def backfill_place_keys():
+    """
+    Set place_key/source_keys on legacy places (offline, no API calls). The key is the Places
+    API id when the raw payload (inline or in place_raw) kept one, like new submissions get,
+    else the google_maps_url key; that URL key always goes into source_keys for the pre-check.
+    Places whose key collides with an existing one are reported as duplicates and left untouched.
+    """
+    from pymongo.errors import DuplicateKeyError
+    from src.core.parser import link_parser
+
+    print("🔄 Backfilling place keys...")
+    collection = Place.get_pymongo_collection()
+    cursor = collection.find(
+        {"place_key": {"$not": {"$regex": "^pid:"}}, "google_maps_url": {"$ne": None}},
+        {"name": 1, "google_maps_url": 1, "place_key": 1, "source_keys": 1, "raw_ai_response.raw_api": 1}
+    )
+
+    updated_count = 0
+    resolved_count = 0
+    duplicates = []
+    async for doc in raw_store.with_raw(cursor):
+        url_key = link_parser.canonical_url_key(doc["google_maps_url"])
+        key = link_parser.stored_place_key(doc["google_maps_url"], doc.get("raw_ai_response"))
+        if key == doc.get("place_key") and url_key in (doc.get("source_keys") or []):
+            continue # URL-keyed already and nothing better to offer
+        try:
+            await collection.update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"place_key": key}, "$addToSet": {"source_keys": url_key}}
+            )
+            updated_count += 1
+            resolved_count += key.startswith("pid:")
+        except DuplicateKeyError:
+            duplicates.append((doc["_id"], doc.get("name"), key))
+
+    print(f"✨ Backfilled {updated_count} places ({resolved_count} keyed by Places id).")
+    for doc_id, name, key in duplicates:
+        print(f"⚠️ Duplicate of an existing place, not keyed: {name} ({doc_id}) -> {key}")
+
+async def backfill_search_terms():
+    """Recompute search_terms for every place (offline, projected fields only)."""
+    from pymongo import UpdateOne
+
+    print("🔄 Backfilling search terms...")
+    collection = Place.get_pymongo_collection()
+    projection = {field: 1 for field in SEARCH_TERM_FIELDS}
+    projection["search_terms"] = 1
+
+    updated_count = 0
+    ops = []
+    async for doc in collection.find({}, projection):
+        terms = search_terms(doc)
+        if terms != doc.get("search_terms"):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_terms": terms}}))
+        if len(ops) >= 500:
+            updated_count += (await collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        updated_count += (await collection.bulk_write(ops, ordered=False)).modified_count
+
+    print(f"✨ Backfilled search terms on {updated_count} places.")
+
+async def run_migrations(target: int, batch_size: int, rate: Optional[float]):
+    """Upgrade places to `target` schema_version (resumes an interrupted run)."""
+    from src.core.migrations import MigrationRunner
+
+    runner = MigrationRunner(batch_size=batch_size, max_docs_per_sec=rate)
+    for row in await runner.status():
+        print(f"📋 {row['key']} ({row['description']}): {row['pending']} pending")
+    print(f"🔄 Migrating to schema v{target}" + (f" at ≤{rate:g} docs/s..." if rate else "..."))
+    results = await runner.run(target)
+    for key, migrated in results.items():
+        print(f"✅ {key}: {migrated} migrated")
+    print("✨ Migration complete.")
 
 async def main():
     parser = argparse.ArgumentParser(description="LocBook Database Manager")
     parser.add_argument("--stats", action="store_true", help="Show database stats")
-    parser.add_argument("--reparse", action="store_true", help="Reparse fields from raw_ai_response")
+    parser.add_argument("--reparse", action="store_true", help="Reparse fields from the stored raw AI payloads")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per bulk write (reparse, migrate)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Bulk writes in flight (reparse)")
+    parser.add_argument("--rebuild-stats", action="store_true", help="Recompute the materialized stats document")
+    parser.add_argument("--backfill-keys", action="store_true", help="Compute dedup place keys for legacy places")
+    parser.add_argument("--migrate", action="store_true", help="Upgrade places to the target schema_version (resumable)")
+    parser.add_argument("--target", type=int, default=CURRENT_SCHEMA_VERSION, help="Schema version to migrate to")
+    parser.add_argument("--rate", type=float, default=None, help="Max documents migrated per second")
+    parser.add_argument("--backfill-search-terms", action="store_true", help="Recompute normalized search_terms for all places")
     
     args = parser.parse_args()
     
@@ -72,10 +199,26 @@ async def main():
     
     if args.stats:
         await show_stats()
+        return
     elif args.reparse:
-        await reparse_raw_data()
+        await reparse_raw_data(batch_size=args.batch_size, concurrency=args.concurrency)
+        # Categories may have changed
+        await rebuild_stats()
+    elif args.rebuild_stats:
+        await rebuild_stats()
+    elif args.backfill_keys:
+        await backfill_place_keys()
+    elif args.migrate:
+        await run_migrations(args.target, args.batch_size, args.rate)
+        # v1 -> v2 re-derives categories
+        await rebuild_stats()
+    elif args.backfill_search_terms:
+        await backfill_search_terms()
     else:
         parser.print_help()
+        return
+    # Places changed under the running API: drop its cached responses
+    await response_cache.publish(PLACES)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.core.config_store import ConfigStore, DEFAULT_APP_CONFIG, deep_merge
+
+class TestConfigStore(unittest.IsolatedAsyncioTestCase):
+    def test_deep_merge_keeps_defaults_and_does_not_mutate(self):
+        override = {"LINKS": {"GITHUB": "https://example.com"}, "HOME_CATEGORIES": ["Bar"]}
+
+        merged = deep_merge(DEFAULT_APP_CONFIG, override)
+
+        self.assertEqual(merged["LINKS"]["GITHUB"], "https://example.com")
+        self.assertEqual(merged["LINKS"]["DASHBOARD_URL"], DEFAULT_APP_CONFIG["LINKS"]["DASHBOARD_URL"])
+        self.assertEqual(merged["HOME_CATEGORIES"], ["Bar"])
+        self.assertNotEqual(DEFAULT_APP_CONFIG["LINKS"]["GITHUB"], "https://example.com")
+
+        merged["FEATURES"]["ENABLE_MAP"] = True
+        self.assertFalse(DEFAULT_APP_CONFIG["FEATURES"]["ENABLE_MAP"])
+
+    async def test_update_swaps_snapshot(self):
+        store = ConfigStore()
+        old = store.snapshot
+
+        collection = MagicMock()
+        collection.find_one_and_update = AsyncMock(return_value={
+            "key": "global", "version": 3, "data": {"FEATURES": {"ENABLE_MAP": True}}
+        })
+        with patch("src.core.config_store.AppConfig") as MockAppConfig:
+            MockAppConfig.get_pymongo_collection.return_value = collection
+            snapshot = await store.update({"FEATURES": {"ENABLE_MAP": True}})
+
+        self.assertEqual(snapshot.version, 3)
+        self.assertTrue(store.snapshot.data["FEATURES"]["ENABLE_MAP"])
+        self.assertTrue(store.snapshot.data["FEATURES"]["ENABLE_FOOTER"])
+        # Previous snapshot is untouched
+        self.assertFalse(old.data["FEATURES"]["ENABLE_MAP"])
+
+if __name__ == "__main__":
+    unittest.main()
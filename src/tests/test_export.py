@@ -0,0 +1,35 @@
+import gzip
+import json
+import unittest
+from datetime import datetime
+from bson import ObjectId
+from src.core.export import iter_ndjson
+
+async def _docs(n):
+    for i in range(n):
+        yield {"_id": ObjectId(), "name": f"Place {i}", "created_at": datetime(2025, 1, 1, 0, 0, i % 60)}
+
+async def _collect(it):
+    return b"".join([chunk async for chunk in it])
+
+class TestExport(unittest.IsolatedAsyncioTestCase):
+    async def test_ndjson(self):
+        body = await _collect(iter_ndjson(_docs(3)))
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+
+        self.assertEqual([r["name"] for r in rows], ["Place 0", "Place 1", "Place 2"])
+        self.assertEqual(rows[1]["created_at"], "2025-01-01T00:00:01")
+        self.assertEqual(len(rows[0]["_id"]), 24)
+
+    async def test_gzip_and_chunking(self):
+        chunks = [c async for c in iter_ndjson(_docs(500), gzip=True, chunk_size=1024)]
+
+        self.assertGreater(len(chunks), 2)
+        lines = gzip.decompress(b"".join(chunks)).decode().splitlines()
+        self.assertEqual(len(lines), 500)
+
+    async def test_empty(self):
+        self.assertEqual(await _collect(iter_ndjson(_docs(0))), b"")
+
+if __name__ == "__main__":
+    unittest.main()
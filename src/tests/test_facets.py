@@ -0,0 +1,63 @@
+import re
+import unittest
+from src.core.facets import build_facet_pipeline, group_expr, parse_facet_result, FACET_FIELDS, GROUP_FACET
+
+class TestFacets(unittest.TestCase):
+    def test_pipeline_excludes_own_selection_from_facet_counts(self):
+        pipeline = build_facet_pipeline(
+            filters={"categories": ["Cafe"], "vibes": ["Chill", "Cozy"], "mood": []},
+            search="coffee",
+            min_rating=4.0,
+        )
+
+        self.assertEqual(pipeline[0], {"$match": {"search_terms": {"$regex": "^coffee"}, "rating": {"$gte": 4.0}}})
+        facet = pipeline[1]["$facet"]
+
+        selected = {"categories": {"$in": ["Cafe"]}, "vibes": {"$in": ["Chill", "Cozy"]}}
+        self.assertEqual(facet["data"][0], {"$match": selected})
+        self.assertEqual(facet["vibes"][0], {"$match": {"categories": {"$in": ["Cafe"]}}})
+        self.assertEqual(facet["categories"][0], {"$match": {"vibes": {"$in": ["Chill", "Cozy"]}}})
+        self.assertEqual(facet["mood"][0], {"$match": selected})
+
+    def test_keyword_groups(self):
+        groups = {"Bar": ["bar", "cocktail"], "Cafe & Coffee": ["cafe", "coffee"], "Empty": []}
+        pipeline = build_facet_pipeline(filters={"vibes": ["Chill"]}, category_groups=groups, groups=["Bar"])
+        facet = pipeline[0]["$facet"]
+
+        # Selecting a group filters the page, but not the group counts
+        self.assertEqual(facet["data"][0]["$match"]["$expr"], {"$or": [group_expr(["bar", "cocktail"])]})
+        self.assertEqual(facet["vibes"][0]["$match"], {"$expr": {"$or": [group_expr(["bar", "cocktail"])]}})
+        self.assertEqual(facet[GROUP_FACET][0], {"$match": {"vibes": {"$in": ["Chill"]}}})
+        self.assertEqual(group_expr([]), {"$literal": False})
+
+        # Whole words like the dashboards: "barbecue" isn't a bar
+        regex = re.compile(group_expr(["bar", "cocktail"])["$regexMatch"]["regex"], re.I)
+        self.assertTrue(regex.search(" Rooftop Bar Chill"))
+        self.assertFalse(regex.search(" Barbecue Lively"))
+
+        result = parse_facet_result({GROUP_FACET: [{"_id": "Bar", "count": 2}]})
+        self.assertEqual(result["facets"][GROUP_FACET], [{"name": "Bar", "count": 2}])
+
+    def test_pipeline_without_base_filters(self):
+        pipeline = build_facet_pipeline(filters={})
+        self.assertEqual(len(pipeline), 1)
+        self.assertIn("$facet", pipeline[0])
+
+    def test_parse_result(self):
+        result = parse_facet_result({
+            "data": [{"_id": "x"}],
+            "total": [{"count": 7}],
+            "vibes": [{"_id": "Chill", "count": 3}],
+        })
+
+        self.assertEqual(result["total"], 7)
+        self.assertEqual(result["facets"]["vibes"], [{"name": "Chill", "count": 3}])
+        self.assertEqual(set(result["facets"]), set(FACET_FIELDS))
+
+    def test_parse_empty_result(self):
+        result = parse_facet_result({})
+        self.assertEqual(result["total"], 0)
+        self.assertEqual(result["data"], [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,8 @@ import os
 import shutil
 from src.core.image_manager import ImageManager
 from src.bot.handlers import handle_photo
+import src.core.strings as strings
+from src.bot.ingest import IngestError, process_photo_job, report_failure
 from src.database.models import Place
 
 class TestFutureProofing(unittest.IsolatedAsyncioTestCase):
@@ -26,14 +28,29 @@ class TestFutureProofing(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(os.path.exists(abs_path))
         self.assertIn("screenshots", rel_path)
         
-    async def test_rich_data_saving(self):
-        # Mock Context/Update
+    async def test_photo_is_queued(self):
         update = MagicMock()
         update.effective_user.id = 123
         update.message.date = None
-        update.message.photo = [MagicMock(file_id="123")]
-        
-        context = MagicMock()
+        update.message.photo = [MagicMock(file_id="small"), MagicMock(file_id="123")]
+        update.message.reply_text = AsyncMock()
+        update.message.reply_text.return_value.chat_id = 42
+        update.message.reply_text.return_value.message_id = 7
+
+        with patch('src.bot.handlers.get_settings') as mock_settings, \
+             patch('src.bot.handlers.rate_limiter.check_limit', return_value=True), \
+             patch('src.bot.handlers.job_queue.enqueue', new_callable=AsyncMock) as enqueue:
+            mock_settings.return_value.FEAT_SCREENSHOT_ANALYSIS = True
+            mock_settings.return_value.MAX_MESSAGE_AGE_SECONDS = 999
+            mock_settings.return_value.RATE_LIMIT_PER_MINUTE = 999
+
+            await handle_photo(update, MagicMock())
+
+        enqueue.assert_awaited_once_with("photo", {"file_id": "123", "user_id": 123, "chat_id": 42, "message_id": 7})
+
+    async def test_rich_data_saving(self):
+        bot = MagicMock()
+        bot.edit_message_text = AsyncMock()
         # Mock get_file -> download_to_memory
         mock_file = AsyncMock()
         
@@ -42,48 +59,86 @@ class TestFutureProofing(unittest.IsolatedAsyncioTestCase):
             
         mock_file.download_to_memory = AsyncMock(side_effect=mock_download)
         
-        # KEY FIX: context.bot.get_file must be AsyncMock
-        context.bot.get_file = AsyncMock()
-        context.bot.get_file.return_value = mock_file
-        
-        # Mock Settings
-        with patch('src.bot.handlers.get_settings') as mock_settings:
-            mock_settings.return_value.FEAT_SCREENSHOT_ANALYSIS = True
-            mock_settings.return_value.MAX_MESSAGE_AGE_SECONDS = 999
-            mock_settings.return_value.RATE_LIMIT_PER_MINUTE = 999
+        # KEY FIX: bot.get_file must be AsyncMock
+        bot.get_file = AsyncMock()
+        bot.get_file.return_value = mock_file
 
-            # Mock AI Service to return Rich Data
-            rich_response = {
-                "details": {
-                    "name": "Rich Cafe",
-                    "noise_level": "Quiet",
-                    "crowd_type": ["Students"],
-                    "amenities": ["Wifi"],
-                    "best_time_to_visit": "Afternoon"
-                },
-                "marin_comment": "Wow"
-            }
-            
-            with patch('src.bot.handlers.ai_service.analyze_place_complex', new_callable=AsyncMock) as mock_ai:
-                mock_ai.return_value = rich_response
-                
-                # Mock Rate Limiter
-                with patch('src.bot.handlers.rate_limiter.check_limit', return_value=True):
-                    # Mock Place Class (Avoid Beanie initialization)
-                    with patch('src.bot.handlers.Place') as MockPlace:
-                        mock_place_instance = MockPlace.return_value
-                        mock_place_instance.save = AsyncMock()
-                        
-                        # Mock ImageManager in handlers (Swap global instance)
-                        with patch('src.bot.handlers.image_manager', self.image_manager):
-                             # Make sure 'status_msg' works
-                             update.message.reply_text = AsyncMock()
-                             update.message.reply_text.return_value.edit_text = AsyncMock()
-                             
-                             await handle_photo(update, context)
-                             
-                             # Verify Save called
-                             self.assertTrue(mock_place_instance.save.called)
+        # Mock AI Service to return Rich Data
+        rich_response = {
+            "details": {
+                "name": "Rich Cafe",
+                "noise_level": "Quiet",
+                "crowd_type": ["Students"],
+                "amenities": ["Wifi"],
+                "best_time_to_visit": "Afternoon"
+            },
+            "marin_comment": "Wow"
+        }
+        job = {"_id": "job", "kind": "photo", "attempts": 1, "payload": {"file_id": "123", "user_id": 123, "chat_id": 42, "message_id": 7}}
+
+        with patch('src.bot.ingest.ai_service.analyze_place_complex', new_callable=AsyncMock) as mock_ai, \
+             patch('src.bot.ingest.link_parser.geocode_place', new_callable=AsyncMock, return_value=None), \
+             patch('src.bot.ingest.raw_store.save', new_callable=AsyncMock) as raw_save, \
+             patch('src.bot.ingest.on_place_saved', new_callable=AsyncMock) as saved, \
+             patch('src.bot.ingest.image_manager', self.image_manager), \
+             patch('src.bot.ingest.Place') as MockPlace:
+            mock_ai.return_value = rich_response
+            # Mock Place Class (Avoid Beanie initialization)
+            MockPlace.find_one = AsyncMock(return_value=None)
+            mock_place_instance = MockPlace.return_value
+            mock_place_instance.save = AsyncMock()
+
+            await process_photo_job(job, bot)
+
+        # Verify Save called, full payload kept aside, user sees the card
+        self.assertTrue(mock_place_instance.save.called)
+        raw_save.assert_awaited_once_with(mock_place_instance.id, rich_response)
+        # The description details reach the vector index without being inline on the place
+        saved.assert_awaited_once_with(mock_place_instance, raw=rich_response)
+        self.assertEqual(mock_ai.call_args.kwargs["images"][0][0], b"fake_image")
+        self.assertEqual(bot.edit_message_text.call_args.kwargs["message_id"], 7)
+
+    async def test_failed_photo_attempt_leaves_no_file(self):
+        bot = MagicMock()
+        bot.edit_message_text = AsyncMock()
+        mock_file = AsyncMock()
+        mock_file.download_to_memory = AsyncMock(side_effect=lambda f: f.write(b"fake_image"))
+        bot.get_file = AsyncMock(return_value=mock_file)
+        job = {"_id": "job", "kind": "photo", "attempts": 1, "payload": {"file_id": "123", "user_id": 123, "chat_id": 42, "message_id": 7}}
+
+        with patch('src.bot.ingest.ai_service.analyze_place_complex', new_callable=AsyncMock, side_effect=TimeoutError("gemini")), \
+             patch('src.bot.ingest.image_manager', self.image_manager), \
+             patch('src.bot.ingest.Place') as MockPlace:
+            MockPlace.find_one = AsyncMock(return_value=None)
+            with self.assertRaises(TimeoutError):
+                await process_photo_job(job, bot)
+
+        screenshots = os.path.join(self.test_dir, "screenshots")
+        self.assertEqual([f for _, _, files in os.walk(screenshots) for f in files], [])
+
+    async def test_gemini_errors_retry_unless_permanent(self):
+        bot = MagicMock()
+        bot.edit_message_text = AsyncMock()
+        mock_file = AsyncMock()
+        bot.get_file = AsyncMock(return_value=mock_file)
+        job = {"_id": "job", "kind": "photo", "attempts": 1, "payload": {"file_id": "123", "user_id": 123, "chat_id": 42, "message_id": 7}}
+
+        with patch('src.bot.ingest.ai_service.analyze_place_complex', new_callable=AsyncMock) as mock_ai, \
+             patch('src.bot.ingest.resize_image', return_value=b"img"), \
+             patch('src.bot.ingest.Place') as MockPlace:
+            MockPlace.find_one = AsyncMock(return_value=None)
+            # Rate limited: back to the queue, the user hears about it only if every attempt fails
+            mock_ai.return_value = {"error": strings.ERR_MSG_429}
+            with self.assertRaises(IngestError) as raised:
+                await process_photo_job(job, bot)
+            bot.edit_message_text.assert_not_called()
+            # Unreadable image: no point retrying
+            mock_ai.return_value = {"error": strings.ERR_MSG_400}
+            await process_photo_job(job, bot)
+            self.assertEqual(bot.edit_message_text.call_args.args[0], strings.ERROR_AI_FAIL.format(error=strings.ERR_MSG_400))
+
+        await report_failure({**job, "last_error": str(raised.exception), "error_type": "IngestError"}, bot)
+        self.assertEqual(bot.edit_message_text.call_args.args[0], strings.ERROR_AI_FAIL.format(error=strings.ERR_MSG_429))
 
 if __name__ == "__main__":
     unittest.main()
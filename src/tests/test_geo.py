@@ -0,0 +1,97 @@
+import unittest
+from bson import ObjectId
+from src.core.geo import (
+    validate_bbox, bbox_filter, cluster_cell_size, build_cluster_pipeline, cluster_row, point_row,
+    build_geo_near_pipeline, build_hybrid_pipeline, covering_radius, format_distance, keyword_terms,
+    keyword_prefilter
+)
+from src.core.text import fold_pattern
+
+class TestGeo(unittest.TestCase):
+    def test_validate_bbox(self):
+        validate_bbox(106.6, 10.7, 106.8, 10.9)
+        with self.assertRaises(ValueError):
+            validate_bbox(106.8, 10.7, 106.6, 10.9)
+        with self.assertRaises(ValueError):
+            validate_bbox(106.6, -91, 106.8, 10.9)
+
+    def test_bbox_ring_is_closed(self):
+        ring = bbox_filter(106.6, 10.7, 106.8, 10.9)["location"]["$geoWithin"]["$geometry"]["coordinates"][0]
+        self.assertEqual(ring[0], ring[-1])
+        self.assertEqual(len(ring), 5)
+
+    def test_wide_bbox_stays_indexable(self):
+        # Wide box: a polygon (not a legacy $box), with extra vertices along its parallels
+        ring = bbox_filter(100, 8, 110, 12)["location"]["$geoWithin"]["$geometry"]["coordinates"][0]
+        self.assertEqual(len(ring), 2 * 11 + 1)
+        self.assertEqual(ring[0], ring[-1])
+        self.assertTrue(all(b - a <= 1.0 + 1e-9 for (a, _), (b, _) in zip(ring[:11], ring[1:11])))
+
+        # Whole world: split at the middle, a -180..180 ring would collapse onto the antimeridian
+        halves = bbox_filter(-180, -90, 180, 90)["$or"]
+        rings = [h["location"]["$geoWithin"]["$geometry"]["coordinates"][0] for h in halves]
+        self.assertEqual([(r[0][0], r[len(r) // 2 - 1][0]) for r in rings], [(-180, 0), (0, 180)])
+        self.assertEqual({p[1] for r in rings for p in r}, {-89.9, 89.9})
+
+    def test_cell_size_halves_per_zoom(self):
+        self.assertAlmostEqual(cluster_cell_size(10), cluster_cell_size(9) / 2)
+        pipeline = build_cluster_pipeline({}, 10, max_clusters=100)
+        self.assertEqual(pipeline[-1], {"$limit": 100})
+
+    def test_rows(self):
+        oid = ObjectId()
+        self.assertEqual(
+            point_row({"_id": oid, "name": "A", "location": {"coordinates": [106.7, 10.8]}, "categories": ["Cafe"]}),
+            [str(oid), "A", 106.7, 10.8, "Cafe"]
+        )
+        self.assertIsNone(point_row({"_id": oid, "name": "B", "location": None}))
+
+        self.assertEqual(cluster_row({"lon": 1.0, "lat": 2.0, "count": 3, "place_id": oid, "name": "A"}), [1.0, 2.0, 3, None, None])
+        self.assertEqual(cluster_row({"lon": 1.0, "lat": 2.0, "count": 1, "place_id": oid, "name": "A"}), [1.0, 2.0, 1, str(oid), "A"])
+
+    def test_geo_near_pipeline(self):
+        stage = build_geo_near_pipeline(106.7, 10.8, 10000, 5)[0]["$geoNear"]
+        self.assertEqual(stage["near"]["coordinates"], [106.7, 10.8])
+        self.assertEqual(stage["maxDistance"], 10000)
+        self.assertEqual(stage["distanceField"], "distance")
+
+    def test_covering_radius(self):
+        radii = [2000, 5000, 10000]
+        self.assertEqual(covering_radius([], radii), 2000)
+        self.assertEqual(covering_radius([150, 1900], radii), 2000)
+        self.assertEqual(covering_radius([150, 4200], radii), 5000)
+        self.assertEqual(covering_radius([9000], radii), 10000)
+
+    def test_format_distance(self):
+        self.assertEqual(format_distance(347), "350m")
+        self.assertEqual(format_distance(1234), "1.2km")
+
+    def test_keyword_terms(self):
+        self.assertEqual(keyword_terms(None), [])
+        self.assertEqual(keyword_terms("Cafe chill cafe"), ["cafe", "chill"])
+
+    def test_hybrid_pipeline(self):
+        pipeline = build_hybrid_pipeline(106.7, 10.8, "cafe c++", 10000, 5, candidates=100)
+
+        # $geoNear must stay first and can't carry $text, the keyword prefilter goes in its query
+        self.assertIn("$geoNear", pipeline[0])
+        self.assertEqual(pipeline[0]["$geoNear"]["query"], {"search_terms": {"$regex": "cafe|c"}})
+        self.assertEqual(pipeline[1], {"$limit": 100})
+        self.assertEqual(pipeline[-1], {"$limit": 5})
+        # Terms are regex-escaped
+        self.assertIn(r"\\+\\+", str(pipeline))
+
+    def test_keyword_score_is_accent_insensitive(self):
+        # Scored with the same folding as the search_terms prefilter, so "ca phe" finds "Cà Phê"
+        pipeline = str(build_hybrid_pipeline(106.7, 10.8, "ca phe", 10000, 5))
+        self.assertIn(fold_pattern("ca"), pipeline)
+        self.assertIn(fold_pattern("phe"), pipeline)
+
+    def test_hybrid_pipeline_without_prefilter_is_uncapped(self):
+        self.assertEqual(keyword_prefilter(["cà", "phê"]), {"search_terms": {"$regex": "ca|phe"}})
+        pipeline = build_hybrid_pipeline(106.7, 10.8, "cafe ☕", 10000, 5, candidates=100)
+        self.assertNotIn("query", pipeline[0]["$geoNear"])
+        self.assertNotIn({"$limit": 100}, pipeline)
+
+if __name__ == "__main__":
+    unittest.main()
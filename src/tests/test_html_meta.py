@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+from pathlib import Path
+from src.core.html_meta import parse_head, read_head
+from src.core.parser import LinkParser
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+def chunked(body: bytes, size: int, consumed: list):
+    async def gen():
+        for i in range(0, len(body), size):
+            consumed.append(size)
+            yield body[i:i + size]
+    return gen()
+
+class TestHeadMeta(unittest.TestCase):
+    def setUp(self):
+        self.place = (FIXTURES / "maps_place.html").read_bytes()
+        self.search = (FIXTURES / "maps_search.html").read_bytes()
+
+    def test_place_page_stops_after_first_chunk(self):
+        consumed = []
+        meta = asyncio.run(read_head(chunked(self.place, 16 * 1024, consumed)))
+        self.assertEqual(meta["title"], "Cà Phê Vợt - Google Maps")
+        self.assertEqual(meta["og:title"], "Cà Phê Vợt · 12 Nguyễn Huệ, Bến Nghé, Quận 1, Hồ Chí Minh")
+        self.assertTrue(meta["og:image"].startswith("https://lh5.googleusercontent.com/p/"))
+        self.assertEqual(len(consumed), 1)
+
+    def test_entities_case_and_script_content(self):
+        meta = parse_head(self.search.decode("utf-8"))
+        # The <title> written from inside the script doesn't count, entities are decoded
+        self.assertEqual(meta["title"], "Bún & Bò Huế O Xuân – 5 Hàng Bè - Google Maps")
+        self.assertEqual(meta["og:title"], "Bún & Bò Huế O Xuân")
+        self.assertIn("staticmap", meta["og:image"])
+
+    def test_byte_cap(self):
+        consumed = []
+        meta = asyncio.run(read_head(chunked(self.search, 8 * 1024, consumed), max_bytes=32 * 1024))
+        self.assertEqual(len(consumed), 4)
+        self.assertNotIn("title", meta)
+
+    def test_multibyte_chars_split_across_chunks(self):
+        body = "<head><title>Cà Phê Vợt</title></head>".encode("utf-8")
+        meta = asyncio.run(read_head(chunked(body, 3, [])))
+        self.assertEqual(meta["title"], "Cà Phê Vợt")
+
+    def test_page_from_meta_filters_generic_images(self):
+        parser = LinkParser()
+        page = parser._page_from_meta(parse_head(self.search.decode("utf-8")))
+        self.assertEqual(page["title"], "Bún & Bò Huế O Xuân – 5 Hàng Bè")
+        self.assertIsNone(page["og_image"])
+        self.assertEqual(parser._page_from_meta({})["title"], "Unknown")
+
+if __name__ == "__main__":
+    unittest.main()
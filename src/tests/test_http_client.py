@@ -0,0 +1,29 @@
+import asyncio
+import unittest
+from src.core.http_client import HttpClientManager, timeout_for, DEFAULT_TIMEOUT, HOST_TIMEOUTS
+
+class TestHttpClient(unittest.TestCase):
+    def test_timeout_for_host(self):
+        self.assertEqual(timeout_for("https://places.googleapis.com/v1/places:searchText"), HOST_TIMEOUTS["places.googleapis.com"])
+        self.assertEqual(timeout_for("https://lh5.googleusercontent.com/p/abc=w800"), HOST_TIMEOUTS["googleusercontent.com"])
+        self.assertEqual(timeout_for("https://www.google.com/maps/place/X"), HOST_TIMEOUTS["google.com"])
+        self.assertEqual(timeout_for("https://example.org/"), DEFAULT_TIMEOUT)
+
+    def test_client_is_shared_until_closed(self):
+        manager = HttpClientManager()
+
+        async def run():
+            await manager.start()
+            first = manager.client
+            self.assertIs(manager.client, first)
+            await manager.close()
+            self.assertTrue(first.is_closed)
+            # Scripts without a lifespan get a fresh one lazily
+            second = manager.client
+            self.assertIsNot(second, first)
+            await manager.close()
+
+        asyncio.run(run())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from src.core.job_queue import JobQueue, claim_filter, exhausted_filter, retry_update
+
+SETTINGS = SimpleNamespace(JOB_WORKERS=2, JOB_MAX_ATTEMPTS=3, JOB_VISIBILITY_TIMEOUT_SECONDS=60, JOB_RETRY_BASE_SECONDS=10, JOB_POLL_SECONDS=0.01)
+
+class MemoryQueue(JobQueue):
+    """JobQueue with its storage steps on a list instead of Mongo."""
+    def __init__(self):
+        super().__init__()
+        self.jobs = []
+
+    async def enqueue(self, kind, payload, max_attempts=None):
+        self.jobs.append({"_id": len(self.jobs), "kind": kind, "payload": payload, "status": "queued",
+                          "attempts": 0, "max_attempts": max_attempts or 3, "run_at": datetime.now(), "worker_id": None})
+        self._wakeup.set()
+
+    async def _claim(self):
+        for job in self.jobs:
+            if job["status"] == "queued" and job["run_at"] <= datetime.now():
+                job.update(status="running", worker_id=self.worker_id, attempts=job["attempts"] + 1)
+                return dict(job)
+        return None
+
+    async def _fail_exhausted(self):
+        for job in self.jobs:
+            if job["status"] == "running" and job.get("locked_until") and job["locked_until"] < datetime.now() \
+                    and job["attempts"] >= job["max_attempts"]:
+                job.update(status="failed", locked_until=None, last_error="Worker stopped responding on the last attempt")
+                return dict(job)
+        return None
+
+    async def _update_owned(self, job, fields):
+        stored = self.jobs[job["_id"]]
+        if stored["status"] != "running" or stored["attempts"] != job["attempts"]:
+            return False
+        stored.update(fields)
+        return True
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("src.core.job_queue.get_settings", return_value=SETTINGS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retry_update_backs_off_then_fails(self):
+        now = datetime(2026, 1, 1)
+        first = retry_update({"attempts": 1, "max_attempts": 3}, "boom", now, 10)
+        self.assertEqual((first["status"], first["run_at"]), ("queued", now + timedelta(seconds=10)))
+        second = retry_update({"attempts": 2, "max_attempts": 3}, "boom", now, 10)
+        self.assertEqual(second["run_at"], now + timedelta(seconds=20))
+        last = retry_update({"attempts": 3, "max_attempts": 3}, "boom", now, 10)
+        self.assertEqual((last["status"], last["finished_at"]), ("failed", now))
+
+    def test_expired_leases_are_reclaimed_only_with_attempts_left(self):
+        now = datetime(2026, 1, 1)
+        attempts_left = {"$expr": {"$lt": ["$attempts", "$max_attempts"]}}
+        self.assertIn({"status": "running", "locked_until": {"$lt": now}, **attempts_left}, claim_filter(now)["$or"])
+        self.assertEqual(exhausted_filter(now)["$expr"], {"$gte": ["$attempts", "$max_attempts"]})
+
+    def test_job_that_killed_its_worker_is_reported(self):
+        queue = MemoryQueue()
+        failed = []
+
+        async def on_failure(job):
+            failed.append(job)
+
+        async def scenario():
+            queue.register("photo", mock.AsyncMock(), on_failure=on_failure)
+            await queue.enqueue("photo", {}, max_attempts=2)
+            # Last attempt claimed by a worker that then crashed
+            queue.jobs[0].update(status="running", attempts=2, locked_until=datetime.now() - timedelta(seconds=1))
+            queue.start(1)
+            while not failed:
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+        asyncio.run(asyncio.wait_for(scenario(), 2))
+        self.assertEqual(queue.jobs[0]["status"], "failed")
+        self.assertEqual(failed[0]["last_error"], "Worker stopped responding on the last attempt")
+        self.assertEqual(queue.stats["failed"], 1)
+
+    def test_workers_bound_concurrency(self):
+        queue = MemoryQueue()
+        running, peak = 0, 0
+
+        async def work(job):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        async def scenario():
+            queue.register("link", work)
+            queue.start(2)
+            for i in range(6):
+                await queue.enqueue("link", {"i": i})
+            while any(j["status"] != "done" for j in queue.jobs):
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+        asyncio.run(asyncio.wait_for(scenario(), 2))
+        self.assertEqual(peak, 2)
+        self.assertEqual(queue.stats["done"], 6)
+
+    def test_failures_retry_then_report(self):
+        queue = MemoryQueue()
+        failed = []
+
+        async def flaky(job):
+            raise RuntimeError(f"attempt {job['attempts']}")
+
+        async def on_failure(job):
+            failed.append(job)
+
+        async def scenario():
+            queue.register("photo", flaky, on_failure=on_failure)
+            await queue.enqueue("photo", {}, max_attempts=2)
+            job = await queue._claim()
+            await queue._run_job(job)
+            self.assertEqual(queue.jobs[0]["status"], "queued")
+            queue.jobs[0]["run_at"] = datetime.now() # Skip the backoff
+            job = await queue._claim()
+            await queue._run_job(job)
+
+        asyncio.run(scenario())
+        self.assertEqual(queue.jobs[0]["status"], "failed")
+        self.assertEqual((queue.jobs[0]["last_error"], queue.jobs[0]["error_type"]), ("attempt 2", "RuntimeError"))
+        self.assertEqual([j["last_error"] for j in failed], ["attempt 2"])
+        self.assertEqual(queue.stats, {**queue.stats, "retried": 1, "failed": 1})
+
+    def test_heartbeat_survives_errors_and_stops_on_lost_lease(self):
+        queue = MemoryQueue()
+        beats = []
+        real_update = queue._update_owned
+
+        async def flaky_update(job, fields):
+            beats.append(fields)
+            if len(beats) == 1:
+                raise ConnectionError("mongo blip")
+            if len(beats) == 3:
+                queue.jobs[job["_id"]]["worker_id"] = "someone-else" # Lease taken over
+                return False
+            return await real_update(job, fields)
+
+        async def slow(job):
+            await asyncio.sleep(10)
+
+        async def scenario():
+            queue.register("link", slow)
+            queue._update_owned = flaky_update
+            await queue.enqueue("link", {})
+            await queue._run_job(await queue._claim())
+
+        with mock.patch("src.core.job_queue.get_settings", return_value=SimpleNamespace(**{**vars(SETTINGS), "JOB_VISIBILITY_TIMEOUT_SECONDS": 0.03})):
+            asyncio.run(asyncio.wait_for(scenario(), 2))
+        self.assertEqual(len(beats), 3)
+        self.assertEqual(queue.stats["lost_leases"], 1)
+        # Left alone for its new owner
+        self.assertEqual((queue.jobs[0]["status"], queue.jobs[0]["worker_id"]), ("running", "someone-else"))
+
+    def test_stop_hands_running_jobs_back(self):
+        queue = MemoryQueue()
+        started = asyncio.Event()
+
+        async def slow(job):
+            started.set()
+            await asyncio.sleep(10)
+
+        async def scenario():
+            queue.register("link", slow)
+            queue.start(1)
+            await queue.enqueue("link", {})
+            await started.wait()
+            await queue.stop()
+
+        asyncio.run(asyncio.wait_for(scenario(), 2))
+        self.assertEqual((queue.jobs[0]["status"], queue.jobs[0]["attempts"]), ("queued", 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import contextlib
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from src.core.parser import LinkParser
+
+DELAY = 0.05
+
+class TestFetchPlaceInfo(unittest.TestCase):
+    def setUp(self):
+        self.parser = LinkParser()
+
+        async def scrape(url):
+            await asyncio.sleep(DELAY)
+            return {"title": "Cà Phê Vợt", "og_title": "Cà Phê Vợt", "og_image": "https://lh3.googleusercontent.com/og"}
+
+        async def places(query, refresh=False):
+            await asyncio.sleep(DELAY)
+            return {"displayName": {"text": query}, "photos": [{"name": f"places/x/photos/{i}"} for i in range(3)]}
+
+        async def photo(name, refresh=False):
+            await asyncio.sleep(DELAY)
+            return (name.encode(), "image/jpeg")
+
+        async def og_image(url):
+            await asyncio.sleep(DELAY)
+            return (b"og", "image/jpeg")
+
+        self.patches = [
+            mock.patch.object(self.parser, "_scrape_page", side_effect=scrape),
+            mock.patch.object(self.parser, "_call_places_api", side_effect=places),
+            mock.patch.object(self.parser, "_fetch_photo_bytes", side_effect=photo),
+            mock.patch.object(self.parser, "_download_image", side_effect=og_image),
+            mock.patch("src.core.parser.get_settings", return_value=SimpleNamespace(FEAT_IMAGE_ANALYSIS=True, MAX_REVIEWS_FOR_AI=5)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def run_fetch(self, url):
+        start = time.perf_counter()
+        result = asyncio.run(self.parser.fetch_place_info(url))
+        return result, time.perf_counter() - start
+
+    def test_named_url_with_match_skips_scraping(self):
+        result, elapsed = self.run_fetch("https://www.google.com/maps/place/C%C3%A0+Ph%C3%AA+V%E1%BB%A3t/@10.7,106.6,17z")
+
+        # Places API -> photos only, the page is never fetched
+        self.assertLess(elapsed, DELAY * 4)
+        self.parser._scrape_page.assert_not_called()
+        self.assertEqual(result["inferred_name"], "Cà Phê Vợt")
+        self.assertEqual([img for img, _ in result["images"]], [b"places/x/photos/0", b"places/x/photos/1", b"places/x/photos/2"])
+        self.assertEqual(set(result["timings"]), {"places_api", "photos", "total"})
+
+    def test_named_url_without_match_falls_back_to_scraping(self):
+        self.parser._call_places_api.side_effect = None
+        self.parser._call_places_api.return_value = None
+        result, _ = self.run_fetch("https://www.google.com/maps/place/Somewhere")
+        self.parser._scrape_page.assert_called_once()
+        self.parser._call_places_api.assert_called_once_with("Somewhere", refresh=False)
+        self.assertEqual([img for img, _ in result["images"]], [b"og"])
+
+    def test_short_link_page_is_requested_once(self):
+        body = "<html><head><title>Cà Phê Vợt - Google Maps</title></head><body></body></html>".encode("utf-8")
+        final = SimpleNamespace(url="https://www.google.com/maps?cid=123", status_code=200, charset_encoding=None)
+        async def aiter_bytes():
+            yield body
+        final.aiter_bytes = aiter_bytes
+
+        @contextlib.asynccontextmanager
+        async def stream(method, url, **kwargs):
+            yield final
+
+        with mock.patch("src.core.parser.http_client.stream", side_effect=stream) as get, \
+             mock.patch("src.core.parser.lookup_cache.get", return_value=None), \
+             mock.patch("src.core.parser.lookup_cache.set"):
+            result, _ = self.run_fetch("https://maps.app.goo.gl/abc")
+        get.assert_called_once()
+        # The redirect's final response doubled as the scrape
+        self.parser._scrape_page.assert_not_called()
+        self.parser._call_places_api.assert_called_once_with("Cà Phê Vợt", refresh=False)
+        self.assertEqual(result["url"], "https://www.google.com/maps?cid=123")
+
+    def test_unnamed_url_waits_for_scraped_title(self):
+        result, elapsed = self.run_fetch("https://www.google.com/maps?cid=123")
+        self.parser._call_places_api.assert_called_once_with("Cà Phê Vợt", refresh=False)
+        self.assertLess(elapsed, DELAY * 5)
+        self.assertEqual(len(result["images"]), 4)
+
+    def test_named_url_without_image_analysis_scrapes_alongside_the_api(self):
+        settings = SimpleNamespace(FEAT_IMAGE_ANALYSIS=False, MAX_REVIEWS_FOR_AI=5)
+        with mock.patch("src.core.parser.get_settings", return_value=settings):
+            result, elapsed = self.run_fetch("https://www.google.com/maps/place/C%C3%A0+Ph%C3%AA+V%E1%BB%A3t/@10.7,106.6,17z")
+
+        # API call, scrape and og:image overlap (sequential would be 3x DELAY), API photos unused
+        self.assertLess(elapsed, DELAY * 2.5)
+        self.parser._scrape_page.assert_called_once()
+        self.parser._call_places_api.assert_called_once_with("Cà Phê Vợt", refresh=False)
+        self.parser._fetch_photo_bytes.assert_not_called()
+        self.assertEqual(result["inferred_name"], "Cà Phê Vợt")
+        self.assertEqual(result["images"], [(b"og", "image/jpeg")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from src.core.lookup_cache import LookupCache, NAMESPACES, SHORT_URL, PHOTO
+
+class FakeCollection:
+    """Just enough of a Motor collection for the cache: find_one on _id/expires_at, replace_one."""
+    def __init__(self, fail=False):
+        self.docs = {}
+        self.fail = fail
+
+    async def find_one(self, query):
+        if self.fail:
+            raise ConnectionError("mongo down")
+        doc = self.docs.get(query["_id"])
+        if doc and doc["expires_at"] > query["expires_at"]["$gt"]:
+            return doc
+        return None
+
+    async def replace_one(self, query, doc, upsert=False):
+        if self.fail:
+            raise ConnectionError("mongo down")
+        self.docs[query["_id"]] = {"_id": query["_id"], **doc}
+
+class TestLookupCache(unittest.TestCase):
+    def setUp(self):
+        self.collection = FakeCollection()
+        patcher = mock.patch("src.core.lookup_cache.LookupCacheEntry.get_pymongo_collection", return_value=self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = LookupCache()
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        return "https://www.google.com/maps/place/Cafe"
+
+    def lookup(self, bypass=False, key="https://maps.app.goo.gl/abc"):
+        return asyncio.run(self.cache.get_or_fetch(SHORT_URL, key, self.fetch, bypass=bypass))
+
+    def test_memory_then_store_tier(self):
+        self.lookup()
+        self.lookup()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats[SHORT_URL]["memory_hits"], 1)
+
+        # A fresh process (empty LRU) still hits Mongo
+        self.cache.clear_memory()
+        self.assertEqual(self.lookup(), "https://www.google.com/maps/place/Cafe")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats[SHORT_URL]["store_hits"], 1)
+        self.assertEqual(self.cache.snapshot()[SHORT_URL]["hit_rate"], 0.667)
+
+    def test_bypass_refetches_and_refreshes(self):
+        self.lookup()
+        self.lookup(bypass=True)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.stats[SHORT_URL]["bypassed"], 1)
+
+    def test_expired_entries_are_misses(self):
+        self.lookup()
+        self.cache.clear_memory()
+        self.collection.docs[f"{SHORT_URL}:https://maps.app.goo.gl/abc"]["expires_at"] = datetime.now() - timedelta(seconds=1)
+        self.lookup()
+        self.assertEqual(self.calls, 2)
+
+    def test_none_is_not_cached(self):
+        async def fail():
+            self.calls += 1
+            return None
+        for _ in range(2):
+            asyncio.run(self.cache.get_or_fetch(PHOTO, "places/x/photos/1", fail))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.collection.docs, {})
+
+    def test_lru_is_bounded(self):
+        size = NAMESPACES[PHOTO][1]
+        for i in range(size + 5):
+            asyncio.run(self.cache.set(PHOTO, str(i), {"data": b"x", "mime": "image/jpeg"}))
+        self.assertEqual(self.cache.snapshot()[PHOTO]["memory_entries"], size)
+
+    def test_store_errors_fall_back_to_memory(self):
+        self.collection.fail = True
+        self.lookup()
+        self.lookup()
+        self.assertEqual(self.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import asyncio
+import unittest
+from unittest import mock
+from bson import ObjectId
+from src.core import migrations
+from src.core.migrations import MigrationRunner, build_batch_ops, migration_path, version_filter, MIGRATIONS
+
+class _Result:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+class _Query:
+    def __init__(self, docs):
+        self.docs = docs
+    def sort(self, *args):
+        self.docs = sorted(self.docs, key=lambda d: d["_id"])
+        return self
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+    async def to_list(self, length=None):
+        return [dict(d) for d in self.docs]
+
+class _Places:
+    """Just enough of a collection for the runner: version and _id filters, guarded $set."""
+    def __init__(self, docs, fail_after_batches=None):
+        self.docs = {d["_id"]: d for d in docs}
+        self.batches = 0
+        self.fail_after_batches = fail_after_batches
+
+    def _match(self, doc, query):
+        version = query.get("schema_version")
+        if isinstance(version, dict) and "$in" in version:
+            if doc.get("schema_version") not in version["$in"]:
+                return False
+        elif isinstance(version, dict) and "$lt" in version:
+            if doc.get("schema_version") is None or doc["schema_version"] >= version["$lt"]:
+                return False
+        elif "schema_version" in query and doc.get("schema_version") != version:
+            return False
+        if "_id" in query:
+            _id = query["_id"]
+            return doc["_id"] > _id["$gt"] if isinstance(_id, dict) else doc["_id"] == _id
+        return True
+
+    def find(self, query, projection=None):
+        return _Query([d for d in self.docs.values() if self._match(d, query)])
+
+    async def find_one(self, query, projection=None, sort=None):
+        docs = [d for d in self.docs.values() if self._match(d, query)]
+        if sort:
+            docs.sort(key=lambda d: d.get("schema_version") or 0)
+        return docs[0] if docs else None
+
+    async def count_documents(self, query):
+        return len([d for d in self.docs.values() if self._match(d, query)])
+
+    async def bulk_write(self, ops, ordered=True):
+        if self.fail_after_batches is not None and self.batches >= self.fail_after_batches:
+            raise RuntimeError("connection lost")
+        self.batches += 1
+        modified = 0
+        for op in ops:
+            doc = self.docs.get(op._filter["_id"])
+            if doc and self._match(doc, op._filter):
+                doc.update(op._doc["$set"])
+                modified += 1
+        return _Result(modified)
+
+class _Checkpoints:
+    def __init__(self):
+        self.docs = {}
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["key"])
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["key"], {"key": query["key"]}).update(update["$set"])
+
+class TestMigrations(unittest.TestCase):
+    def test_version_filter_counts_missing_as_v1(self):
+        self.assertEqual(version_filter(1), {"schema_version": {"$in": [1, None]}})
+        self.assertEqual(version_filter(3), {"schema_version": 3})
+
+    def test_path_requires_every_step(self):
+        self.assertEqual([m.key for m in migration_path(1, 2)], ["places:1->2"])
+        with self.assertRaises(ValueError):
+            migration_path(1, 99)
+
+    def test_batch_ops_are_version_guarded(self):
+        doc = {"_id": ObjectId(), "name": "Cà Phê", "raw_ai_response": {"details": {"categories": ["Cafe"]}}}
+        op = build_batch_ops(MIGRATIONS[1], [doc])[0]
+        self.assertEqual(op._filter, {"_id": doc["_id"], "schema_version": {"$in": [1, None]}})
+        self.assertEqual(op._doc["$set"]["schema_version"], 2)
+        self.assertEqual(op._doc["$set"]["categories"], ["Cafe"])
+        self.assertIn("phe", op._doc["$set"]["search_terms"])
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        docs = [{"_id": ObjectId(), "name": f"Place {i}", "schema_version": None if i % 2 else 1} for i in range(10)]
+        docs.append({"_id": ObjectId(), "name": "New", "schema_version": 2})
+        places = _Places(docs, fail_after_batches=2)
+        checkpoints = _Checkpoints()
+
+        with mock.patch.object(migrations.Place, "get_pymongo_collection", return_value=places), \
+             mock.patch.object(migrations.MigrationCheckpoint, "get_pymongo_collection", return_value=checkpoints):
+            runner = MigrationRunner(batch_size=3)
+            with self.assertRaises(RuntimeError):
+                asyncio.run(runner.run(2))
+            checkpoint = checkpoints.docs["places:1->2"]
+            self.assertEqual((checkpoint["status"], checkpoint["migrated"]), ("running", 6))
+
+            places.fail_after_batches = None
+            results = asyncio.run(runner.run(2))
+
+        self.assertEqual(results, {"places:1->2": 10})
+        self.assertEqual(places.batches, 4) # Resumed, didn't rescan the first two batches
+        self.assertTrue(all(d["schema_version"] == 2 and "search_terms" in d for d in docs[:10]))
+        self.assertEqual(checkpoints.docs["places:1->2"]["status"], "done")
+
+    def test_rate_cap_limits_batch_size(self):
+        self.assertEqual(MigrationRunner(batch_size=500, max_docs_per_sec=50).batch_size, 50)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from types import SimpleNamespace
+from src.database.mongo import PoolMetrics, client_options
+
+class TestMongoClient(unittest.TestCase):
+    def settings(self, **overrides):
+        values = dict(
+            MONGO_MAX_POOL_SIZE=20, MONGO_MIN_POOL_SIZE=2, MONGO_MAX_IDLE_TIME_MS=60000,
+            MONGO_SERVER_SELECTION_TIMEOUT_MS=5000, MONGO_COMPRESSORS="",
+        )
+        values.update(overrides)
+        return SimpleNamespace(**values)
+
+    def test_client_options(self):
+        options = client_options(self.settings())
+        self.assertEqual(options["maxPoolSize"], 20)
+        self.assertEqual(options["maxIdleTimeMS"], 60000)
+        self.assertNotIn("compressors", options)
+        self.assertEqual(client_options(self.settings(MONGO_COMPRESSORS="zstd, zlib"))["compressors"], ["zstd", "zlib"])
+
+    def test_pool_metrics(self):
+        metrics = PoolMetrics()
+        event = lambda duration, **kw: SimpleNamespace(duration=duration, **kw)
+        metrics.connection_created(event(None))
+        for d in (0.001, 0.002, 0.050):
+            metrics.connection_checked_out(event(d))
+        metrics.connection_checked_in(event(None))
+        metrics.connection_check_out_failed(event(0.5, reason="timeout"))
+
+        snap = metrics.snapshot()
+        self.assertEqual(snap["checkouts"], 3)
+        self.assertEqual(snap["checked_out"], 2)
+        self.assertEqual(snap["open_connections"], 1)
+        self.assertEqual(snap["checkout_failures"], {"timeout": 1})
+        self.assertEqual(snap["wait_ms"]["max"], 500.0)
+        self.assertEqual(snap["wait_ms"]["p50"], 50.0)
+        self.assertAlmostEqual(snap["wait_ms"]["avg"], 138.25)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from datetime import datetime
+from bson import ObjectId
+from src.core.pagination import encode_cursor, decode_cursor, keyset_filter, InvalidCursor
+
+class TestPagination(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        created_at = datetime(2025, 1, 2, 3, 4, 5, 678000)
+        doc_id = ObjectId()
+
+        cursor = encode_cursor(created_at, doc_id)
+
+        self.assertEqual(decode_cursor(cursor), (created_at, doc_id))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not-a-cursor")
+
+    def test_keyset_filter(self):
+        self.assertEqual(keyset_filter(None), {})
+
+        created_at = datetime(2025, 1, 1)
+        doc_id = ObjectId()
+        f = keyset_filter(encode_cursor(created_at, doc_id))
+
+        self.assertEqual(f["$or"][0], {"created_at": {"$lt": created_at}})
+        self.assertEqual(f["$or"][1], {"created_at": created_at, "_id": {"$lt": doc_id}})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from src.bot.ingest import link_dedup_filter
+from src.core.parser import LinkParser
+
+class TestPlaceKeys(unittest.TestCase):
+    def setUp(self):
+        self.parser = LinkParser()
+
+    def test_feature_id_from_long_url(self):
+        url = "https://www.google.com/maps/place/Ho+Chi+Minh+Statue/@10.7760773,106.7009477,17z/data=!3m1!4b1!4m6!3m5!1s0x31752f474c153723:0xa5c4943f96602336!8m2!3d10.7760773!4d106.7031364?entry=ttu"
+        other_view = "https://google.com/maps/place/Ho+Chi+Minh+Statue/@10.77,106.70,15z/data=!4m6!3m5!1s0x31752f474c153723:0xA5C4943F96602336!8m2"
+        self.assertEqual(self.parser.canonical_url_key(url), "ftid:0x31752f474c153723:0xa5c4943f96602336")
+        self.assertEqual(self.parser.canonical_url_key(url), self.parser.canonical_url_key(other_view))
+
+    def test_short_link_ignores_share_params(self):
+        self.assertEqual(
+            self.parser.canonical_url_key("https://maps.app.goo.gl/AbCdEf?g_st=ic"),
+            self.parser.canonical_url_key("http://maps.app.goo.gl/AbCdEf/")
+        )
+        # Short ids are case-sensitive
+        self.assertNotEqual(
+            self.parser.canonical_url_key("https://maps.app.goo.gl/AbCdEf"),
+            self.parser.canonical_url_key("https://maps.app.goo.gl/abcdef")
+        )
+
+    def test_ids_in_query(self):
+        self.assertEqual(self.parser.canonical_url_key("https://maps.google.com/?cid=123&hl=vi"), "cid:123")
+        self.assertEqual(
+            self.parser.canonical_url_key("https://www.google.com/maps/search/?api=1&query=x&query_place_id=ChIJ1"),
+            "pid:ChIJ1"
+        )
+
+    def test_place_key_prefers_places_api_id(self):
+        raw_info = {"raw_api": {"name": "places/ChIJabc"}, "url": "https://www.google.com/maps/place/X"}
+        self.assertEqual(self.parser.place_key(raw_info, "https://maps.app.goo.gl/x"), "pid:ChIJabc")
+        self.assertEqual(
+            self.parser.place_key({"raw_api": None, "url": "https://www.google.com/maps/place/X?entry=ttu"}, "u"),
+            "url:google.com/maps/place/X"
+        )
+
+    def test_stored_place_key_for_legacy_places(self):
+        url = "https://www.google.com/maps/place/X?entry=ttu"
+        # Same key a new submission of the place gets once the Places API answered
+        self.assertEqual(self.parser.stored_place_key(url, {"raw_api": {"id": "ChIJabc"}, "details": {}}), "pid:ChIJabc")
+        self.assertEqual(self.parser.stored_place_key(url, {"details": {}}), "url:google.com/maps/place/X")
+        self.assertEqual(self.parser.stored_place_key(url), "url:google.com/maps/place/X")
+
+    def test_dedup_falls_back_to_the_saved_url(self):
+        url = "https://maps.app.goo.gl/AbCdEf"
+        self.assertEqual(link_dedup_filter(["url:maps.app.goo.gl/AbCdEf"], [url, url]), {"$or": [
+            {"source_keys": {"$in": ["url:maps.app.goo.gl/AbCdEf"]}},
+            {"google_maps_url": {"$in": [url]}},
+        ]})
+
+if __name__ == "__main__":
+    unittest.main()
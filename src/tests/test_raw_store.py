@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+from bson import ObjectId
+from src.core.raw_store import compress, decompress, replace_op, RawStore
+from src.core.migrations import MIGRATIONS, build_batch_ops
+
+class TestRawStore(unittest.TestCase):
+    def setUp(self):
+        self.payload = {"details": {"name": "Cà Phê Vợt", "vibes": ["Chill"] * 50}, "marin_comment": "Xinh xỉu"}
+
+    def test_round_trip_is_compressed(self):
+        doc = compress(self.payload)
+        self.assertLess(len(doc["data"]), doc["size"])
+        self.assertEqual(decompress(doc), self.payload)
+        self.assertIsNone(decompress(None))
+        with self.assertRaises(ValueError):
+            decompress({**doc, "codec": "lz4"})
+
+    def test_replace_op_upserts_by_place_id(self):
+        place_id = ObjectId()
+        op = replace_op(str(place_id), self.payload)
+        self.assertEqual(op._filter, {"_id": place_id})
+        self.assertTrue(op._upsert)
+
+    def test_with_raw_fills_missing_payloads(self):
+        store = RawStore()
+        stored = {}
+        async def load_many(ids):
+            return {i: stored[i] for i in ids if i in stored}
+        store.load_many = load_many
+
+        inline, moved, bare = ObjectId(), ObjectId(), ObjectId()
+        stored[moved] = self.payload
+        docs = [{"_id": inline, "raw_ai_response": {"inline": True}}, {"_id": moved}, {"_id": bare}]
+
+        async def source():
+            for d in docs:
+                yield d
+
+        async def collect():
+            return [d async for d in store.with_raw(source(), batch_size=2)]
+
+        result = asyncio.run(collect())
+        self.assertEqual([d["raw_ai_response"] for d in result], [{"inline": True}, self.payload, None])
+
+    def test_v2_migration_moves_payload_out(self):
+        doc = {"_id": ObjectId(), "raw_ai_response": self.payload}
+        op = build_batch_ops(MIGRATIONS[2], [doc])[0]
+        self.assertEqual(op._doc["$unset"], {"raw_ai_response": ""})
+        self.assertEqual(op._doc["$set"], {"marin_comment": "Xinh xỉu", "schema_version": 3})
+        self.assertEqual(op._filter, {"_id": doc["_id"], "schema_version": 2})
+
+if __name__ == "__main__":
+    unittest.main()
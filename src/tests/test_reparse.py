@@ -0,0 +1,29 @@
+import unittest
+from src.core.reparse import reparse_fields, changed_fields
+
+class TestReparse(unittest.TestCase):
+    def setUp(self):
+        self.doc = {
+            "_id": 1,
+            "name": "Cà Phê Vợt",
+            "categories": ["Date", "Cafe"],
+            "search_terms": ["ca", "cafe", "date", "phe", "vot"],
+            "schema_version": 1,
+            "raw_ai_response": {"details": {"categories": ["Cafe"], "meal_types": None, "occasions": ["Date", "Cafe"]}},
+        }
+
+    def test_merged_categories_keep_order(self):
+        self.assertEqual(reparse_fields(self.doc)["categories"], ["Cafe", "Date"])
+
+    def test_unchanged_document_writes_nothing(self):
+        # Same categories in another order is not a change
+        self.assertEqual(changed_fields(self.doc, reparse_fields(self.doc)), {})
+
+    def test_only_changed_fields(self):
+        self.doc["raw_ai_response"]["details"]["meal_types"] = ["Brunch"]
+        changes = changed_fields(self.doc, reparse_fields(self.doc))
+        self.assertEqual(set(changes), {"categories", "search_terms"})
+        self.assertIn("brunch", changes["search_terms"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.core.cache import ResponseCache, etag_matches, PLACES
+
+class AsyncCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for doc in self.docs:
+            yield doc
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(max_entries=2)
+
+    def test_etag_changes_on_bump(self):
+        before = self.cache.etag("/api/places?", ["places"])
+        self.assertEqual(before, self.cache.etag("/api/places?", ["places"]))
+
+        self.cache.bump("app_config")
+        self.assertEqual(before, self.cache.etag("/api/places?", ["places"]))
+
+        self.cache.bump("places")
+        self.assertNotEqual(before, self.cache.etag("/api/places?", ["places"]))
+
+    def test_etag_is_per_key(self):
+        self.assertNotEqual(
+            self.cache.etag("/api/places?limit=20", ["places"]),
+            self.cache.etag("/api/places?limit=50", ["places"])
+        )
+
+    def test_lru_eviction(self):
+        self.cache.set("a", b"1")
+        self.cache.set("b", b"2")
+        self.cache.get("a") # a is now most recent
+        self.cache.set("c", b"3")
+
+        self.assertEqual(self.cache.get("a"), b"1")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), b"3")
+        self.assertEqual(self.cache.hits, 3)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_seconds_since_bump(self):
+        self.assertEqual(self.cache.seconds_since_bump(PLACES), float("inf"))
+        self.cache.bump(PLACES)
+        self.assertLess(self.cache.seconds_since_bump(PLACES), 1)
+
+    def test_shared_versions(self):
+        collection = MagicMock()
+        collection.find_one_and_update = AsyncMock(return_value={"_id": PLACES, "version": 1})
+        before = self.cache.etag("/api/places?", [PLACES])
+
+        with patch("src.core.cache.CacheVersion") as MockCacheVersion:
+            MockCacheVersion.get_pymongo_collection.return_value = collection
+            asyncio.run(self.cache.publish(PLACES))
+            published = self.cache.etag("/api/places?", [PLACES])
+            self.assertNotEqual(before, published)
+
+            # Reading back our own increment changes nothing
+            collection.find.return_value = AsyncCursor([{"_id": PLACES, "version": 1}])
+            self.assertEqual(asyncio.run(self.cache.refresh()), [])
+            self.assertEqual(published, self.cache.etag("/api/places?", [PLACES]))
+
+            # A script or another worker wrote
+            collection.find.return_value = AsyncCursor([{"_id": PLACES, "version": 2}])
+            self.assertEqual(asyncio.run(self.cache.refresh()), [PLACES])
+            self.assertNotEqual(published, self.cache.etag("/api/places?", [PLACES]))
+
+            # Mongo down: the local bump still invalidates
+            collection.find_one_and_update.side_effect = ConnectionError("down")
+            current = self.cache.etag("/api/places?", [PLACES])
+            asyncio.run(self.cache.publish(PLACES))
+            self.assertNotEqual(current, self.cache.etag("/api/places?", [PLACES]))
+
+    def test_external_writes_run_listeners(self):
+        collection = MagicMock()
+        reloads = []
+
+        async def reload():
+            reloads.append(self.cache.version(PLACES))
+
+        async def scenario():
+            self.cache.on_external_change(PLACES, reload)
+            watcher = asyncio.create_task(self.cache.watch(0.01))
+            # Our own write: no reload
+            collection.find_one_and_update = AsyncMock(return_value={"_id": PLACES, "version": 1})
+            await self.cache.publish(PLACES)
+            collection.find.side_effect = lambda _: AsyncCursor([{"_id": PLACES, "version": 1}])
+            await asyncio.sleep(0.05)
+            self.assertEqual(reloads, [])
+            # Another writer got in before our increment: the watcher still reloads
+            collection.find_one_and_update = AsyncMock(return_value={"_id": PLACES, "version": 3})
+            await self.cache.publish(PLACES)
+            collection.find.side_effect = lambda _: AsyncCursor([{"_id": PLACES, "version": 3}])
+            await asyncio.sleep(0.05)
+            watcher.cancel()
+
+        with patch("src.core.cache.CacheVersion") as MockCacheVersion:
+            MockCacheVersion.get_pymongo_collection.return_value = collection
+            asyncio.run(asyncio.wait_for(scenario(), 2))
+        self.assertEqual(len(reloads), 1)
+
+    def test_etag_matches(self):
+        etag = '"abc"'
+        self.assertTrue(etag_matches('"abc"', etag))
+        self.assertTrue(etag_matches('W/"abc"', etag))
+        self.assertTrue(etag_matches('"x", "abc"', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches('"x"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import time
+import unittest
+from bson import ObjectId
+from src.core.search_index import SearchIndex
+
+def _place(name, **fields):
+    return {"_id": ObjectId(), "name": name, **fields}
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.cafe = _place("Cà Phê Vợt", categories=["Cafe"], vibes=["Vintage", "Chill"], rating=4.6)
+        self.bar = _place("Bar Đêm", categories=["Bar"], vibes=["Lively"], mood=["Chill"], rating=4.0)
+        self.work = _place("The Workshop", categories=["Cafe", "Workspace"], vibes=["Quiet"], rating=4.8)
+        for p in (self.cafe, self.bar, self.work):
+            self.index.upsert(p)
+
+    def ids(self, hits):
+        return [doc_id for doc_id, _ in hits]
+
+    def test_diacritic_folding(self):
+        self.assertEqual(self.ids(self.index.search("ca phe")), [str(self.cafe["_id"])])
+        self.assertEqual(self.ids(self.index.search("bar dem")), [str(self.bar["_id"])])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.ids(self.index.search("works")), [str(self.work["_id"])])
+
+    def test_name_outranks_other_fields(self):
+        hits = self.ids(self.index.search("chill"))
+        # vibes weigh as much as mood, but the shorter doc wins under BM25 length normalization
+        self.assertEqual(set(hits), {str(self.cafe["_id"]), str(self.bar["_id"])})
+        self.assertEqual(self.ids(self.index.search("cafe quiet"))[0], str(self.work["_id"]))
+
+    def test_min_rating(self):
+        self.assertEqual(self.ids(self.index.search("cafe", min_rating=4.7)), [str(self.work["_id"])])
+
+    def test_update_and_remove(self):
+        self.index.upsert({**self.bar, "name": "Speakeasy"})
+        self.assertEqual(self.index.search("dem"), [])
+        self.assertEqual(len(self.index.search("speakeasy")), 1)
+
+        self.index.remove(self.bar["_id"])
+        self.assertEqual(self.index.search("speakeasy"), [])
+        self.assertEqual(len(self.index), 2)
+
+    def test_write_evicts_only_touched_words(self):
+        self.index.search("cafe")
+        self.index.search("bar")
+        self.index.upsert(_place("New Cafe", categories=["Cafe"]))
+        cached = {word for word, _ in self.index._cache}
+        self.assertNotIn("cafe", cached)
+        self.assertIn("bar", cached)
+        self.assertEqual(len(self.index.search("cafe")), 3)
+
+    def test_stopwords_only(self):
+        self.assertEqual(self.index.search("tìm gần đây"), [])
+
+    def test_query_speed(self):
+        index = SearchIndex()
+        vibes = ["Chill", "Cozy", "Vintage", "Lively", "Quiet", "Romantic", "Industrial", "Rooftop"]
+        for i in range(20000):
+            index.upsert(_place(f"Place {i} Coffee", categories=["Cafe" if i % 3 else "Bar"], vibes=[vibes[i % 8], vibes[(i * 7) % 8]]))
+
+        index.search("cafe chill") # Warm the per-word cache
+        start = time.perf_counter()
+        for _ in range(100):
+            index.search("cafe chill", limit=5)
+        self.assertLess((time.perf_counter() - start) / 100, 0.005)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import json
+import unittest
+from datetime import datetime
+from bson import ObjectId
+from src.database.models import PlaceSummary
+from src.core.serialization import dumps_bytes, model_defaults, model_projection, prepare_rows, parse_fields, to_columns
+
+class TestSerialization(unittest.TestCase):
+    def test_fast_path_matches_model_dump(self):
+        docs = [
+            {
+                "_id": ObjectId(),
+                "name": "Full",
+                "location": {"type": "Point", "coordinates": [106.7, 10.77]},
+                "categories": ["Cafe"],
+                "vibes": ["Chill"],
+                "rating": 4.5,
+                "created_at": datetime(2025, 1, 1, 12, 30, 0, 123000),
+            },
+            # Legacy document with most fields missing
+            {"_id": ObjectId(), "name": "Sparse"},
+        ]
+
+        expected = [PlaceSummary.model_validate(d).model_dump(mode='json', by_alias=True) for d in docs]
+        fast = json.loads(dumps_bytes(prepare_rows(docs, model_defaults(PlaceSummary))))
+
+        self.assertEqual(fast, expected)
+
+    def test_projection_uses_mongo_names(self):
+        projection = model_projection(PlaceSummary)
+        self.assertIn("_id", projection)
+        self.assertNotIn("id", projection)
+        self.assertNotIn("raw_ai_response", projection)
+
+    def test_parse_fields(self):
+        self.assertIsNone(parse_fields(None, PlaceSummary))
+        self.assertEqual(parse_fields("name, rating,id", PlaceSummary), ["_id", "name", "rating"])
+        with self.assertRaises(ValueError):
+            parse_fields("name,raw_ai_response", PlaceSummary)
+
+    def test_to_columns(self):
+        rows = [{"_id": "a", "name": "A"}, {"_id": "b", "name": "B", "rating": 4.0}]
+        self.assertEqual(to_columns(rows, ["_id", "name", "rating"]), {
+            "columns": ["_id", "name", "rating"],
+            "rows": [["a", "A", None], ["b", "B", 4.0]],
+        })
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from src.core.stats import stats_delta, snapshot_fields
+
+class TestStatsDelta(unittest.TestCase):
+    def test_insert(self):
+        new = {"categories": ["Cafe", "Cafe", "Work"], "vibes": ["Chill"], "price_level": "$$"}
+        self.assertEqual(stats_delta(None, new), {
+            "total": 1,
+            "categories.Cafe": 1,
+            "categories.Work": 1,
+            "vibes.Chill": 1,
+            "price_levels.＄$": 1,
+        })
+
+    def test_delete(self):
+        old = {"categories": ["Bar"], "vibes": [], "price_level": None}
+        self.assertEqual(stats_delta(old, None), {"total": -1, "categories.Bar": -1})
+
+    def test_update_only_counts_changes(self):
+        old = snapshot_fields({"categories": ["Cafe", "Work"], "vibes": ["Chill"], "price_level": "$"})
+        new = {"categories": ["Cafe", "Date"], "vibes": ["Chill"], "price_level": "$$"}
+        self.assertEqual(stats_delta(old, new), {
+            "categories.Date": 1,
+            "categories.Work": -1,
+            "price_levels.＄$": 1,
+            "price_levels.＄": -1,
+        })
+
+    def test_keys_are_escaped(self):
+        inc = stats_delta(None, {"categories": ["St. Coffee", "$pecial"]})
+        self.assertIn("categories.St． Coffee", inc)
+        self.assertIn("categories.＄pecial", inc)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import re
+import unicodedata
+import unittest
+from src.core.text import fold, fold_pattern, tokenize, search_terms, search_terms_filter
+
+class TestText(unittest.TestCase):
+    def test_fold(self):
+        self.assertEqual(fold("Cà Phê Đường Phố"), "ca phe duong pho")
+        self.assertEqual(tokenize("Bún bò, Huế!"), ["bun", "bo", "hue"])
+
+    def test_fold_pattern(self):
+        for term, text in [("ca phe", "Cà Phê Vợt"), ("cà phê", "CA PHE"), ("duong", "Đường"), ("ca phe", unicodedata.normalize("NFD", "Cà Phê"))]:
+            self.assertTrue(re.search(fold_pattern(term), text, re.I), (term, text))
+        self.assertIsNone(re.search(fold_pattern("pho"), "Phan", re.I))
+        self.assertTrue(re.search(fold_pattern("c++"), "C++ Bar", re.I))
+
+    def test_search_terms(self):
+        place = {"name": "Cà Phê Vợt", "categories": ["Cafe", "Cà phê"], "address": None, "vibes": ["Chill"]}
+        self.assertEqual(search_terms(place), ["ca", "cafe", "chill", "phe", "vot"])
+
+    def test_search_terms_filter(self):
+        self.assertEqual(search_terms_filter("   "), {})
+        self.assertEqual(search_terms_filter("Cà"), {"search_terms": {"$regex": "^ca"}})
+        self.assertEqual(
+            search_terms_filter("cà phê cà vo"),
+            {"$and": [{"search_terms": "ca"}, {"search_terms": "phe"}, {"search_terms": {"$regex": "^vo"}}]}
+        )
+
+if __name__ == "__main__":
+    unittest.main()
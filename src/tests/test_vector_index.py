@@ -0,0 +1,75 @@
+import time
+import unittest
+from bson import ObjectId
+from src.core.search_index import fuse_rankings
+from src.core.vector_index import VectorIndex
+
+def _place(name, **fields):
+    return {"_id": ObjectId(), "name": name, **fields}
+
+class TestVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = VectorIndex()
+        self.work = _place("Nest", categories=["Workspace", "Cafe"], vibes=["Chill", "Quiet"], rating=4.7,
+                           raw_ai_response={"details": {"amenities": ["Wifi", "Power Outlets"]}})
+        self.bar = _place("Lush", categories=["Bar"], vibes=["Lively", "Loud"], occasions=["Group"], rating=4.1)
+        self.pho = _place("Phở Thìn", categories=["Restaurant"], meal_types=["Breakfast"], rating=4.5)
+        for p in (self.work, self.bar, self.pho):
+            self.index.upsert(p)
+
+    def ids(self, hits):
+        return [doc_id for doc_id, _ in hits]
+
+    def test_semantic_match(self):
+        hits = self.index.search("quiet spot to work with wifi")
+        self.assertEqual(hits[0][0], str(self.work["_id"]))
+        self.assertEqual(self.ids(self.index.search("pho breakfast"))[0], str(self.pho["_id"]))
+
+    def test_unrelated_query_finds_nothing(self):
+        self.assertEqual(self.index.search("xyzzy qwerty blorp"), [])
+        self.assertEqual(self.index.search("hello marin"), [])
+        # Weak overlaps are still there when asked for
+        self.assertTrue(self.index.search("xyzzy qwerty blorp", min_score=0))
+
+    def test_details_from_separate_payload(self):
+        # New places keep their AI payload in place_raw, not inline
+        corner = _place("Corner", categories=["Cafe"])
+        self.index.upsert(corner, {"details": {"noise_level": "Silent", "amenities": ["Bookshelves"]}})
+        self.assertEqual(self.ids(self.index.search("silent bookshelves"))[0], str(corner["_id"]))
+
+    def test_min_rating_and_similar(self):
+        self.assertNotIn(str(self.bar["_id"]), self.ids(self.index.search("lively bar", min_rating=4.5)))
+
+        twin = _place("Nest 2", categories=["Workspace"], vibes=["Quiet"])
+        self.index.upsert(twin)
+        similar = self.ids(self.index.similar(self.work["_id"], limit=2))
+        self.assertEqual(similar[0], str(twin["_id"]))
+        self.assertNotIn(str(self.work["_id"]), similar)
+
+    def test_update_and_remove(self):
+        self.index.upsert({**self.bar, "categories": ["Rooftop"], "vibes": ["Sunset"]})
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.ids(self.index.search("rooftop sunset"))[0], str(self.bar["_id"]))
+
+        self.index.remove(self.work["_id"])
+        self.assertEqual(len(self.index), 2)
+        self.assertNotIn(str(self.work["_id"]), self.ids(self.index.search("workspace")))
+        # The moved row still answers for its own id
+        self.assertEqual(self.ids(self.index.search("breakfast"))[0], str(self.pho["_id"]))
+
+    def test_fuse_rankings(self):
+        self.assertEqual(fuse_rankings([("a", 9.0), ("b", 5.0)], [("b", 0.9), ("c", 0.8)], limit=2), ["b", "a"])
+
+    def test_query_speed(self):
+        index = VectorIndex()
+        vibes = ["Chill", "Cozy", "Vintage", "Lively", "Quiet", "Romantic", "Industrial", "Rooftop"]
+        for i in range(20000):
+            index.upsert(_place(f"Place {i}", categories=["Cafe" if i % 3 else "Bar"], vibes=[vibes[i % 8], vibes[(i * 7) % 8]]))
+
+        start = time.perf_counter()
+        for _ in range(20):
+            index.search("cozy vintage cafe", limit=5)
+        self.assertLess((time.perf_counter() - start) / 20, 0.05)
+
+if __name__ == "__main__":
+    unittest.main()